@@ -0,0 +1,758 @@
+""" Backends for evaluating the generated expressions
+
+Each backend turns a SymPy matrix into a function of the joint angles
+(and velocities and offsets, depending on the expression), saving what
+it generates into the folder of the expression so that it can be loaded
+on later starts instead of being generated again.
+
+The parameters of an expression are given as groups of symbols, such as
+the joint angles, and the generated functions take one array (or
+sequence) of values per group, e.g. function(q, dq), indexing the values
+they use from it. Callers pass their arrays straight through, rather
+than building a tuple of floats to unpack into the call.
+
+    numpy : lambdify with the NumPy module, the default
+    math : straight-line Python using the math module, with common
+        subexpressions calculated once, which avoids the overhead of
+        NumPy ufuncs on scalars
+    numba : the math source compiled with numba.njit, if Numba is installed
+    cython : compiled to C with autowrap, if Cython is installed
+
+Entries repeated in a matrix, such as the mirrored entries of the
+symmetric inertia matrix, are calculated only once by every backend.
+
+An expression can be given in terms of intermediate variables, such as
+the transforms along a kinematic chain, calculated in order before its
+entries, so that the structure they share isn't expanded into every
+entry.
+
+Backends with streams set can also generate their function one entry at
+a time, see write_source, which bounds the memory used to print the
+large matrices of arms with many joints.
+
+New backends are added to BACKENDS with register.
+"""
+import importlib.util
+import inspect
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import sympy as sp
+from sympy.printing.numpy import NumPyPrinter
+from sympy.printing.pycode import PythonCodePrinter
+from sympy.utilities.autowrap import CythonCodeWrapper
+from sympy.utilities.codegen import (
+    CCodeGen, CodeGenArgumentListError, InputArgument, Result)
+
+import abr_control.utils.os_utils
+
+
+BACKENDS = {}
+# how the generated functions take their parameters, part of the config
+# hash so that functions generated with another convention aren't loaded
+CALLING_CONVENTION = 'arrays'
+
+
+def register(backend):
+    """ Adds a backend to BACKENDS, keyed by its name
+
+    Parameters
+    ----------
+    backend : Backend
+        the backend to add
+    """
+    BACKENDS[backend.name] = backend
+    return backend
+
+
+def available():
+    """ Returns the names of the backends usable in this environment """
+    return [name for name, backend in BACKENDS.items()
+            if backend.available()]
+
+
+def load_module(name, path):
+    """ Loads a Python or extension module from file
+
+    The module is not added to sys.path or sys.modules.
+
+    Parameters
+    ----------
+    name : string
+        the name of the module
+    path : string
+        the location of the module file
+    """
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def repeated_entries(expression):
+    """ Returns True if entries of a matrix are the same expression
+
+    Such as the mirrored entries of a symmetric matrix, which are then
+    calculated only once. Constant entries aren't counted.
+
+    Parameters
+    ----------
+    expression : sympy.Matrix or list of sympy.Matrix
+        the expression to calculate
+    """
+
+    if not isinstance(expression, sp.MatrixBase):
+        return False
+    entries = [entry for entry in expression if not entry.is_number]
+    return len(set(entries)) < len(entries)
+
+
+def count_ops(expression, intermediates=(), cse=True):
+    """ Returns the number of operations to calculate an expression
+
+    Parameters
+    ----------
+    expression : sympy.Matrix or list of sympy.Matrix
+        the expression to calculate
+    intermediates : list of tuples, optional (Default: ())
+        (sympy.Symbol, expression) pairs of intermediate variables the
+        expression is written in terms of, their operations are counted
+        too
+    cse : boolean, optional (Default: True)
+        if True, operations are counted after common subexpression
+        elimination, each subexpression once
+    """
+
+    if not isinstance(expression, list):
+        expression = [expression]
+    expressions = [value for _, value in intermediates] + [
+        sp.Matrix(matrix) for matrix in expression]
+    if not cse:
+        return sum(sp.count_ops(value) for value in expressions)
+    subexpressions, reduced = sp.cse(expressions)
+    return (sum(sp.count_ops(value) for _, value in subexpressions) +
+            sum(sp.count_ops(value) for value in reduced))
+
+
+def unpack_source(parameters):
+    """ Returns the names of the arguments of a generated function, and
+    the lines unpacking the value of each parameter from them
+
+    Parameters
+    ----------
+    parameters : list of lists of sympy.Symbol
+        the groups of parameters of the generated function, in order
+    """
+
+    arguments = ['_arg%i' % ii for ii in range(len(parameters))]
+    lines = ['    %s%s = %s' % (
+        ', '.join(str(parameter) for parameter in group),
+        ',' if len(group) == 1 else '', argument)
+        for argument, group in zip(arguments, parameters)]
+    return arguments, lines
+
+
+def math_source(expression, parameters, flatten=False, out=False,
+                intermediates=()):
+    """ Returns the source of a function calculating each entry of an
+    expression with the math module
+
+    Common subexpressions are calculated only once. The function is
+    named function, and returns a NumPy array of the expression's shape.
+
+    Parameters
+    ----------
+    expression : sympy.Matrix
+        the expression to calculate
+    parameters : list of lists of sympy.Symbol
+        the groups of parameters of the generated function, in order,
+        each taken as one array argument
+    flatten : boolean, optional (Default: False)
+        if True, the returned array is 1D
+    out : boolean, optional (Default: False)
+        if True, the function takes the array to write into as its first
+        argument, rather than allocating it
+    intermediates : list of tuples, optional (Default: ())
+        (sympy.Symbol, expression) pairs of intermediate variables the
+        expression is written in terms of, calculated in order before
+        it, each from the parameters and the variables before it
+    """
+
+    printer = PythonCodePrinter({'standard': 'python3'})
+    # calculate common subexpressions only once
+    subexpressions, entries = sp.cse(
+        list(expression), symbols=sp.numbered_symbols('_x'))
+
+    arguments, unpack = unpack_source(parameters)
+    if out:
+        arguments.insert(0, 'out')
+    lines = ['def function(%s):' % ', '.join(arguments)] + unpack
+    for symbol, subexpression in list(intermediates) + subexpressions:
+        lines.append('    %s = %s' % (symbol, printer.doprint(subexpression)))
+    if not out:
+        shape = ((len(entries),) if flatten else tuple(expression.shape))
+        lines.append('    out = numpy.empty(%s)' % (shape,))
+    for ii, entry in enumerate(entries):
+        if flatten:
+            index = '%i' % ii
+        else:
+            index = '%i, %i' % divmod(ii, expression.shape[1])
+        lines.append('    out[%s] = %s' % (index, printer.doprint(entry)))
+    lines.append('    return out')
+    return '\n'.join(lines)
+
+
+def repeated_subexpressions(expressions):
+    """ Returns the subexpressions used more than once by a list of
+    expressions
+
+    Only the nodes of the expression trees are visited, each once, so
+    that subexpressions shared by many entries aren't expanded.
+
+    Parameters
+    ----------
+    expressions : list of sympy expressions
+        the expressions to search
+    """
+
+    seen = set()
+    repeated = set()
+    stack = list(expressions)
+    while len(stack) > 0:
+        node = stack.pop()
+        if node.is_Atom:
+            continue
+        if node in seen:
+            repeated.add(node)
+            continue
+        seen.add(node)
+        stack.extend(node.args)
+    return repeated
+
+
+def write_source(afile, expression, parameters, printer=None, flatten=False,
+                 out=False, intermediates=()):
+    """ Writes the source of a function calculating an expression one
+    entry at a time
+
+    The subexpressions used more than once across all of the entries are
+    found first, then each entry is printed in turn, after any of them it
+    is the first to use, and written to afile. Unlike math_source, which
+    prints every entry at once after eliminating common subexpressions,
+    only one entry is held printed in memory at a time, but products and
+    sums aren't searched for common factors and terms. The function is
+    named function, and returns a NumPy array of the expression's shape,
+    or a list of them for a list of matrices.
+
+    Parameters
+    ----------
+    afile : file
+        the open file to write the source to
+    expression : sympy.Matrix or list of sympy.Matrix
+        the expression to calculate
+    parameters : list of lists of sympy.Symbol
+        the groups of parameters of the generated function, in order,
+        each taken as one array argument
+    printer : sympy.printing.CodePrinter, optional (Default: None)
+        prints each entry, if None with the math module, as math_source
+    flatten : boolean, optional (Default: False)
+        if True, the returned array is 1D
+    out : boolean, optional (Default: False)
+        if True, the function takes the array to write into as its first
+        argument, rather than allocating it
+    intermediates : list of tuples, optional (Default: ())
+        (sympy.Symbol, expression) pairs of intermediate variables the
+        expression is written in terms of, calculated in order before
+        it, each from the parameters and the variables before it
+    """
+
+    if printer is None:
+        printer = PythonCodePrinter({'standard': 'python3'})
+    matrices = ([expression] if isinstance(expression, sp.MatrixBase)
+                else list(expression))
+    if isinstance(expression, sp.MatrixBase):
+        names = ['out']
+    else:
+        names = ['_out%i' % ii for ii in range(len(matrices))]
+
+    arguments, unpack = unpack_source(parameters)
+    if out:
+        arguments.insert(0, 'out')
+    afile.write('def function(%s):\n' % ', '.join(arguments))
+    for line in unpack:
+        afile.write(line + '\n')
+    if not out:
+        for name, matrix in zip(names, matrices):
+            shape = (len(matrix),) if flatten else tuple(matrix.shape)
+            afile.write('    %s = numpy.empty(%s)\n' % (name, shape))
+    for symbol, intermediate in intermediates:
+        afile.write('    %s = %s\n' % (symbol, printer.doprint(intermediate)))
+
+    repeated = repeated_subexpressions(
+        [entry for matrix in matrices for entry in matrix])
+    symbols = sp.numbered_symbols('_x')
+    # the symbol each repeated subexpression is calculated into
+    calculated = {}
+
+    def reduce(node):
+        """ Returns node with its repeated subexpressions replaced by their
+        symbols, writing those not yet calculated """
+        if node.is_Atom:
+            return node
+        if node in calculated:
+            return calculated[node]
+        reduced = node.func(*[reduce(arg) for arg in node.args])
+        if node in repeated:
+            symbol = next(symbols)
+            afile.write('    %s = %s\n' % (symbol, printer.doprint(reduced)))
+            calculated[node] = reduced = symbol
+        return reduced
+
+    for name, matrix in zip(names, matrices):
+        for ii, entry in enumerate(matrix):
+            if flatten:
+                index = '%s[%i]' % (name, ii)
+            else:
+                index = '%s[%i, %i]' % ((name,) + divmod(ii, matrix.shape[1]))
+            afile.write('    %s = %s\n' % (
+                index, printer.doprint(reduce(entry))))
+    afile.write('    return %s\n' % (
+        names[0] if isinstance(expression, sp.MatrixBase)
+        else '[%s]' % ', '.join(names)))
+
+
+def benchmark(function, sizes, n_calls=100, n_repeats=3):
+    """ Returns the fastest time per call of a function, in seconds
+
+    The function is called with random parameters, once before timing
+    so that any just-in-time compilation is not included.
+
+    Parameters
+    ----------
+    function : function
+        the function to time
+    sizes : list of ints
+        the number of values in each array argument of the function
+    n_calls : int, optional (Default: 100)
+        the number of calls timed together
+    n_repeats : int, optional (Default: 3)
+        the number of times to repeat the timing, the fastest is returned
+    """
+
+    parameters = [np.random.uniform(-np.pi, np.pi, size) for size in sizes]
+    function(*parameters)
+    times = []
+    for ii in range(n_repeats):
+        start_time = time.perf_counter()
+        for jj in range(n_calls):
+            function(*parameters)
+        times.append((time.perf_counter() - start_time) / n_calls)
+    return min(times)
+
+
+def call_times(function, sizes, n_calls=1000):
+    """ Returns the time taken by each of a number of calls of a function,
+    in seconds
+
+    The function is called with random parameters, once before timing
+    so that any just-in-time compilation is not included.
+
+    Parameters
+    ----------
+    function : function
+        the function to time
+    sizes : list of ints
+        the number of values in each array argument of the function
+    n_calls : int, optional (Default: 1000)
+        the number of calls to time
+    """
+
+    parameters = [np.random.uniform(-np.pi, np.pi, size) for size in sizes]
+    function(*parameters)
+    times = np.empty(n_calls)
+    for ii in range(n_calls):
+        start_time = time.perf_counter()
+        function(*parameters)
+        times[ii] = time.perf_counter() - start_time
+    return times
+
+
+class Backend():
+    """ Generates, saves, and loads the functions of an expression
+
+    Subclasses set name and implement generate and load.
+    """
+
+    name = None
+    # whether the backend implements stream
+    streams = False
+    # whether generated functions calculate common subexpressions once
+    cse = False
+
+    def available(self):
+        """ Returns True if the backend can be used in this environment """
+        return True
+
+    def generate(self, folder, filename, expression, parameters,
+                 intermediates=()):
+        """ Generates a function calculating expression, saving it to folder
+
+        Parameters
+        ----------
+        folder : string
+            the folder of the expression
+        filename : string
+            the name of the generated function
+        expression : sympy.Matrix
+            the expression to calculate
+        parameters : list of lists of sympy.Symbol
+            the groups of parameters of the generated function, in order,
+            each taken as one array argument
+        intermediates : list of tuples, optional (Default: ())
+            (sympy.Symbol, expression) pairs of intermediate variables the
+            expression is written in terms of, calculated in order before
+            it, each from the parameters and the variables before it
+        """
+        raise NotImplementedError
+
+    def stream(self, folder, filename, expression, parameters,
+               intermediates=()):
+        """ Generates a function calculating expression one entry at a
+        time, saving it to folder, see write_source
+
+        Parameters
+        ----------
+        folder : string
+            the folder of the expression
+        filename : string
+            the name of the generated function
+        expression : sympy.Matrix or list of sympy.Matrix
+            the expression to calculate
+        parameters : list of lists of sympy.Symbol
+            the groups of parameters of the generated function, in order,
+            each taken as one array argument
+        intermediates : list of tuples, optional (Default: ())
+            (sympy.Symbol, expression) pairs of intermediate variables the
+            expression is written in terms of, calculated in order before
+            it, each from the parameters and the variables before it
+        """
+        raise NotImplementedError
+
+    def load(self, folder, filename):
+        """ Loads the function saved to folder, None if there isn't one
+
+        Parameters
+        ----------
+        folder : string
+            the folder of the expression
+        filename : string
+            the name of the generated function
+        """
+        raise NotImplementedError
+
+    def is_saved(self, folder, filename):
+        """ Returns True if the function has been saved to folder
+
+        Parameters
+        ----------
+        folder : string
+            the folder of the expression
+        filename : string
+            the name of the generated function
+        """
+        raise NotImplementedError
+
+
+class NumPy(Backend):
+    """ Lambdifies the expression with the NumPy module
+
+    The source of the lambdified function is saved as a Python module
+    that only depends on NumPy, so that it can be loaded without
+    unpickling the expression or importing SymPy.
+    """
+
+    name = 'numpy'
+    streams = True
+
+    def _path(self, folder, filename):
+        return '%s/%s.py' % (folder, filename)
+
+    def generate(self, folder, filename, expression, parameters,
+                 intermediates=(), cse=False):
+        """ Generates a function calculating expression, saving it to folder
+
+        Parameters
+        ----------
+        folder : string
+            the folder of the expression
+        filename : string
+            the name of the generated function
+        expression : sympy.Matrix or list of sympy.Matrix
+            the expression to calculate
+        parameters : list of lists of sympy.Symbol
+            the groups of parameters of the generated function, in order,
+            each taken as one array argument
+        intermediates : list of tuples, optional (Default: ())
+            (sympy.Symbol, expression) pairs of intermediate variables the
+            expression is written in terms of, calculated in order before
+            it, each from the parameters and the variables before it
+        cse : boolean, optional (Default: False)
+            if True, common subexpressions are calculated only once. Always
+            True if the expression has repeated entries
+        """
+
+        cse = cse or repeated_entries(expression)
+        if len(intermediates) > 0:
+            # lambdify calculates the intermediate variables first, as it
+            # does the common subexpressions returned by a cse function
+            subexpressions, reduced = (
+                sp.cse(expression, list=False) if cse else ([], expression))
+
+            def cse(expression):
+                return list(intermediates) + subexpressions, reduced
+        function = sp.lambdify(parameters, expression, "numpy", cse=cse)
+
+        # the generated source runs in the same namespace lambdify uses
+        # for the NumPy module
+        source = (
+            '""" Generated from the %s expression, do not edit """\n'
+            'import numpy\n'
+            'from numpy import *\n'
+            'from numpy.linalg import *\n\n\n'
+            '%s\n\n'
+            'function = %s\n' % (filename, inspect.getsource(function),
+                                 function.__name__))
+        with abr_control.utils.os_utils.atomic_write(
+                self._path(folder, filename)) as afile:
+            afile.write(source)
+
+        return function
+
+    def stream(self, folder, filename, expression, parameters,
+               intermediates=()):
+        with abr_control.utils.os_utils.atomic_write(
+                self._path(folder, filename)) as afile:
+            afile.write(
+                '""" Generated from the %s expression one entry at a '
+                'time, do not edit """\n'
+                'import numpy\n\n\n' % filename)
+            write_source(afile, expression, parameters, NumPyPrinter(),
+                         intermediates=intermediates)
+        return self.load(folder, filename)
+
+    def load(self, folder, filename):
+        if not self.is_saved(folder, filename):
+            return None
+        return load_module(filename, self._path(folder, filename)).function
+
+    def is_saved(self, folder, filename):
+        return os.path.isfile(self._path(folder, filename))
+
+
+class Math(Backend):
+    """ Calculates each entry with the math module
+
+    Single states are much cheaper to calculate with Python floats than
+    with NumPy scalars, and common subexpressions are calculated once.
+    """
+
+    name = 'math'
+    streams = True
+    cse = True
+
+    def _path(self, folder, filename):
+        return '%s/%s_%s.py' % (folder, filename, self.name)
+
+    def _header(self):
+        return 'import math\nimport numpy\n\n\n'
+
+    def generate(self, folder, filename, expression, parameters,
+                 intermediates=()):
+        source = (
+            '""" Generated from the %s expression, do not edit """\n'
+            '%s%s\n' % (filename, self._header(), math_source(
+                expression, parameters, intermediates=intermediates)))
+        with abr_control.utils.os_utils.atomic_write(
+                self._path(folder, filename)) as afile:
+            afile.write(source)
+        return self.load(folder, filename)
+
+    def stream(self, folder, filename, expression, parameters,
+               intermediates=()):
+        with abr_control.utils.os_utils.atomic_write(
+                self._path(folder, filename)) as afile:
+            afile.write(
+                '""" Generated from the %s expression one entry at a '
+                'time, do not edit """\n%s' % (filename, self._header()))
+            write_source(afile, expression, parameters,
+                         intermediates=intermediates)
+        return self.load(folder, filename)
+
+    def load(self, folder, filename):
+        if not self.is_saved(folder, filename):
+            return None
+        return load_module(
+            '%s_%s' % (filename, self.name),
+            self._path(folder, filename)).function
+
+    def is_saved(self, folder, filename):
+        return os.path.isfile(self._path(folder, filename))
+
+
+class Numba(Math):
+    """ Compiles the math source with numba.njit
+
+    The compiled machine code is cached next to the source by Numba.
+    Each argument is passed to the compiled function as a float64 array,
+    as Numba only takes Python lists through its deprecated reflected
+    list support, and compiles a version of the function for each type
+    of argument it's given.
+    """
+
+    name = 'numba'
+
+    def available(self):
+        return importlib.util.find_spec('numba') is not None
+
+    def _header(self):
+        return ('import math\nimport numba\nimport numpy\n\n\n'
+                '@numba.njit(cache=True)\n')
+
+    def load(self, folder, filename):
+        compiled = super(Numba, self).load(folder, filename)
+        if compiled is None:
+            return None
+
+        def function(*args):
+            # float64 arrays are passed through without copying
+            return compiled(*[np.asarray(arg, dtype='float64')
+                              for arg in args])
+        return function
+
+
+class ArrayCythonCodeWrapper(CythonCodeWrapper):
+    """ Wraps the generated C function in a Cython function taking each
+    array argument as any sequence of floats
+
+    Each is viewed as a contiguous array of doubles, which doesn't copy
+    float64 arrays, rather than requiring 2D arrays matching the shape
+    of its MatrixSymbol.
+    """
+
+    def _partition_args(self, args):
+        returns, arguments, local, inferred = super(
+            ArrayCythonCodeWrapper, self)._partition_args(args)
+        # declare a view of each array argument
+        arrays = [arg for arg in arguments if self._is_array(arg)]
+        return returns, arguments, arrays + local, inferred
+
+    def _is_array(self, arg):
+        return isinstance(arg, InputArgument) and bool(arg.dimensions)
+
+    def _prototype_arg(self, arg):
+        if self._is_array(arg):
+            return self._string_var(arg.name)
+        return super(ArrayCythonCodeWrapper, self)._prototype_arg(arg)
+
+    def _declare_arg(self, arg):
+        if self._is_array(arg):
+            self._need_numpy = True
+            name = self._string_var(arg.name)
+            return ('const double[::1] _%s = np.ascontiguousarray(%s, '
+                    'dtype=np.double)' % (name, name))
+        return super(ArrayCythonCodeWrapper, self)._declare_arg(arg)
+
+    def _call_arg(self, arg):
+        if self._is_array(arg):
+            return '&_%s[0]' % self._string_var(arg.name)
+        return super(ArrayCythonCodeWrapper, self)._call_arg(arg)
+
+
+class Cython(Backend):
+    """ Compiles the expression to C with autowrap's code generation and
+    Cython
+
+    Each group of parameters is replaced with the entries of a
+    MatrixSymbol, so that the C function takes a pointer to its values.
+    Intermediate variables are declared as local constants of the C
+    function, before those for its common subexpressions. The generated
+    C code and binaries are saved to the folder of the expression, the
+    binaries last.
+    """
+
+    name = 'cython'
+
+    def available(self):
+        return importlib.util.find_spec('Cython') is not None
+
+    def _binaries(self, folder):
+        if not os.path.isdir(folder):
+            return []
+        return sorted(
+            [sf for sf in os.listdir(folder) if sf.endswith('.so')],
+            key=lambda sf: os.path.getmtime(os.path.join(folder, sf)))
+
+    def generate(self, folder, filename, expression, parameters,
+                 intermediates=()):
+        print('Compiling cython function for %s ...' % filename)
+        # compile in a folder of its own, then move the files in, so
+        # that other processes never load a partially written binary
+        build = tempfile.mkdtemp(dir=folder, prefix='.build')
+        # calculate repeated entries only once
+        code_gen = CCodeGen(project='autowrap',
+                            cse=repeated_entries(expression))
+        arrays = [sp.MatrixSymbol('_arg%i' % ii, len(group), 1)
+                  for ii, group in enumerate(parameters)]
+        replacements = {
+            parameter: array[jj, 0] for array, group in zip(arrays, parameters)
+            for jj, parameter in enumerate(group)}
+        expression = expression.xreplace(replacements)
+        # the intermediate variables aren't arguments
+        symbols = [symbol for symbol, _ in intermediates]
+        try:
+            try:
+                routine = code_gen.routine(
+                    'autofunc', expression, arrays, global_vars=symbols)
+            except CodeGenArgumentListError as e:
+                # add the array written into, returned by the wrapper
+                routine = code_gen.routine('autofunc', expression, arrays + [
+                    missing.name for missing in e.missing_args],
+                    global_vars=symbols)
+            routine.local_vars = [
+                Result(intermediate.xreplace(replacements), name=symbol,
+                       result_var=symbol)
+                for symbol, intermediate in intermediates] + list(
+                    routine.local_vars)
+            function = ArrayCythonCodeWrapper(code_gen, build).wrap_code(
+                routine)
+            for saved_file in sorted(os.listdir(build),
+                                     key=lambda sf: sf.endswith('.so')):
+                if os.path.isfile(os.path.join(build, saved_file)):
+                    os.replace(os.path.join(build, saved_file),
+                               os.path.join(folder, saved_file))
+        finally:
+            shutil.rmtree(build, ignore_errors=True)
+        return function
+
+    def load(self, folder, filename):
+        saved_files = self._binaries(folder)
+        if len(saved_files) == 0:
+            return None
+
+        # load the module directly from file, under the name it was
+        # compiled with, without adding it to sys.path or sys.modules
+        saved_file = saved_files[-1]
+        module = load_module(
+            saved_file.split('.')[0], os.path.join(folder, saved_file))
+        return module.autofunc_c
+
+    def is_saved(self, folder, filename):
+        return len(self._binaries(folder)) > 0
+
+
+for backend in [NumPy(), Math(), Numba(), Cython()]:
+    register(backend)
@@ -1,14 +1,24 @@
 import cloudpickle
+import contextlib
 import hashlib
-import importlib
+import json
 import numpy as np
 import os
 import sympy as sp
-from sympy.utilities.autowrap import autowrap
 import sys
+import time
 
+import abr_control.manage_cache
 import abr_control.utils.os_utils
 from abr_control.utils.paths import cache_dir
+from abr_control.version import version
+from .numeric_dynamics import NumericDynamics
+from . import backends, parallel
+
+
+# the file in the folder of a function generated in terms of intermediate
+# variables, holding the (intermediates, expression) it was generated from
+STRUCTURED = 'structured.pickle'
 
 
 # TODO : store lambdified functions, currently running into pickling errors
@@ -38,24 +48,95 @@ class BaseConfig():
     use_cython : boolean, optional (Default: False)
         if True, a more efficient function is generated
         useful when execution time is more important than
-        generation time
+        generation time. The functions are compiled to C with Cython
+        and the binaries saved to config_folder, to be loaded on later
+        starts. The fused dynamics() functions are always lambdified.
+        Equivalent to backend='cython'
+    backend : string, optional (Default: None)
+        how the generated functions are evaluated, one of the names in
+        backends.BACKENDS ('numpy', 'math', 'numba', 'cython'), or
+        'auto' to benchmark every available backend when each function
+        is first generated and use the fastest, recording the choice
+        in config_folder. If None, 'cython' if use_cython is True,
+        otherwise 'numpy'
+    dynamics_engine : string, optional (Default: 'symbolic')
+        how M, g, and C are calculated, either
+        'symbolic': generated with SymPy and lambdify
+        'numeric': calculated with the recursive Newton-Euler and composite
+        rigid body algorithms, which requires no generation
+    n_processes : int, optional (Default: 1)
+        the number of processes used to generate functions. If greater
+        than 1, independent matrix entries and frames are derived in
+        parallel in a process pool. If None, one process is used per CPU
+    require_cached : boolean, optional (Default: False)
+        if True, raises an Exception at construction if any of the
+        functions the config can need has not been saved to file, and
+        whenever a function would otherwise be generated, so that nothing
+        is generated inside a control loop. Functions can be generated
+        ahead of time with python -m abr_control.precompile
     MEANS : list of floats, Optional (Default: None)
         expected mean of joint angles and velocities in [rad] and [rad/sec]
         respectively. Expected value for each joint. Only used for adaptation
     SCALES : list of floats, Optional (Default: None)
         expected variance of joint angles and velocities. Expected value for
         each joint. Only used for adaptation
+    OFFSETS : dictionary, Optional (Default: None)
+        named [x,y,z] offsets to register, see register_offset
+    symbolic_inertia : boolean, optional (Default: False)
+        if True, the mass and the principal moments of inertia of each
+        link are parameters of the generated M, g, C, C_dq and C_v
+        functions, passed at call time, rather than constants folded into
+        them. They can then be changed with set_link_inertia, e.g. for a
+        payload, without generating the functions again
+    streaming : boolean, optional (Default: False)
+        if True, the functions are generated one matrix entry at a time,
+        writing the source of each entry to file as soon as it's printed,
+        which bounds the memory needed to generate the large matrices of
+        arms with many joints, such as C of the jaco2. Common
+        subexpressions are then only eliminated within each entry. Only
+        supported by backends that stream, 'numpy', 'math' and 'numba'
+    structured : boolean, optional (Default: False)
+        if True, the Tx, J, M and g functions are generated in terms of
+        intermediate variables for the transform to each frame of the
+        kinematic chain, calculated in chain order, each from the one
+        before it, rather than with every entry expanded in terms of the
+        joint angles, where this takes fewer operations (for the ur5 and
+        jaco2, J and M). The Jacobians are then the cross products of the
+        joint axes with the offsets from the joints, which differ from
+        the derivatives of Tx only as far as the rotations of the fixed
+        transforms aren't orthonormal (up to 1e-4 for the rounded
+        constants of the jaco2), so they are saved to a config folder of
+        their own. Only used by configs with a kinematic chain, see _CHAIN
 
     Attributes
     ----------
+        _batch : dictionary
+            for batched (vectorized) versions of the generated functions
         _C : function
             placeholder for the partial centrifugal and Coriolis function
+        _C_dq : function
+            placeholder for the centrifugal and Coriolis vector function
+        _C_v : function
+            placeholder for the function of the product of C with a vector
+        _CHAIN : list
+            the kinematic chain of the robot, as (frame name, joint index,
+            transform) tuples in order from the origin. The transform to
+            each frame is the transform to the previous frame, times a
+            rotation about its z axis by q[joint index] (if the joint index
+            is not None), times the fixed transform
         _dJ : dictionary
             for Jacobian time derivative functions of joints and COMs
+        _dJ_dq : dictionary
+            for functions of the product of dJ and dq of joints and COMs
+        _dynamics : dictionary
+            for fused functions calculating several quantities at once
         _g : function
             placeholder for joint space gravity function
         _J  : dictionary
             for Jacobian calculations
+        J_orientation : list
+            the orientation part of the Jacobian of each joint, the z axis
+            of its frame, derived from the transforms when first needed
         _KZ : sympy.Matrix
             z isolation vector for calculating orientation part of Jacobian
         _M_LINKS : list
@@ -64,97 +145,1083 @@ class BaseConfig():
             inertia matrices of the robot joints
         _M : function
             placeholder for joint space inertia matrix function
+        _numeric : NumericDynamics
+            placeholder for the numeric dynamics engine
         _orientation : dictionary
             placeholder for orientation functions of joints and COMs
+        _out : dictionary
+            for functions writing their result into a given array
         _R : dictionary
             for transform matrix calculations for joints and COMs
         _T_inv : dictionary
             for inverse transform calculations for joints and COMs
+        _tick : dictionary
+            the quantities calculated at the state set by at(), or None
+            outside of an at() block
         _Tx : dictionary
             for point transform calculations for joints and COMs
+        _Tx_all : dictionary
+            for the positions (and rotations) of every frame at once
+        OFFSETS : dictionary
+            the registered [x,y,z] offsets, keyed by name
+        backends : dictionary
+            the backend chosen for each function when backend is 'auto',
+            keyed by filename
         config_folder : string
-            location to save to and load functions from, based on the hash
-            of the subclass, so that generated functions are saved uniquely
+            location to save to and load functions from, based on
+            config_hash, so that generated functions are saved uniquely
+        config_hash : string
+            a hash of the symbolic model the functions are generated
+            from: the kinematic chain, the link and joint inertia
+            matrices, L, the gravity vector, the library version, and the
+            calling convention of the generated functions. Configs
+            without a kinematic chain are hashed by the source of their
+            module instead of the model
+        generation_peak_rss : dictionary
+            the peak resident set size of the process in bytes while
+            generating each function, keyed by filename. On Linux the
+            peak is reset after each function is generated, elsewhere it's
+            the peak since the process started
+        generation_times : dictionary
+            the wall time in seconds taken to generate each expression
+            saved to file, keyed by filename
+        inertia_parameters : list of sympy.Symbol
+            with symbolic_inertia, the mass and principal moments of
+            inertia of each link, (m_link0, Ixx_link0, Iyy_link0,
+            Izz_link0, m_link1, ...), otherwise empty
+        tick_hits : int
+            the number of quantities served from an at() block without
+            being calculated again
+        tick_misses : int
+            the number of quantities calculated inside an at() block
     """
 
+    # the quantities that can be requested from dynamics(), in the
+    # order they are returned by the generated function
+    _DYNAMICS_KEYS = ('Tx', 'J', 'dJ', 'M', 'g', 'C', 'R', 'T_inv',
+                      'dJ_dq', 'C_dq')
+    # the rows of the Jacobian, the positions along and the rotations
+    # about the x, y and z axes
+    _J_ROWS = 'xyzabg'
+    # the quantities with a row for each row of the Jacobian
+    _ROWS_KEYS = ('J', 'dJ', 'dJ_dq')
+
     def __init__(self, N_JOINTS, N_LINKS, ROBOT_NAME="robot",
-                 use_cython=False, MEANS=None, SCALES=None):
+                 use_cython=False, dynamics_engine='symbolic',
+                 n_processes=1, require_cached=False, backend=None,
+                 MEANS=None, SCALES=None, OFFSETS=None,
+                 symbolic_inertia=False, streaming=False, structured=False):
 
         self.N_JOINTS = N_JOINTS
         self.N_LINKS = N_LINKS
         self.ROBOT_NAME = ROBOT_NAME
-        self.use_cython = use_cython
+        if backend is None:
+            backend = 'cython' if use_cython else 'numpy'
+        if backend != 'auto' and backend not in backends.BACKENDS:
+            raise ValueError('Invalid backend: %s' % backend)
+        self.backend = backend
+        self.use_cython = backend == 'cython'
+        # the backend used by each function, keyed by filename
+        self.backends = {}
+        if dynamics_engine not in ('symbolic', 'numeric'):
+            raise ValueError(
+                'Invalid dynamics engine: %s' % dynamics_engine)
+        self.dynamics_engine = dynamics_engine
+        if streaming and not (backend in backends.BACKENDS and
+                              backends.BACKENDS[backend].streams):
+            raise ValueError(
+                'Streaming generation is not supported by the %s backend'
+                % backend)
+        self.streaming = streaming
+        self.structured = structured
+        # the transforms of the kinematic chain, see _chain_transforms
+        self._structured_chain = None
+        self.n_processes = n_processes
+        self.require_cached = require_cached
+        self.generation_peak_rss = {}
+        self.generation_times = {}
+        self.tick_hits = 0
+        self.tick_misses = 0
         # dictionaries set by the sub-config, used for scaling input into
         # neural systems. Calculate by recording data from movement of interest
         self.MEANS = MEANS  # expected mean of joints angles / velocities
         self.SCALES = SCALES  # expected variance of joint angles / velocities
+        # constant offsets with specialized functions, see register_offset
+        self.OFFSETS = {}
+        if OFFSETS is not None:
+            for offset_name, offset in OFFSETS.items():
+                self.register_offset(offset_name, offset)
 
         # create function placeholders and dictionaries
+        self._batch = {}
         self._C = None
+        self._C_dq = None
+        self._C_v = None
         self._dJ = {}
+        self._dJ_dq = {}
+        self._dynamics = {}
         self._g = None
         self._J = {}
         self._M = None
+        self._numeric = None
         self._orientation = {}
+        self._out = {}
         self._R = {}
         self._T_inv = {}
+        self._tick = None
+        self._tick_q = None
+        self._tick_dq = None
         self._Tx = {}
+        self._Tx_all = {}
 
         self._KZ = sp.Matrix([0, 0, 1])
+        # orientation part of the Jacobian, see J_orientation
+        self._J_orientation = None
 
         # inertia matrix lists, to be filled out by subclasses
         self._M_LINKS = []
         self._M_JOINTS = []
-
-        # specify / create the folder to save to and load from
-        self.config_folder = (cache_dir + '/%s/saved_functions/' % ROBOT_NAME)
-        # create a unique hash for the config file
-        hasher = hashlib.md5()
-        with open(sys.modules[self.__module__].__file__, 'rb') as afile:
-            buf = afile.read()
-            hasher.update(buf)
-        self.config_hash = hasher.hexdigest()
-        self.config_folder += self.config_hash
-        # make config folder if it doesn't exist
-        abr_control.utils.os_utils.makedirs(self.config_folder)
+        # kinematic chain, to be filled out by subclasses
+        self._CHAIN = []
+        # dictionary for storing calculated transforms, see _calc_T
+        self._T = {}
+
+        # the folder to save to and load from, named by a hash of the
+        # symbolic model, which is calculated once the subclass has set
+        # the model up
+        self._config_folder = None
+        self._config_hash = None
+        # the functions this config holds the file lock of
+        self._locked = set()
+        # whether a load from the config folder has been recorded, see
+        # manage_cache
+        self._use_recorded = False
 
         # set up our joint angle symbols
         self.q = [sp.Symbol('q%i' % ii) for ii in range(self.N_JOINTS)]
         self.dq = [sp.Symbol('dq%i' % ii) for ii in range(self.N_JOINTS)]
+        # set up a vector multiplying C, see C_v
+        self.v = [sp.Symbol('v%i' % ii) for ii in range(self.N_JOINTS)]
         # set up an (x,y,z) offset
         self.x = [sp.Symbol('x'), sp.Symbol('y'), sp.Symbol('z')]
+        # set up the link masses and inertias, see set_link_inertia
+        self.symbolic_inertia = symbolic_inertia
+        self.inertia_parameters = []
+        if self.symbolic_inertia:
+            for ii in range(self.N_LINKS):
+                self.inertia_parameters += [
+                    sp.Symbol('%s_link%i' % (name, ii))
+                    for name in ('m', 'Ixx', 'Iyy', 'Izz')]
+        # their values, read from _M_LINKS when first needed
+        self._inertia_values = None
 
         self.gravity = sp.Matrix([[0, 0, -9.81, 0, 0, 0]]).T
 
-    def _generate_and_save_function(self, filename, expression, parameters):
-        """ Creates a folder, saves generated cython functions
+    @property
+    def config_hash(self):
+        """ A hash of the symbolic model the functions are generated from
 
-        Create a folder in the users cache directory, named based on a hash
-        of the current robot_config subclass.
+        Calculated the first time it's needed, once the subclass has set
+        up the model. Comments, docstrings, and parameters that don't
+        change the generated functions, such as MEANS and SCALES, don't
+        change the hash.
+        """
+
+        if self._config_hash is None:
+            if len(self._CHAIN) == 0:
+                # no kinematic chain to hash, fall back to the source
+                self._config_hash = hashlib.md5((
+                    self._source_hash() + backends.CALLING_CONVENTION
+                ).encode('utf-8')).hexdigest()
+            else:
+                self._config_hash = self._model_hash()
+        return self._config_hash
+
+    @property
+    def J_orientation(self):
+        """ The orientation part of the Jacobian of each joint
+
+        The rotation of each joint's frame times the z axis it rotates
+        about. Derived the first time a function is generated, so that
+        configs whose functions are all saved to file don't multiply out
+        the transforms of the kinematic chain.
+        """
+
+        if self._J_orientation is None:
+            self._J_orientation = [
+                self._calc_T('joint%i' % ii)[:3, :3] * self._KZ
+                for ii in range(self.N_JOINTS)]
+        return self._J_orientation
+
+    @J_orientation.setter
+    def J_orientation(self, J_orientation):
+        self._J_orientation = J_orientation
+
+    @property
+    def config_folder(self):
+        """ The folder to save to and load functions from """
+
+        if self._config_folder is None:
+            self._config_folder = (
+                cache_dir + '/%s/saved_functions/%s' % (
+                    self.ROBOT_NAME, self.config_hash))
+            # make config folder if it doesn't exist
+            abr_control.utils.os_utils.makedirs(self._config_folder)
+        return self._config_folder
+
+    @config_folder.setter
+    def config_folder(self, folder):
+        self._config_folder = folder
+        self._use_recorded = False
+
+    def _model_hash(self):
+        """ Returns an MD5 hash of the symbolic inputs of the config
+
+        The transforms of the kinematic chain, which _calc_T multiplies
+        out, and the inertia matrices are hashed by their SymPy
+        representation, which is canonical, so the hash only changes
+        when their values do. With symbolic_inertia, the link inertia
+        matrices are hashed by their symbols, not their values.
+        """
+
+        def canonical(matrix):
+            return sp.srepr(sp.ImmutableMatrix(sp.Matrix(matrix)))
+
+        L = getattr(self, 'L', None)
+        model = [
+            version,
+            backends.CALLING_CONVENTION,
+            self.N_JOINTS,
+            [(name, joint, canonical(transform))
+             for name, joint, transform in self._CHAIN],
+            [canonical(M) for M in self._inertia_matrices()[0]],
+            [canonical(M) for M in self._inertia_matrices()[1]],
+            None if L is None else np.asarray(L, dtype='float64').tolist(),
+            canonical(self.gravity),
+        ]
+        if self.structured:
+            # the functions generated in terms of the transforms of the
+            # chain differ slightly from the expanded ones, so they are
+            # saved to a folder of their own
+            model.append('structured')
+        return hashlib.md5(repr(model).encode('utf-8')).hexdigest()
+
+    def _source_hash(self):
+        """ Returns an MD5 hash of the source file of the subclass
+
+        Used to name the config folder of configs without a kinematic
+        chain, and of every config before they were hashed by their
+        symbolic model, see abr_control.migrate_cache.
+        """
+
+        hasher = hashlib.md5()
+        with open(sys.modules[self.__module__].__file__, 'rb') as afile:
+            hasher.update(afile.read())
+        return hasher.hexdigest()
+
+    def _generate_and_save_function(self, filename, expression, parameters,
+                                    intermediates=()):
+        """ Creates a folder, saves generated functions
 
-        If use_cython is True, uses the created folder to save the autowrap
-        binaries, so that they can be loaded in quickly later.
+        Create a folder in the users cache directory, named based on a hash
+        of the symbolic model of the config, and generates the function
+        with the config's backend, which saves what it generates (the
+        source of the function, or the autowrap generated C code and
+        binaries) to the folder so that it can be loaded quickly later.
+        If backend is 'auto', the function is generated with every
+        available backend and the fastest is used. With streaming, the
+        function is generated one entry at a time. The expression can be
+        in terms of intermediate variables, (sympy.Symbol, expression)
+        pairs calculated in order before it, see _chain_expression.
         """
 
+        self._check_generation_allowed(filename)
+
         # check for / create the save folder for this expression
         folder = self.config_folder + '/' + filename
         abr_control.utils.os_utils.makedirs(folder)
+        # record what the function was generated from when it differs
+        # from the saved expression, see report_functions
+        if len(intermediates) > 0:
+            with abr_control.utils.os_utils.atomic_write(
+                    '%s/%s' % (folder, STRUCTURED), 'wb') as afile:
+                cloudpickle.dump((list(intermediates), expression), afile)
+        elif os.path.isfile('%s/%s' % (folder, STRUCTURED)):
+            os.remove('%s/%s' % (folder, STRUCTURED))
+
+        if self.backend == 'auto':
+            function = self._select_backend(
+                filename, expression, parameters, intermediates)
+        elif self.streaming:
+            function = backends.BACKENDS[self.backend].stream(
+                folder, filename, expression, parameters, intermediates)
+        else:
+            function = backends.BACKENDS[self.backend].generate(
+                folder, filename, expression, parameters, intermediates)
+        self._record_peak_rss(filename)
+        return function
+
+    def _select_backend(self, filename, expression, parameters,
+                        intermediates=()):
+        """ Generates a function with every available backend, returning
+        the fastest
+
+        Each backend's function is timed on random parameters, and
+        backends with results differing from the first are discarded.
+        The choice and timings are saved to backend.json in the folder
+        of the function.
+
+        Parameters
+        ----------
+        filename : string
+            the name of the generated function
+        expression : sympy.Matrix
+            the expression to calculate
+        parameters : list of lists of sympy.Symbol
+            the groups of parameters of the generated function, in order,
+            each taken as one array argument
+        intermediates : list of tuples, optional (Default: ())
+            the (sympy.Symbol, expression) pairs of intermediate variables
+            the expression is written in terms of
+        """
+
+        folder = self.config_folder + '/' + filename
+        sizes = [len(group) for group in parameters]
+        test_parameters = [np.random.uniform(-np.pi, np.pi, size)
+                           for size in sizes]
+
+        functions = {}
+        seconds = {}
+        expected = None
+        for name in backends.available():
+            function = backends.BACKENDS[name].generate(
+                folder, filename, expression, parameters, intermediates)
+            result = np.array(function(*test_parameters), dtype='float64')
+            if expected is None:
+                expected = result
+            elif not np.allclose(result.flatten(), expected.flatten()):
+                print('Discarding %s function for %s, results differ' % (
+                    name, filename))
+                continue
+            functions[name] = function
+            seconds[name] = backends.benchmark(function, sizes)
+
+        choice = min(seconds, key=seconds.get)
+        self.backends[filename] = choice
+        with abr_control.utils.os_utils.atomic_write(
+                '%s/backend.json' % folder) as afile:
+            json.dump({'backend': choice, 'seconds': seconds}, afile)
+        print('Using %s function for %s (%s)' % (
+            choice, filename, ', '.join(
+                '%s: %.2f us' % (name, seconds[name] * 1e6)
+                for name in sorted(seconds, key=seconds.get))))
+        return functions[choice]
+
+    def _function_backend(self, filename):
+        """ Returns the name of the backend used for a function
+
+        If backend is 'auto', returns the backend recorded when the
+        function was generated, or None if it has not been generated.
+
+        Parameters
+        ----------
+        filename : string
+            the name of the function
+        """
+
+        if self.backend != 'auto':
+            return self.backend
+        if filename not in self.backends:
+            path = '%s/%s/backend.json' % (self.config_folder, filename)
+            if not os.path.isfile(path):
+                return None
+            with open(path) as afile:
+                self.backends[filename] = json.load(afile)['backend']
+        return self.backends[filename]
+
+    def _lambdify_and_save(self, filename, expression, parameters,
+                           cse=False):
+        """ Lambdifies an expression, saving the generated source to file
+
+        Used for the functions always generated with the numpy backend.
+
+        Parameters
+        ----------
+        filename : string
+            the name of the generated function
+        expression : sympy.Matrix or list of sympy.Matrix
+            the expression to lambdify
+        parameters : list of lists of sympy.Symbol
+            the groups of parameters of the generated function, in order,
+            each taken as one array argument
+        cse : boolean, optional (Default: False)
+            if True, common subexpressions are calculated only once
+        """
+
+        self._check_generation_allowed(filename)
+        folder = self.config_folder + '/' + filename
+        if self.streaming:
+            function = backends.BACKENDS['numpy'].stream(
+                folder, filename, expression, parameters)
+        else:
+            function = backends.BACKENDS['numpy'].generate(
+                folder, filename, expression, parameters, cse=cse)
+        self._record_peak_rss(filename)
+        return function
+
+    def _record_peak_rss(self, filename):
+        """ Records and reports the peak resident set size of the process
+        while generating a function
+
+        The peak is then reset, so that it's measured from here for the
+        next function generated.
+
+        Parameters
+        ----------
+        filename : string
+            the name of the generated function
+        """
+
+        peak = abr_control.utils.os_utils.peak_rss()
+        if peak is None:
+            return
+        self.generation_peak_rss[filename] = peak
+        print('Peak memory generating %s: %.1f MB' % (filename, peak / 2**20))
+        abr_control.utils.os_utils.reset_peak_rss()
+
+    def register_offset(self, name, x):
+        """ Registers a constant offset inside a reference frame
+
+        Tx, J, dJ, and T_inv called with the values of a registered offset
+        use functions generated with the values folded in as constants,
+        which are much faster than the general functions of (x, y, z).
+        These functions are saved to file keyed by the offset values.
+
+        Parameters
+        ----------
+        name : string
+            the name of the offset
+        x : numpy.array
+            the [x,y,z] offset inside the reference frame [meters]
+        """
+
+        x = np.array(x, dtype='float64')
+        if x.shape != (3,):
+            raise ValueError('Offset %s must be [x,y,z], got %s' % (name, x))
+        self.OFFSETS[name] = x
+
+    def set_link_inertia(self, link, mass=None, inertia=None):
+        """ Changes the mass and principal moments of inertia of a link
+
+        Takes effect on the next call to M, g, C, C_dq, C_v or dynamics,
+        without generating any functions again. Requires symbolic_inertia,
+        or the numeric dynamics engine.
+
+        Parameters
+        ----------
+        link : int
+            the index of the link, e.g. N_LINKS - 1 for the link holding
+            a payload
+        mass : float, optional (Default: None)
+            the mass of the link [kg], unchanged if None
+        inertia : numpy.array, optional (Default: None)
+            the principal moments of inertia of the link, [Ixx, Iyy, Izz]
+            [kg*m^2], unchanged if None
+        """
+
+        if not self.symbolic_inertia and self.dynamics_engine != 'numeric':
+            raise Exception(
+                'The link inertias are constants of the generated '
+                'functions, create the config with symbolic_inertia=True '
+                'to change them')
+
+        values = self._link_inertia(link)
+        if mass is not None:
+            values[0] = float(mass)
+        if inertia is not None:
+            inertia = np.array(inertia, dtype='float64')
+            if inertia.shape != (3,):
+                raise ValueError(
+                    'Inertia must be [Ixx, Iyy, Izz], got %s' % inertia)
+            values[1:] = [float(value) for value in inertia]
+
+        # the functions are saved under the hash of the model as created
+        self.config_hash
+        m, Ixx, Iyy, Izz = values
+        self._M_LINKS[link] = sp.diag(m, m, m, Ixx, Iyy, Izz)
+        self._inertia_values = None
+        self._numeric = None
+        if self._tick is not None:
+            # values calculated with the old inertia are out of date
+            self._tick.clear()
+
+    def _link_inertia(self, link):
+        """ Returns the mass and principal moments of inertia of a link,
+        [m, Ixx, Iyy, Izz], from its inertia matrix in _M_LINKS
+
+        Parameters
+        ----------
+        link : int
+            the index of the link
+        """
+
+        M = np.array(self._M_LINKS[link], dtype='float64')
+        diagonal = M.diagonal()
+        if (not np.allclose(M, np.diag(diagonal)) or
+                not np.allclose(diagonal[:3], diagonal[0])):
+            raise ValueError(
+                'The inertia matrix of link%i is not of the form '
+                'diag(m, m, m, Ixx, Iyy, Izz)' % link)
+        return [float(value) for value in diagonal[[0, 3, 4, 5]]]
+
+    def _inertia_parameters(self):
+        """ Returns the groups of parameters the generated functions of
+        the dynamics take after their others, inertia_parameters with
+        symbolic_inertia, otherwise none """
+
+        if not self.symbolic_inertia:
+            return []
+        return [self.inertia_parameters]
+
+    def _inertia_arguments(self):
+        """ Returns the arguments passed to the generated functions of the
+        dynamics after their others, an array of the values of
+        inertia_parameters with symbolic_inertia, otherwise none """
+
+        if not self.symbolic_inertia:
+            return ()
+        if self._inertia_values is None:
+            values = []
+            for ii in range(len(self.inertia_parameters) // 4):
+                values += self._link_inertia(ii)
+            self._inertia_values = (np.array(values, dtype='float64'),)
+        return self._inertia_values
+
+    def _inertia_matrices(self):
+        """ Returns the inertia matrices of the links and joints that the
+        functions are generated from
+
+        With symbolic_inertia, the link inertia matrices are
+        diag(m, m, m, Ixx, Iyy, Izz) of their inertia_parameters.
+        """
+
+        if not self.symbolic_inertia:
+            return self._M_LINKS, self._M_JOINTS
+        M_links = []
+        for ii in range(self.N_LINKS):
+            m, Ixx, Iyy, Izz = self.inertia_parameters[4 * ii:4 * ii + 4]
+            M_links.append(sp.diag(m, m, m, Ixx, Iyy, Izz))
+        return M_links, self._M_JOINTS
+
+    def _constant_offset(self, x):
+        """ Returns the values to fold into functions of an offset
+
+        Returns [0,0,0] for no offset, the values of the matching
+        registered offset, or None if x is not a constant offset.
+
+        Parameters
+        ----------
+        x : numpy.array
+            the [x,y,z] offset inside the reference frame [meters],
+            shape (3,), or shape (N, 3) for an offset per state
+        """
+
+        if len(x) == 0:
+            return None
+        if hasattr(x[0], '__len__'):
+            # offsets per state are only folded in if every state has
+            # the same one, otherwise the general function of (x, y, z)
+            # evaluates each state at its own offset
+            offset = self._constant_offset(x[0])
+            if offset is None or not np.allclose(x, offset):
+                return None
+            return offset
+        # compared element by element, with the same tolerances as
+        # numpy.allclose, so that no temporary arrays are created
+        if all(abs(value) <= 1e-8 for value in x):
+            return [0, 0, 0]
+        for offset in self.OFFSETS.values():
+            if all(abs(value - offset_value) <= 1e-8 + 1e-5 * abs(
+                    offset_value) for value, offset_value in zip(x, offset)):
+                return offset
+        return None
+
+    def _offset_name(self, name, x):
+        """ Returns the name of the functions for a frame and offset
+
+        Functions of constant offsets are named by the offset values,
+        e.g. 'EE[0,0,0]' or 'EE[0,0,0.12]', and general functions of
+        (x, y, z) by the frame name alone.
+
+        Parameters
+        ----------
+        name : string
+            name of the joint, link, or end-effector
+        x : numpy.array
+            the [x,y,z] offset inside the reference frame of 'name' [meters]
+        """
+
+        offset = self._constant_offset(x)
+        if offset is None:
+            return name
+        return name + '[%s]' % ','.join('%.10g' % value for value in offset)
+
+    def _rows_name(self, rows):
+        """ Returns the suffix naming the functions for a subset of the
+        rows of the Jacobian
+
+        Functions of all of the rows have no suffix, and functions of a
+        subset are suffixed by the rows, e.g. '[xyz]'.
+
+        Parameters
+        ----------
+        rows : string
+            the rows of the Jacobian, any of 'x', 'y', 'z' for position
+            and 'a', 'b', 'g' for orientation, in the order returned
+        """
+
+        if (len(rows) == 0 or len(set(rows)) != len(rows) or
+                any(row not in self._J_ROWS for row in rows)):
+            raise ValueError('Rows must be a subset of %s, got %s' % (
+                self._J_ROWS, rows))
+        if rows == self._J_ROWS:
+            return ''
+        return '[%s]' % rows
+
+    def _check_generation_allowed(self, filename):
+        """ Raises an Exception if require_cached is True
+
+        Parameters
+        ----------
+        filename : string
+            the name of the function about to be generated
+        """
+
+        if self.require_cached is True:
+            raise Exception(
+                'Function %s is not saved to file and require_cached is '
+                'True, generate it with python -m abr_control.precompile'
+                % filename)
+
+    def _is_cached(self, filename):
+        """ Returns True if a function has been saved to file
+
+        Parameters
+        ----------
+        filename : string
+            the name of the function
+        """
+
+        folder = self.config_folder + '/' + filename
+        if not os.path.isdir(folder):
+            return False
+        # the fused dynamics() and batched functions are always lambdified
+        backend = ('numpy' if 'dynamics[' in filename or
+                   filename.endswith('_batch')
+                   else self._function_backend(filename))
+        if backend is None:
+            return False
+        return backends.BACKENDS[backend].is_saved(folder, filename)
+
+    def _function_parameters(self, filename):
+        """ Returns the groups of parameters of a saved function, in the
+        order the function takes them
+
+        Parameters
+        ----------
+        filename : string
+            the name of the function
+        """
+
+        if filename.endswith('_batch'):
+            # the batched functions take one array per parameter
+            return [[parameter] for group in self._function_parameters(
+                filename[:-len('_batch')]) for parameter in group]
+        inertia = self._inertia_parameters()
+        if 'dynamics[' in filename:
+            return [self.q, self.dq, self.x] + inertia
+        if filename in ('M', 'g'):
+            return [self.q] + inertia
+        if filename in ('C', 'C_dq'):
+            return [self.q, self.dq] + inertia
+        if filename == 'C_v':
+            return [self.q, self.dq, self.v] + inertia
+        if filename.startswith('Tx_all') or filename.endswith('_R'):
+            return [self.q]
+        if '_dJ' in filename:
+            return [self.q, self.dq, self.x]
+        # Tx, J and T_inv
+        return [self.q, self.x]
+
+    def _required_functions(self, offsets=(), dynamics=(), rows='xyzabg'):
+        """ Returns the functions the config can need
+
+        Returns a list of (filename, generate) pairs, where calling
+        generate loads or generates the function. Includes Tx, J, dJ,
+        dJ_dq, R, and T_inv for every link, joint and the end-effector,
+        Tx_all, and M, g, C, C_dq and C_v if they are calculated
+        symbolically, and the batched functions of each but dJ_dq,
+        C_dq, C_v and Tx_all.
+
+        Parameters
+        ----------
+        offsets : list of numpy.array, optional (Default: ())
+            [x,y,z] offsets inside the end-effector reference frame, for
+            which Tx, J, dJ, dJ_dq, and T_inv are also needed, in addition to
+            the registered offsets [meters]
+        dynamics : list of tuples of strings, optional (Default: ())
+            the sets of quantities requested from dynamics() for the
+            end-effector, at each of the offsets and [0,0,0]
+        rows : string, optional (Default: 'xyzabg')
+            the rows of 'J', 'dJ' and 'dJ_dq' requested from dynamics()
+        """
+
+        def calc(function, *args, **kwargs):
+            return lambda: function(*args, **kwargs)
+
+        functions = []
+        frames = (['link%i' % ii for ii in range(self.N_LINKS)] +
+                  ['joint%i' % ii for ii in range(self.N_JOINTS)] + ['EE'])
+        for name in frames:
+            x = [0, 0, 0]
+            functions += [
+                (name + '[0,0,0]_Tx', calc(self._calc_Tx, name, x=x)),
+                (name + '[0,0,0]_J', calc(self._calc_J, name, x=x)),
+                (name + '[0,0,0]_dJ', calc(self._calc_dJ, name, x=x)),
+                (name + '[0,0,0]_dJ_dq', calc(self._calc_dJ_dq, name, x=x)),
+                (name + '_R', calc(self._calc_R, name)),
+                (name + '[0,0,0]_Tinv', calc(self._calc_T_inv, name, x=x)),
+                (name + '[0,0,0]_Tx_batch',
+                 calc(self._calc_batch, 'Tx', name, x=x)),
+                (name + '[0,0,0]_J_batch',
+                 calc(self._calc_batch, 'J', name, x=x)),
+                (name + '[0,0,0]_dJ_batch',
+                 calc(self._calc_batch, 'dJ', name, x=x)),
+                (name + '_R_batch', calc(self._calc_batch, 'R', name)),
+                (name + '[0,0,0]_Tinv_batch',
+                 calc(self._calc_batch, 'T_inv', name, x=x))]
+        offsets = list(self.OFFSETS.values()) + list(offsets)
+        for x in offsets:
+            name = self._offset_name('EE', x)
+            functions += [
+                (name + '_Tx', calc(self._calc_Tx, 'EE', x=x)),
+                (name + '_J', calc(self._calc_J, 'EE', x=x)),
+                (name + '_dJ', calc(self._calc_dJ, 'EE', x=x)),
+                (name + '_dJ_dq', calc(self._calc_dJ_dq, 'EE', x=x)),
+                (name + '_Tinv', calc(self._calc_T_inv, 'EE', x=x)),
+                (name + '_Tx_batch', calc(self._calc_batch, 'Tx', 'EE', x=x)),
+                (name + '_J_batch', calc(self._calc_batch, 'J', 'EE', x=x)),
+                (name + '_dJ_batch',
+                 calc(self._calc_batch, 'dJ', 'EE', x=x)),
+                (name + '_Tinv_batch',
+                 calc(self._calc_batch, 'T_inv', 'EE', x=x))]
+        functions += [('Tx_all', calc(self._calc_Tx_all, False)),
+                      ('Tx_all[R]', calc(self._calc_Tx_all, True))]
+        if self.dynamics_engine == 'symbolic':
+            functions += [('M', calc(self._calc_M)),
+                          ('g', calc(self._calc_g)),
+                          ('C', calc(self._calc_C)),
+                          ('C_dq', calc(self._calc_C_product, 'dq')),
+                          ('C_v', calc(self._calc_C_product, 'v')),
+                          ('M_batch', calc(self._calc_batch, 'M')),
+                          ('g_batch', calc(self._calc_batch, 'g')),
+                          ('C_batch', calc(self._calc_batch, 'C'))]
+
+        for want in dynamics:
+            if self.dynamics_engine == 'numeric':
+                want = [key for key in want
+                        if key not in ('M', 'g', 'C', 'C_dq')]
+            want = tuple(key for key in self._DYNAMICS_KEYS if key in want)
+            for x in [[0, 0, 0]] + list(offsets):
+                functions.append((
+                    self._dynamics_filename('EE', x, want, rows),
+                    calc(self._calc_dynamics, 'EE', x=x, want=want,
+                         rows=rows)))
+
+        # remove any duplicates, keeping the first
+        unique = {}
+        for filename, generate in functions:
+            unique.setdefault(filename, generate)
+        return list(unique.items())
+
+    def _check_cached(self):
+        """ Raises an Exception if require_cached is True and any of
+        the functions the config can need has not been saved to file
+
+        Called by subclasses once the config is fully set up.
+        """
+
+        if self.require_cached is True:
+            missing = [filename for filename, _ in self._required_functions()
+                       if not self._is_cached(filename)]
+            if len(missing) > 0:
+                raise Exception(
+                    'Functions %s are not saved to file and require_cached '
+                    'is True, generate them with python -m '
+                    'abr_control.precompile' % missing)
+
+    def _out_function(self, filename, calc, parameters, flatten=False,
+                      chain=None):
+        """ Loads or generates a function writing into a given array
 
-        if self.use_cython is True:
-            # binaries saved by specifying tempdir parameter
-            function = autowrap(expression, backend="cython",
-                                args=parameters, tempdir=folder)
-        function = sp.lambdify(parameters, expression, "numpy")
+        The function takes the array to write into followed by the
+        parameters, and calculates each entry with the math module, so
+        that no NumPy arrays are allocated. Its source is saved to file
+        next to the other functions for the expression.
 
+        Parameters
+        ----------
+        filename : string
+            the name of the generated function
+        calc : function
+            returns the expression, called only if the function has not
+            been saved to file
+        parameters : list of lists of sympy.Symbol
+            the groups of parameters of the generated function, in order,
+            each taken as one array argument
+        flatten : boolean, optional (Default: False)
+            if True, the array written into is 1D
+        chain : function, optional (Default: None)
+            with structured, returns the expression in terms of the
+            transforms of the kinematic chain, see _chain_expression
+        """
+
+        if self._out.get(filename, None) is None:
+            path = '%s/%s/%s_out.py' % (
+                self.config_folder, filename, filename)
+            with self._cache_lock(filename):
+                if not os.path.isfile(path):
+                    self._check_generation_allowed(filename)
+                    print('Generating in place function for %s' % filename)
+                    intermediates, expression = (), calc()
+                    if chain is not None:
+                        intermediates, expression = self._chain_expression(
+                            expression, chain, cse=True)
+                    self._save_out_source(
+                        path, filename, expression, parameters, flatten,
+                        intermediates)
+                    self._record_peak_rss(filename + '_out')
+                self._out[filename] = backends.load_module(
+                    filename + '_out', path).function
+        return self._out[filename]
+
+    def _save_out_source(self, path, filename, expression, parameters,
+                         flatten, intermediates=()):
+        """ Saves the source of a function writing into a given array
+
+        Parameters
+        ----------
+        path : string
+            the file to save the source to
+        filename : string
+            the name of the generated function
+        expression : sympy.Matrix
+            the expression to calculate
+        parameters : list of lists of sympy.Symbol
+            the groups of parameters of the generated function, in order,
+            each taken as one array argument
+        flatten : boolean
+            if True, the array written into is 1D
+        intermediates : list of tuples, optional (Default: ())
+            the (sympy.Symbol, expression) pairs of intermediate variables
+            the expression is written in terms of
+        """
+
+        abr_control.utils.os_utils.makedirs(os.path.dirname(path))
+        with abr_control.utils.os_utils.atomic_write(path) as afile:
+            afile.write(
+                '""" Generated from the %s expression, writes the result '
+                'into out, do not edit """\n'
+                'import math\n\n\n' % filename)
+            if self.streaming:
+                backends.write_source(afile, expression, parameters,
+                                      flatten=flatten, out=True,
+                                      intermediates=intermediates)
+            else:
+                afile.write('%s\n' % backends.math_source(
+                    expression, parameters, flatten=flatten, out=True,
+                    intermediates=intermediates))
+
+    def _calc_batch(self, key, name=None, x=[0, 0, 0], rows='xyzabg'):
+        """ Loads or generates a function that evaluates a quantity over
+        many states
+
+        The expression is lambdified element by element, with common
+        subexpression elimination, so that every entry broadcasts over
+        arrays of parameter values, including entries that are constant.
+        It's saved to file like the functions of single states, named by
+        the function of the quantity with a '_batch' suffix, e.g.
+        'EE[0,0,0]_J_batch'. The returned function takes one array of
+        shape (N,) per parameter and returns an array of shape
+        (N, rows, cols).
+
+        Parameters
+        ----------
+        key : string
+            the quantity, one of 'Tx', 'J', 'dJ', 'M', 'g', 'C', 'R' and
+            'T_inv'
+        name : string, optional (Default: None)
+            name of the joint, link, or end-effector, for the quantities
+            of a frame
+        x : numpy.array, optional (Default: [0,0,0])
+            the [x,y,z] offset inside the reference frame of 'name'
+            [meters], shape (3,) or (N, 3)
+        rows : string, optional (Default: 'xyzabg')
+            the rows of 'J' and 'dJ' to calculate, see J
+        """
+
+        N = self.N_JOINTS
+        if key == 'R':
+            filename = name + '_R'
+        elif key in ('M', 'g', 'C'):
+            filename = key
+        else:
+            filename = self._offset_name(name, x) + {
+                'Tx': '_Tx', 'J': '_J', 'dJ': '_dJ', 'T_inv': '_Tinv'}[key]
+            if key in ('J', 'dJ'):
+                filename += self._rows_name(rows)
+        filename += '_batch'
+        if self._batch.get(filename, None) is not None:
+            return self._batch[filename]
+
+        calc, shape, parameters = {
+            'Tx': (lambda: self._calc_Tx(name, x=x, lambdify=False),
+                   (4, 1), self.q + self.x),
+            'J': (lambda: self._calc_J(
+                name, x=x, rows=rows, lambdify=False),
+                  (len(rows), N), self.q + self.x),
+            'dJ': (lambda: self._calc_dJ(
+                name, x=x, rows=rows, lambdify=False),
+                   (len(rows), N), self.q + self.dq + self.x),
+            'M': (lambda: self._calc_M(lambdify=False),
+                  (N, N), self.q + self.inertia_parameters),
+            'g': (lambda: self._calc_g(lambdify=False),
+                  (N, 1), self.q + self.inertia_parameters),
+            'C': (lambda: self._calc_C(lambdify=False),
+                  (N, N), self.q + self.dq + self.inertia_parameters),
+            'R': (lambda: self._calc_R(name, lambdify=False),
+                  (3, 3), self.q),
+            'T_inv': (lambda: self._calc_T_inv(
+                name=name, x=x, lambdify=False),
+                      (4, 4), self.q + self.x),
+            }[key]
+
+        with self._cache_lock(filename):
+            # batched functions are always lambdified
+            expression, elements = self._load_from_file(
+                filename, True, backend='numpy')
+
+            if expression is None and elements is None:
+                start_time = time.time()
+                expression = sp.Matrix(calc())
+                self._save_to_file(filename, expression, start_time)
+
+            if elements is None:
+                self._check_generation_allowed(filename)
+                # lambdify the flattened (row major) list of matrix entries
+                elements = backends.BACKENDS['numpy'].generate(
+                    self.config_folder + '/' + filename, filename,
+                    list(expression), parameters, cse=True)
+                self._record_peak_rss(filename)
+
+        def function(*args):
+            n_states = args[0].shape[0]
+            result = np.empty((n_states, shape[0] * shape[1]),
+                              dtype='float32')
+            for ii, value in enumerate(elements(*args)):
+                # constant entries come back as scalars, broadcast them
+                result[:, ii] = value
+            return result.reshape((n_states,) + shape)
+
+        self._batch[filename] = function
         return function
 
-    def _load_from_file(self, filename, lambdify):
+    def _batch_parameters(self, q, dq=None, x=None, inertia=False):
+        """ Splits arrays of states into one array per function parameter
+
+        The batched functions take one array per parameter, rather than
+        one per group of parameters like the functions of single states.
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians], shape (N, N_JOINTS)
+        dq : numpy.array, optional (Default: None)
+            joint velocities [radians/second], shape (N, N_JOINTS)
+        x : numpy.array, optional (Default: None)
+            the [x,y,z] offset inside the reference frame [meters],
+            either shape (3,) to use the same offset for every state,
+            or shape (N, 3)
+        inertia : boolean, optional (Default: False)
+            if True, the values of inertia_parameters are appended, the
+            same for every state
+        """
+
+        q = np.atleast_2d(q)
+        parameters = list(q.T)
+        if dq is not None:
+            dq = np.atleast_2d(dq)
+            if dq.shape != q.shape:
+                raise ValueError('q and dq must have the same shape')
+            parameters += list(dq.T)
+        if x is not None:
+            x = np.broadcast_to(np.asarray(x, dtype='float64'),
+                                (q.shape[0], 3))
+            parameters += list(x.T)
+        if inertia:
+            for values in self._inertia_arguments():
+                parameters += list(values)
+        return parameters
+
+    def _numeric_dynamics(self):
+        """ Returns the numeric dynamics engine, creating it if needed """
+
+        if self._numeric is None:
+            self._numeric = NumericDynamics(self)
+        return self._numeric
+
+    @contextlib.contextmanager
+    def _cache_lock(self, filename):
+        """ Holds the file lock of a function while it's loaded or generated
+
+        Processes sharing a config folder take the lock before checking
+        for a saved function, so that only one of them generates it, and
+        the others wait and then load what it saved. The lock is
+        reentrant, functions generated while generating another (such
+        as M inside of a fused dynamics function) take their own locks.
+
+        Parameters
+        ----------
+        filename : string
+            the name of the function
+        """
+
+        if filename in self._locked:
+            yield
+            return
+
+        folder = self.config_folder + '/' + filename
+        abr_control.utils.os_utils.makedirs(folder)
+        self._locked.add(filename)
+        try:
+            with abr_control.utils.os_utils.file_lock(
+                    folder + '/.lock',
+                    message='Waiting for another process to generate '
+                    '%s ...' % filename):
+                yield
+        finally:
+            self._locked.discard(filename)
+
+    def _load_from_file(self, filename, lambdify, backend=None):
         """ Attempts to load in saved files
 
         Attempt to load in the specified function or expression from
         saved file, in a subfolder based on the hash of the robot_config.
         Takes a filename as an input and returns the function or expression,
-        depending on if lambdify is True or False, respectively.
+        depending on if lambdify is True or False, respectively. Functions
+        are loaded from what their backend saved (the cython binaries or
+        generated source), the saved expression is only loaded if no
+        function is found.
 
         Parameters
         ----------
@@ -163,8 +1230,14 @@ class BaseConfig():
         lambdify : boolean
             if True returns a function to calculate the matrix.
             If False returns the Sympy matrix
+        backend : string, optional (Default: None)
+            the name of the backend to load the function with, if None
+            uses the backend of the function
         """
 
+        if backend is None:
+            backend = self._function_backend(filename)
+
         expression = None
         function = None
 
@@ -172,26 +1245,11 @@ class BaseConfig():
         folder = self.config_folder + '/' + filename
         if os.path.isdir(folder) is not False:
             # check to see should return function or expression
-            if lambdify is True:
-                if self.use_cython is True:
-                    # check for cython binaries
-                    saved_file = [sf for sf in os.listdir(folder)
-                                  if sf.endswith('.so')]
-                    if len(saved_file) > 0:
-                        # if found, load in function from file
-                        print('Loading cython function from %s ...' % filename)
-                        if self.config_folder not in sys.path:
-                            sys.path.append(self.config_folder)
-                        saved_file = saved_file[0].split('.')[0]
-                        function_binary = importlib.import_module(
-                            filename + '.' + saved_file)
-                        function = getattr(function_binary, 'autofunc_c')
-                        # NOTE: This is a hack, but the above import command
-                        # imports both 'filename.saved_file' and 'saved_file'
-                        # having 'saved_file' in modules cause problems if
-                        # the cython autofunc wrapper is used after this.
-                        if saved_file in sys.modules.keys():
-                            del sys.modules[saved_file]
+            if lambdify is True and backend is not None:
+                function = backends.BACKENDS[backend].load(folder, filename)
+                if function is not None:
+                    print('Loading %s function from %s ...' % (
+                        backend, filename))
 
             if function is None:
                 # if function not loaded, check for saved expression
@@ -202,24 +1260,300 @@ class BaseConfig():
                         '%s/%s/%s' % (self.config_folder, filename, filename),
                         'rb'))
 
+        if (expression is not None or function is not None) and (
+                not self._use_recorded):
+            abr_control.manage_cache.record_use(self.config_folder)
+            self._use_recorded = True
+
         return expression, function
 
-    def g(self, q):
-        """ Loads or calculates the force of gravity in joint space
+    def _save_to_file(self, filename, expression, start_time):
+        """ Saves a generated expression to file
+
+        Also records and reports the wall time taken to generate it.
+
+        Parameters
+        ----------
+        filename : string
+            the name of the generated expression
+        expression : sympy.Matrix
+            the generated expression
+        start_time : float
+            the time.time() at which generation of the expression started
+        """
+
+        abr_control.utils.os_utils.makedirs(
+            '%s/%s' % (self.config_folder, filename))
+        with abr_control.utils.os_utils.atomic_write(
+                '%s/%s/%s' % (self.config_folder, filename, filename),
+                'wb') as afile:
+            cloudpickle.dump(expression, afile)
+
+        self.generation_times[filename] = time.time() - start_time
+        print('Generated %s in %.3f seconds' % (
+            filename, self.generation_times[filename]))
+
+    @contextlib.contextmanager
+    def at(self, q, dq=None):
+        """ Calculates each quantity at most once for the state (q, dq)
+
+        Inside the with block, the accessors and dynamics() called with
+        this state return the values calculated by their first call,
+        so that controllers and signals run on the same state share
+        them. Values are only shared while the with block is open, and
+        are read-only. Calls with a different state are calculated as
+        usual. The tick_hits and tick_misses counters record how many
+        quantities were shared and calculated.
+
+        Example usage:
+
+            with robot_config.at(q, dq):
+                u = ctrlr.generate(q, dq, target)
+                u += avoid.generate(q)
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        dq : numpy.array, optional (Default: None)
+            joint velocities [radians/second], required to share dJ and C
+        """
+
+        previous = (self._tick, self._tick_q, self._tick_dq)
+        self._tick = {}
+        self._tick_q = np.array(q)
+        self._tick_dq = None if dq is None else np.array(dq)
+        try:
+            yield self
+        finally:
+            self._tick, self._tick_q, self._tick_dq = previous
+
+    def _at_state(self, q, dq=None):
+        """ Returns True if (q, dq) is the state set by at()
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        dq : numpy.array, optional (Default: None)
+            joint velocities [radians/second], not compared if None
+        """
+
+        if not np.array_equal(q, self._tick_q):
+            return False
+        return dq is None or (self._tick_dq is not None and
+                              np.array_equal(dq, self._tick_dq))
+
+    def _tick_key(self, key, name, x):
+        """ Returns the key of a quantity in the at() values
+
+        Parameters
+        ----------
+        key : string
+            the quantity, one of 'Tx', 'J', 'dJ', 'M', 'g', 'C', 'R',
+            'T_inv', 'dJ_dq', 'C_dq', with 'J', 'dJ' and 'dJ_dq' suffixed
+            by the rows from _rows_name
+        name : string
+            name of the joint, link, or end-effector
+        x : numpy.array
+            the [x,y,z] offset inside reference frame of 'name' [meters]
+        """
+
+        if key in ('M', 'g', 'C', 'C_dq'):
+            return (key,)
+        if key == 'R':
+            return (key, name)
+        return (key, name, tuple(x))
+
+    def _untracked(self, calc, out=None):
+        """ Calls calc(out) without sharing values from at() """
+
+        tick, self._tick = self._tick, None
+        try:
+            return calc(out)
+        finally:
+            self._tick = tick
+
+    def _tick_value(self, key, calc, q, dq=None, out=None):
+        """ Returns a quantity calculated at most once inside at()
 
         Parameters
         ----------
+        key : tuple
+            the key of the quantity, from _tick_key
+        calc : function
+            calculates the quantity, taking the out array as input
         q : numpy.array
             joint angles [radians]
+        dq : numpy.array, optional (Default: None)
+            joint velocities [radians/second], if the quantity uses them
+        out : numpy.array, optional (Default: None)
+            if provided, the result is written into out
+        """
+
+        if not self._at_state(q, dq):
+            return self._untracked(calc, out)
+
+        value = self._tick.get(key, None)
+        if value is None:
+            self.tick_misses += 1
+            value = self._untracked(calc)
+            value.flags.writeable = False
+            self._tick[key] = value
+        else:
+            self.tick_hits += 1
+
+        if out is None:
+            return value
+        out[...] = value
+        return out
+
+    def g(self, q, out=None):
+        """ Loads or calculates the force of gravity in joint space
 
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        out : numpy.array, optional (Default: None)
+            if provided, the result is written into out, of shape
+            (N_JOINTS,), and out is returned without allocating any arrays
         """
+        if self._tick is not None:
+            return self._tick_value(
+                ('g',),
+                lambda out: self.g(q, out=out), q, out=out)
+
+        if self.dynamics_engine == 'numeric':
+            g = self._numeric_dynamics().g(q)
+            if out is not None:
+                out[:] = g
+                return out
+            return np.array(g, dtype='float32')
+        parameters = (q,) + self._inertia_arguments()
+        if out is not None:
+            return self._out_function(
+                'g', lambda: self._calc_g(lambdify=False),
+                [self.q] + self._inertia_parameters(),
+                flatten=True, chain=self._chain_g)(out, *parameters)
         # check for function in dictionary
         if self._g is None:
             self._g = self._calc_g()
-        parameters = tuple(q)
         return np.array(self._g(*parameters), dtype='float32').flatten()
 
-    def dJ(self, name, q, dq, x=[0, 0, 0]):
+    def dynamics(self, q, dq=None, name='EE', x=[0, 0, 0],
+                 want=('Tx', 'J', 'M', 'g'), rows='xyzabg'):
+        """ Loads or calculates several quantities in a single function call
+
+        All of the requested quantities are generated as one function,
+        with common subexpressions (the sin and cos of each joint, the
+        chained link transforms) shared between them, so that they are
+        only calculated once per call. Returns a dictionary with the
+        same keys as want, and values matching the output of the
+        corresponding accessor.
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        dq : numpy.array, optional (Default: None)
+            joint velocities [radians/second], required for 'dJ', 'C',
+            'dJ_dq' and 'C_dq'
+        name : string, optional (Default: 'EE')
+            name of the joint, link, or end-effector used for
+            'Tx', 'J', 'dJ', 'R', 'T_inv' and 'dJ_dq'
+        x : numpy.array, optional (Default: [0,0,0])
+            the [x,y,z] offset inside reference frame of 'name' [meters]
+            if not specified, (0, 0, 0) is hard coded in, rather than using
+            variable (x, y, z), which results in significant speedups.
+        want : tuple of strings, optional (Default: ('Tx', 'J', 'M', 'g'))
+            the quantities to calculate, any of
+            'Tx', 'J', 'dJ', 'M', 'g', 'C', 'R', 'T_inv', 'dJ_dq', 'C_dq'
+        rows : string, optional (Default: 'xyzabg')
+            the rows of 'J', 'dJ' and 'dJ_dq' to calculate, see J
+        """
+
+        if dq is None:
+            dq = np.zeros(self.N_JOINTS)
+
+        if self._tick is not None:
+            return self._tick_dynamics(q, dq, name, x, want, rows)
+
+        results = {}
+        if self.dynamics_engine == 'numeric':
+            # calculate the dynamics terms numerically
+            for key in ('M', 'g', 'C', 'C_dq'):
+                if key in want:
+                    results[key] = getattr(self, key)(
+                        *((q,) if key in ('M', 'g') else (q, dq)))
+            want = [key for key in want if key not in results]
+            if len(want) == 0:
+                return results
+
+        want = tuple(key for key in self._DYNAMICS_KEYS if key in want)
+        funcname = self._dynamics_filename(name, x, want, rows)
+        # check for function in dictionary
+        if self._dynamics.get(funcname, None) is None:
+            self._dynamics[funcname] = self._calc_dynamics(
+                name=name, x=x, want=want, rows=rows)
+        parameters = (q, dq, x) + self._inertia_arguments()
+        values = self._dynamics[funcname](*parameters)
+
+        for key, value in zip(want, values):
+            if key == 'Tx':
+                results[key] = value[:-1].flatten()
+            elif key in ('g', 'dJ_dq', 'C_dq'):
+                results[key] = np.array(value, dtype='float32').flatten()
+            elif key == 'T_inv':
+                results[key] = value
+            else:
+                results[key] = np.array(value, dtype='float32')
+        return results
+
+    def _tick_dynamics(self, q, dq, name, x, want, rows):
+        """ Returns the quantities from dynamics(), calculated at most
+        once inside at()
+
+        If any of the quantities has not been calculated yet, all of them
+        are calculated together, so that the same fused function is used
+        as outside of at().
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        dq : numpy.array
+            joint velocities [radians/second]
+        name : string
+            name of the joint, link, or end-effector
+        x : numpy.array
+            the [x,y,z] offset inside reference frame of 'name' [meters]
+        want : tuple of strings
+            the quantities to calculate
+        rows : string
+            the rows of 'J', 'dJ' and 'dJ_dq' to calculate
+        """
+
+        uses_dq = any(key in want for key in ('dJ', 'C', 'dJ_dq', 'C_dq'))
+        if not self._at_state(q, dq if uses_dq else None):
+            return self._untracked(lambda out: self.dynamics(
+                q, dq, name=name, x=x, want=want, rows=rows))
+
+        keys = {key: self._tick_key(
+            key + self._rows_name(rows) if key in self._ROWS_KEYS else key,
+            name, x) for key in want}
+        missing = [key for key in want if keys[key] not in self._tick]
+        self.tick_hits += len(want) - len(missing)
+        self.tick_misses += len(missing)
+        if len(missing) > 0:
+            values = self._untracked(lambda out: self.dynamics(
+                q, dq, name=name, x=x, want=want, rows=rows))
+            for key in missing:
+                values[key].flags.writeable = False
+                self._tick[keys[key]] = values[key]
+        return {key: self._tick[keys[key]] for key in want}
+
+    def dJ(self, name, q, dq, x=[0, 0, 0], rows='xyzabg', out=None):
         """ Loads or calculates the derivative of the Jacobian wrt time
 
         Parameters
@@ -232,16 +1566,88 @@ class BaseConfig():
             the [x,y,z] offset inside reference frame of 'name' [meters]
             if not specified, (0, 0, 0) is hard coded in, rather than using
             variable (x, y, z), which results in significant speedups.
-
+        rows : string, optional (Default: 'xyzabg')
+            the rows to calculate, any of 'x', 'y', 'z' for position and
+            'a', 'b', 'g' for orientation. A subset of the rows is
+            generated as a separate function that doesn't calculate the
+            others, e.g. 'xyz' skips the orientation terms
+        out : numpy.array, optional (Default: None)
+            if provided, the result is written into out, of shape
+            (len(rows), N_JOINTS), and out is returned without allocating
+            any arrays
+        """
+        if self._tick is not None:
+            return self._tick_value(
+                self._tick_key('dJ' + self._rows_name(rows), name, x),
+                lambda out: self.dJ(name, q, dq, x=x, rows=rows, out=out),
+                q, dq, out=out)
+
+        funcname = self._offset_name(name, x)
+        rows_name = self._rows_name(rows)
+        parameters = (q, dq, x)
+        if out is not None:
+            return self._out_function(
+                funcname + '_dJ' + rows_name,
+                lambda: self._calc_dJ(name, x=x, rows=rows, lambdify=False),
+                [self.q, self.dq, self.x])(out, *parameters)
+        # check for function in dictionary
+        funcname += rows_name
+        if self._dJ.get(funcname, None) is None:
+            self._dJ[funcname] = self._calc_dJ(name=name, x=x, rows=rows)
+        return np.array(self._dJ[funcname](*parameters), dtype='float32')
+
+    def dJ_dq(self, name, q, dq, x=[0, 0, 0], rows='xyzabg', out=None):
+        """ Loads or calculates the product of the derivative of the
+        Jacobian wrt time with the joint velocities, np.dot(dJ, dq)
+
+        Generated as a vector, which takes far fewer operations than
+        calculating dJ.
+
+        Parameters
+        ----------
+        name : string
+            name of the joint, link, or end-effector
+        q : numpy.array
+            joint angles [radians]
+        dq : numpy.array
+            joint velocities [radians/second]
+        x : numpy.array, optional (Default: [0,0,0])
+            the [x,y,z] offset inside reference frame of 'name' [meters]
+            if not specified, (0, 0, 0) is hard coded in, rather than using
+            variable (x, y, z), which results in significant speedups.
+        rows : string, optional (Default: 'xyzabg')
+            the rows to calculate, any of 'x', 'y', 'z' for position and
+            'a', 'b', 'g' for orientation. A subset of the rows is
+            generated as a separate function that doesn't calculate the
+            others, e.g. 'xyz' skips the orientation terms
+        out : numpy.array, optional (Default: None)
+            if provided, the result is written into out, of shape
+            (len(rows),), and out is returned without allocating any arrays
         """
-        funcname = name + '[0,0,0]' if np.allclose(x, 0) else name
+        if self._tick is not None:
+            return self._tick_value(
+                self._tick_key('dJ_dq' + self._rows_name(rows), name, x),
+                lambda out: self.dJ_dq(name, q, dq, x=x, rows=rows, out=out),
+                q, dq, out=out)
+
+        funcname = self._offset_name(name, x)
+        rows_name = self._rows_name(rows)
+        parameters = (q, dq, x)
+        if out is not None:
+            return self._out_function(
+                funcname + '_dJ_dq' + rows_name,
+                lambda: self._calc_dJ_dq(
+                    name, x=x, rows=rows, lambdify=False),
+                [self.q, self.dq, self.x], flatten=True)(out, *parameters)
         # check for function in dictionary
-        if self._dJ.get(funcname, None) is None:
-            self._dJ[funcname] = self._calc_dJ(name=name, x=x)
-        parameters = tuple(q) + tuple(dq) + tuple(x)
-        return np.array(self._dJ[funcname](*parameters), dtype='float32')
-
-    def J(self, name, q, x=[0, 0, 0]):
+        funcname += rows_name
+        if self._dJ_dq.get(funcname, None) is None:
+            self._dJ_dq[funcname] = self._calc_dJ_dq(
+                name=name, x=x, rows=rows)
+        return np.array(self._dJ_dq[funcname](*parameters),
+                        dtype='float32').flatten()
+
+    def J(self, name, q, x=[0, 0, 0], rows='xyzabg', out=None):
         """ Loads or calculates the Jacobian for a joint or link
 
         Parameters
@@ -254,45 +1660,98 @@ class BaseConfig():
             the [x,y,z] offset inside reference frame of 'name' [meters]
             if not specified, (0, 0, 0) is hard coded in, rather than using
             variable (x, y, z), which results in significant speedups.
+        rows : string, optional (Default: 'xyzabg')
+            the rows to calculate, any of 'x', 'y', 'z' for position and
+            'a', 'b', 'g' for orientation. A subset of the rows is
+            generated as a separate function that doesn't calculate the
+            others, e.g. 'xyz' skips the orientation terms
+        out : numpy.array, optional (Default: None)
+            if provided, the result is written into out, of shape
+            (len(rows), N_JOINTS), and out is returned without allocating
+            any arrays
         """
-
-        funcname = name + '[0,0,0]' if np.allclose(x, 0) else name
+        if self._tick is not None:
+            return self._tick_value(
+                self._tick_key('J' + self._rows_name(rows), name, x),
+                lambda out: self.J(name, q, x=x, rows=rows, out=out),
+                q, out=out)
+
+        funcname = self._offset_name(name, x)
+        rows_name = self._rows_name(rows)
+        parameters = (q, x)
+        if out is not None:
+            return self._out_function(
+                funcname + '_J' + rows_name,
+                lambda: self._calc_J(name, x=x, rows=rows, lambdify=False),
+                [self.q, self.x],
+                chain=lambda: self._chain_J(name, x, rows))(out, *parameters)
         # check for function in dictionary
+        funcname += rows_name
         if self._J.get(funcname, None) is None:
-            self._J[funcname] = self._calc_J(name=name, x=x)
-        parameters = tuple(q) + tuple(x)
+            self._J[funcname] = self._calc_J(name=name, x=x, rows=rows)
         return np.array(self._J[funcname](*parameters), dtype='float32')
 
-    def M(self, q):
+    def M(self, q, out=None):
         """ Loads or calculates the joint space inertia matrix
 
         Parameters
         ----------
         q : numpy.array
             joint angles [radians]
+        out : numpy.array, optional (Default: None)
+            if provided, the result is written into out, of shape
+            (N_JOINTS, N_JOINTS), and out is returned without allocating
+            any arrays
         """
-
+        if self._tick is not None:
+            return self._tick_value(
+                ('M',),
+                lambda out: self.M(q, out=out), q, out=out)
+
+        if self.dynamics_engine == 'numeric':
+            M = self._numeric_dynamics().M(q)
+            if out is not None:
+                out[:] = M
+                return out
+            return np.array(M, dtype='float32')
+        parameters = (q,) + self._inertia_arguments()
+        if out is not None:
+            return self._out_function(
+                'M', lambda: self._calc_M(lambdify=False),
+                [self.q] + self._inertia_parameters(),
+                chain=self._chain_M)(out, *parameters)
         # check for function in dictionary
         if self._M is None:
             self._M = self._calc_M()
-        parameters = tuple(q)
         return np.array(self._M(*parameters), dtype='float32')
 
-    def R(self, name, q):
+    def R(self, name, q, out=None):
         """ Loads or calculates the rotation matrix
 
         Parameters
         ----------
         q : numpy.array
             joint angles [radians]
+        out : numpy.array, optional (Default: None)
+            if provided, the result is written into out, of shape
+            (3, 3), and out is returned without allocating any arrays
         """
+        if self._tick is not None:
+            return self._tick_value(
+                self._tick_key('R', name, None),
+                lambda out: self.R(name, q, out=out), q, out=out)
+
+        parameters = (q,)
+        if out is not None:
+            return self._out_function(
+                name + '_R', lambda: self._calc_R(name, lambdify=False),
+                [self.q])(out, *parameters)
         # check for function in dictionary
         if self._R.get(name, None) is None:
             self._R[name] = self._calc_R(name)
-        parameters = tuple(q)
         return np.array(self._R[name](*parameters), dtype='float32')
 
-    def C(self, q, dq):
+    def C(self, q, dq, out=None):
         """ Loads or calculates the centrifugal and Coriolis forces matrix
         such that np.dot(C, dq) is the full term
 
@@ -302,14 +1761,109 @@ class BaseConfig():
             joint angles [radians]
         dq : numpy.array
             joint velocities [radians/second]
-
+        out : numpy.array, optional (Default: None)
+            if provided, the result is written into out, of shape
+            (N_JOINTS, N_JOINTS), and out is returned without allocating
+            any arrays
         """
+        if self._tick is not None:
+            return self._tick_value(
+                ('C',),
+                lambda out: self.C(q, dq, out=out), q, dq, out=out)
+
+        if self.dynamics_engine == 'numeric':
+            C = self._numeric_dynamics().C(q, dq)
+            if out is not None:
+                out[:] = C
+                return out
+            return np.array(C, dtype='float32')
+        parameters = (q, dq) + self._inertia_arguments()
+        if out is not None:
+            return self._out_function(
+                'C', lambda: self._calc_C(lambdify=False),
+                [self.q, self.dq] + self._inertia_parameters())(
+                    out, *parameters)
         # check for function in dictionary
         if self._C is None:
             self._C = self._calc_C()
-        parameters = tuple(q) + tuple(dq)
         return np.array(self._C(*parameters), dtype='float32')
 
+    def C_dq(self, q, dq, out=None):
+        """ Loads or calculates the centrifugal and Coriolis forces vector,
+        np.dot(C(q, dq), dq)
+
+        Generated as a vector, without forming C, which takes far fewer
+        operations than calculating C.
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        dq : numpy.array
+            joint velocities [radians/second]
+        out : numpy.array, optional (Default: None)
+            if provided, the result is written into out, of shape
+            (N_JOINTS,), and out is returned without allocating any arrays
+        """
+        if self._tick is not None:
+            return self._tick_value(
+                ('C_dq',),
+                lambda out: self.C_dq(q, dq, out=out), q, dq, out=out)
+
+        if self.dynamics_engine == 'numeric':
+            C_dq = self._numeric_dynamics().C_dq(q, dq)
+            if out is not None:
+                out[:] = C_dq
+                return out
+            return np.array(C_dq, dtype='float32')
+        parameters = (q, dq) + self._inertia_arguments()
+        if out is not None:
+            return self._out_function(
+                'C_dq', lambda: self._calc_C_product('dq', lambdify=False),
+                [self.q, self.dq] + self._inertia_parameters(),
+                flatten=True)(out, *parameters)
+        # check for function in dictionary
+        if self._C_dq is None:
+            self._C_dq = self._calc_C_product('dq')
+        return np.array(self._C_dq(*parameters), dtype='float32').flatten()
+
+    def C_v(self, q, dq, v, out=None):
+        """ Loads or calculates the product of the centrifugal and Coriolis
+        forces matrix with a vector, np.dot(C(q, dq), v)
+
+        Generated as a vector, without forming C. Not shared inside at(),
+        as the value depends on v.
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        dq : numpy.array
+            joint velocities [radians/second]
+        v : numpy.array
+            the vector to multiply C by, e.g. the reference joint
+            velocities of a sliding controller
+        out : numpy.array, optional (Default: None)
+            if provided, the result is written into out, of shape
+            (N_JOINTS,), and out is returned without allocating any arrays
+        """
+        if self.dynamics_engine == 'numeric':
+            C_v = self._numeric_dynamics().C_v(q, dq, v)
+            if out is not None:
+                out[:] = C_v
+                return out
+            return np.array(C_v, dtype='float32')
+        parameters = (q, dq, v) + self._inertia_arguments()
+        if out is not None:
+            return self._out_function(
+                'C_v', lambda: self._calc_C_product('v', lambdify=False),
+                [self.q, self.dq, self.v] + self._inertia_parameters(),
+                flatten=True)(out, *parameters)
+        # check for function in dictionary
+        if self._C_v is None:
+            self._C_v = self._calc_C_product('v')
+        return np.array(self._C_v(*parameters), dtype='float32').flatten()
+
     def scaledown(self, name, x):
         """ Scales down the input to the -1 to 1 range, based on the
         mean and max, min values recorded from some stereotyped movements.
@@ -340,7 +1894,7 @@ class BaseConfig():
             raise Exception('Mean and/or scaling not defined')
         return x * self.SCALES[name] + self.MEANS[name]
 
-    def Tx(self, name, q, x=[0, 0, 0]):
+    def Tx(self, name, q, x=[0, 0, 0], out=None):
         """ Loads or calculates the transformation Matrix for a joint or link
 
         Parameters
@@ -353,16 +1907,90 @@ class BaseConfig():
             the [x,y,z] offset inside reference frame of 'name' [meters]
             if not specified, (0, 0, 0) is hard coded in, rather than using
             variable (x, y, z), which results in significant speedups.
+        out : numpy.array, optional (Default: None)
+            if provided, the result is written into out, of shape
+            (3,), and out is returned without allocating any arrays
         """
-
-        funcname = name + '[0,0,0]' if np.allclose(x, 0) else name
+        if self._tick is not None:
+            return self._tick_value(
+                self._tick_key('Tx', name, x),
+                lambda out: self.Tx(name, q, x=x, out=out), q, out=out)
+
+        funcname = self._offset_name(name, x)
+        parameters = (q, x)
+        if out is not None:
+            return self._out_function(
+                funcname + '_Tx',
+                lambda: self._calc_Tx(name, x=x, lambdify=False)[:-1, :],
+                [self.q, self.x], flatten=True,
+                chain=lambda: self._chain_Tx(name, x)[:-1, :])(
+                    out, *parameters)
         # check for function in dictionary
         if self._Tx.get(funcname, None) is None:
             self._Tx[funcname] = self._calc_Tx(name, x=x)
-        parameters = tuple(q) + tuple(x)
         return self._Tx[funcname](*parameters)[:-1].flatten()
 
-    def T_inv(self, name, q, x=[0, 0, 0]):
+    @property
+    def FRAMES(self):
+        """ The names of every frame in the kinematic chain, in the
+        order of the rows returned by Tx_all """
+        return [name for name, _, _ in self._CHAIN]
+
+    @property
+    def joint_frames(self):
+        """ The rows of Tx_all for each joint and the end-effector, in
+        order from the base of the arm """
+        frames = self.FRAMES
+        return [frames.index('joint%i' % ii)
+                for ii in range(self.N_JOINTS)] + [frames.index('EE')]
+
+    def Tx_all(self, q, rotations=False):
+        """ Loads or calculates the position of every frame at once
+
+        All of the frames are calculated by a single function, with each
+        frame reusing the transform to the frame before it in the chain.
+        Returns an (n_frames, 3) array of positions, with rows in the
+        order of FRAMES, and if rotations is True also an
+        (n_frames, 3, 3) array of the rotation matrices of each frame.
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        rotations : boolean, optional (Default: False)
+            if True, also returns the rotation matrix of each frame
+        """
+
+        if self._tick is not None:
+            values = self._tick_value(
+                ('Tx_all', rotations),
+                lambda out: self._Tx_all_values(q, rotations), q)
+        else:
+            values = self._Tx_all_values(q, rotations)
+
+        if rotations is False:
+            return values
+        return values[:, :3], values[:, 3:].reshape(-1, 3, 3)
+
+    def _Tx_all_values(self, q, rotations):
+        """ Returns the (n_frames, 3) or (n_frames, 12) array of the
+        positions, and rotations if requested, of every frame
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        rotations : boolean
+            if True, includes the rotation matrix of each frame
+        """
+
+        filename = 'Tx_all[R]' if rotations else 'Tx_all'
+        # check for function in dictionary
+        if self._Tx_all.get(filename, None) is None:
+            self._Tx_all[filename] = self._calc_Tx_all(rotations)
+        return np.array(self._Tx_all[filename](q), dtype='float64')
+
+    def T_inv(self, name, q, x=[0, 0, 0], out=None):
         """ Loads or calculates the inverse transform for a joint or link
 
         Parameters
@@ -375,15 +2003,174 @@ class BaseConfig():
             the [x,y,z] offset inside reference frame of 'name' [meters]
             if not specified, (0, 0, 0) is hard coded in, rather than using
             variable (x, y, z), which results in significant speedups.
+        out : numpy.array, optional (Default: None)
+            if provided, the result is written into out, of shape
+            (4, 4), and out is returned without allocating any arrays
         """
-
-        funcname = name + '[0,0,0]' if np.allclose(x, 0) else name
+        if self._tick is not None:
+            return self._tick_value(
+                self._tick_key('T_inv', name, x),
+                lambda out: self.T_inv(name, q, x=x, out=out), q, out=out)
+
+        funcname = self._offset_name(name, x)
+        parameters = (q, x)
+        if out is not None:
+            return self._out_function(
+                funcname + '_Tinv',
+                lambda: self._calc_T_inv(name, x=x, lambdify=False),
+                [self.q, self.x])(out, *parameters)
         # check for function in dictionary
         if self._T_inv.get(funcname, None) is None:
             self._T_inv[funcname] = self._calc_T_inv(name=name, x=x)
-        parameters = tuple(q) + tuple(x)
         return self._T_inv[funcname](*parameters)
 
+    def g_batch(self, q):
+        """ Calculates the force of gravity in joint space for many states
+
+        Returns an array of shape (N, N_JOINTS)
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians], shape (N, N_JOINTS)
+        """
+        if self.dynamics_engine == 'numeric':
+            return np.array([self._numeric_dynamics().g(qq)
+                             for qq in np.atleast_2d(q)], dtype='float32')
+        parameters = self._batch_parameters(q, inertia=True)
+        return self._calc_batch('g')(*parameters)[:, :, 0]
+
+    def dJ_batch(self, name, q, dq, x=[0, 0, 0], rows='xyzabg'):
+        """ Calculates the derivative of the Jacobian wrt time for many states
+
+        Returns an array of shape (N, len(rows), N_JOINTS)
+
+        Parameters
+        ----------
+        name : string
+            name of the joint, link, or end-effector
+        q : numpy.array
+            joint angles [radians], shape (N, N_JOINTS)
+        dq : numpy.array
+            joint velocities [radians/second], shape (N, N_JOINTS)
+        x : numpy.array, optional (Default: [0,0,0])
+            the [x,y,z] offset inside reference frame of 'name' [meters],
+            shape (3,) or (N, 3)
+        rows : string, optional (Default: 'xyzabg')
+            the rows to calculate, see dJ
+        """
+        parameters = self._batch_parameters(q, dq=dq, x=x)
+        return self._calc_batch('dJ', name, x=x, rows=rows)(*parameters)
+
+    def J_batch(self, name, q, x=[0, 0, 0], rows='xyzabg'):
+        """ Calculates the Jacobian for a joint or link for many states
+
+        Returns an array of shape (N, len(rows), N_JOINTS)
+
+        Parameters
+        ----------
+        name : string
+            name of the joint, link, or end-effector
+        q : numpy.array
+            joint angles [radians], shape (N, N_JOINTS)
+        x : numpy.array, optional (Default: [0,0,0])
+            the [x,y,z] offset inside reference frame of 'name' [meters],
+            shape (3,) or (N, 3)
+        rows : string, optional (Default: 'xyzabg')
+            the rows to calculate, see J
+        """
+        parameters = self._batch_parameters(q, x=x)
+        return self._calc_batch('J', name, x=x, rows=rows)(*parameters)
+
+    def M_batch(self, q):
+        """ Calculates the joint space inertia matrix for many states
+
+        Returns an array of shape (N, N_JOINTS, N_JOINTS)
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians], shape (N, N_JOINTS)
+        """
+        if self.dynamics_engine == 'numeric':
+            return np.array([self._numeric_dynamics().M(qq)
+                             for qq in np.atleast_2d(q)], dtype='float32')
+        parameters = self._batch_parameters(q, inertia=True)
+        return self._calc_batch('M')(*parameters)
+
+    def R_batch(self, name, q):
+        """ Calculates the rotation matrix for many states
+
+        Returns an array of shape (N, 3, 3)
+
+        Parameters
+        ----------
+        name : string
+            name of the joint, link, or end-effector
+        q : numpy.array
+            joint angles [radians], shape (N, N_JOINTS)
+        """
+        parameters = self._batch_parameters(q)
+        return self._calc_batch('R', name)(*parameters)
+
+    def C_batch(self, q, dq):
+        """ Calculates the centrifugal and Coriolis forces matrix
+        for many states
+
+        Returns an array of shape (N, N_JOINTS, N_JOINTS)
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians], shape (N, N_JOINTS)
+        dq : numpy.array
+            joint velocities [radians/second], shape (N, N_JOINTS)
+        """
+        if self.dynamics_engine == 'numeric':
+            return np.array([self._numeric_dynamics().C(qq, dqq)
+                             for qq, dqq in zip(np.atleast_2d(q),
+                                                np.atleast_2d(dq))],
+                            dtype='float32')
+        parameters = self._batch_parameters(q, dq=dq, inertia=True)
+        return self._calc_batch('C')(*parameters)
+
+    def Tx_batch(self, name, q, x=[0, 0, 0]):
+        """ Calculates the position of a joint or link for many states
+
+        Returns an array of shape (N, 3)
+
+        Parameters
+        ----------
+        name : string
+            name of the joint, link, or end-effector
+        q : numpy.array
+            joint angles [radians], shape (N, N_JOINTS)
+        x : numpy.array, optional (Default: [0,0,0])
+            the [x,y,z] offset inside reference frame of 'name' [meters],
+            shape (3,) or (N, 3)
+        """
+        parameters = self._batch_parameters(q, x=x)
+        return self._calc_batch('Tx', name, x=x)(*parameters)[:, :-1, 0]
+
+    def T_inv_batch(self, name, q, x=[0, 0, 0]):
+        """ Calculates the inverse transform for a joint or link
+        for many states
+
+        Returns an array of shape (N, 4, 4)
+
+        Parameters
+        ----------
+        name : string
+            name of the joint, link, or end-effector
+        q : numpy.array
+            joint angles [radians], shape (N, N_JOINTS)
+        x : numpy.array, optional (Default: [0,0,0])
+            the [x,y,z] offset inside reference frame of 'name' [meters],
+            shape (3,) or (N, 3)
+        """
+        parameters = self._batch_parameters(q, x=x)
+        return self._calc_batch('T_inv', name, x=x)(*parameters)
+
     def _calc_g(self, lambdify=True):
         """ Generate the force of gravity in joint space
 
@@ -397,49 +2184,158 @@ class BaseConfig():
         """
         g = None
         g_func = None
-        # check to see if we have our gravity term saved in file
-        g, g_func = self._load_from_file('g', lambdify)
-
-        if g is None and g_func is None:
-            # if no saved file was loaded, generate function
-            print('Generating gravity compensation function')
-
-            # get the Jacobians for each link's COM
-            J_links = [self._calc_J('link%s' % ii, x=[0, 0, 0],
-                                    lambdify=False)
-                       for ii in range(self.N_LINKS)]
-            J_joints = [self._calc_J('joint%s' % ii, x=[0, 0, 0],
-                                     lambdify=False)
-                        for ii in range(self.N_JOINTS)]
-
-            # sum together the effects of each arm segment's inertia
-            g = sp.zeros(self.N_JOINTS, 1)
-            for ii in range(self.N_LINKS):
-                # transform each inertia matrix into joint space
-                g += (J_links[ii].T * self._M_LINKS[ii] * self.gravity)
-            # sum together the effects of each joint's inertia on each motor
-            for ii in range(self.N_JOINTS):
-                # transform each inertia matrix into joint space
-                g += (J_joints[ii].T * self._M_JOINTS[ii] * self.gravity)
-            g = sp.Matrix(g)
-
-            # save to file
-            abr_control.utils.os_utils.makedirs(
-                '%s/g' % self.config_folder)
-            cloudpickle.dump(g, open(
-                '%s/g/g' % self.config_folder, 'wb'))
-
-        if lambdify is False:
-            # if should return expression not function
-            return g
-
-        if g_func is None:
-            g_func = self._generate_and_save_function(
-                filename='g', expression=g,
-                parameters=self.q)
-        return g_func
-
-    def _calc_dJ(self, name, x, lambdify=True):
+        with self._cache_lock('g'):
+            # check to see if we have our gravity term saved in file
+            g, g_func = self._load_from_file('g', lambdify)
+
+            if g is None and g_func is None:
+                # if no saved file was loaded, generate function
+                print('Generating gravity compensation function')
+                start_time = time.time()
+
+                # get the Jacobians for each link and joint's COM
+                g = self._assemble_g(*self._calc_J_links_joints())
+
+                # save to file
+                self._save_to_file('g', g, start_time)
+
+            if lambdify is False:
+                # if should return expression not function
+                return g
+
+            if g_func is None:
+                intermediates, g = self._chain_expression(g, self._chain_g)
+                g_func = self._generate_and_save_function(
+                    filename='g', expression=g,
+                    parameters=[self.q] + self._inertia_parameters(),
+                    intermediates=intermediates)
+            return g_func
+
+    def _assemble_g(self, J_links, J_joints):
+        """ Returns the force of gravity in joint space from the
+        Jacobians of the COM of each link and joint
+
+        Parameters
+        ----------
+        J_links : list of sympy.Matrix
+            the Jacobian of the COM of each link
+        J_joints : list of sympy.Matrix
+            the Jacobian of the COM of each joint
+        """
+
+        M_links, M_joints = self._inertia_matrices()
+
+        # transform the effect of gravity on each link and joint into
+        # joint space
+        terms = parallel.map_tasks(
+            parallel.gravity_term,
+            [(J_links[ii], M_links[ii], self.gravity)
+             for ii in range(self.N_LINKS)] +
+            [(J_joints[ii], M_joints[ii], self.gravity)
+             for ii in range(self.N_JOINTS)],
+            self.n_processes)
+
+        # sum together the effects of each arm segment's inertia
+        g = sp.zeros(self.N_JOINTS, 1)
+        for term in terms:
+            g += term
+        return sp.Matrix(g)
+
+    def _dynamics_filename(self, name, x, want, rows='xyzabg'):
+        """ Returns the name of the fused function for several quantities
+
+        Parameters
+        ----------
+        name : string
+            name of the joint, link, or end-effector
+        x : numpy.array
+            the [x,y,z] offset inside the reference frame of 'name' [meters]
+        want : tuple of strings
+            the quantities calculated, in the order of _DYNAMICS_KEYS
+        rows : string, optional (Default: 'xyzabg')
+            the rows of 'J', 'dJ' and 'dJ_dq' calculated
+        """
+
+        filename = self._offset_name(name, x) + '_dynamics[%s]' % ','.join(
+            want)
+        if any(key in self._ROWS_KEYS for key in want):
+            filename += self._rows_name(rows)
+        return filename
+
+    def _calc_dynamics(self, name, x, want, rows='xyzabg', lambdify=True):
+        """ Generates a fused function for several quantities
+
+        Uses Sympy to generate one function calculating all of the
+        quantities in want, applying common subexpression elimination
+        across all of the outputs.
+
+        Parameters
+        ----------
+        name : string
+            name of the joint, link, or end-effector
+        x : numpy.array
+            the [x,y,z] offset inside the reference frame of 'name' [meters]
+            if not specified, (0, 0, 0) is hard coded in, rather than using
+            variable (x, y, z), which results in significant speedups.
+        want : tuple of strings
+            the quantities to calculate, in the order of _DYNAMICS_KEYS
+        rows : string, optional (Default: 'xyzabg')
+            the rows of 'J', 'dJ' and 'dJ_dq' to calculate, see J
+        lambdify : boolean, optional (Default: True)
+            if True returns a function to calculate the matrices.
+            If False returns a list of the Sympy matrices
+        """
+
+        expressions = None
+        dynamics_func = None
+        filename = self._dynamics_filename(name, x, want, rows)
+
+        with self._cache_lock(filename):
+            # check to see if should try to load functions from file
+            # fused functions are always lambdified
+            expressions, dynamics_func = self._load_from_file(
+                filename, lambdify, backend='numpy')
+
+            if expressions is None and dynamics_func is None:
+                # if no saved file was loaded, generate function
+                print('Generating fused function for %s' % filename)
+                start_time = time.time()
+
+                calc = {
+                    'Tx': lambda: self._calc_Tx(name, x=x, lambdify=False),
+                    'J': lambda: self._calc_J(
+                        name, x=x, rows=rows, lambdify=False),
+                    'dJ': lambda: self._calc_dJ(
+                        name, x=x, rows=rows, lambdify=False),
+                    'M': lambda: self._calc_M(lambdify=False),
+                    'g': lambda: self._calc_g(lambdify=False),
+                    'C': lambda: self._calc_C(lambdify=False),
+                    'R': lambda: self._calc_R(name, lambdify=False),
+                    'T_inv': lambda: self._calc_T_inv(
+                        name, x=x, lambdify=False),
+                    'dJ_dq': lambda: self._calc_dJ_dq(
+                        name, x=x, rows=rows, lambdify=False),
+                    'C_dq': lambda: self._calc_C_product(
+                        'dq', lambdify=False),
+                    }
+                expressions = [sp.Matrix(calc[key]()) for key in want]
+
+                # save to file
+                self._save_to_file(filename, expressions, start_time)
+
+            if lambdify is False:
+                # if should return expressions not function
+                return expressions
+
+            if dynamics_func is None:
+                # share common subexpressions across all of the outputs
+                dynamics_func = self._lambdify_and_save(
+                    filename, expressions,
+                    [self.q, self.dq, self.x] + self._inertia_parameters(),
+                    cse=True)
+            return dynamics_func
+
+    def _calc_dJ(self, name, x, rows='xyzabg', lambdify=True):
         """ Generate the derivative of the Jacobian
 
         Uses Sympy to generate the derivative of the Jacobian
@@ -453,6 +2349,8 @@ class BaseConfig():
             the [x,y,z] offset inside the reference frame of 'name' [meters]
             if not specified, (0, 0, 0) is hard coded in, rather than using
             variable (x, y, z), which results in significant speedups.
+        rows : string, optional (Default: 'xyzabg')
+            the rows of the Jacobian to calculate, see J
         lambdify : boolean, optional (Default: True)
             if True returns a function to calculate the matrix.
             If False returns the Sympy matrix
@@ -460,43 +2358,96 @@ class BaseConfig():
 
         dJ = None
         dJ_func = None
-        filename = name + '[0,0,0]' if np.allclose(x, 0) else name
-        filename += '_dJ'
-        # check to see if should try to load functions from file
-        dJ, dJ_func = self._load_from_file(filename, lambdify)
-
-        if dJ is None and dJ_func is None:
-            # if no saved file was loaded, generate function
-            print('Generating derivative of Jacobian ',
-                  'function for %s' % filename)
-
-            J = self._calc_J(name, x=x, lambdify=False)
-            dJ = sp.Matrix(np.zeros(J.shape, dtype='float32'))
-            # calculate derivative of (x,y,z) wrt to time
-            # which each joint is dependent on
-            for ii in range(J.shape[0]):
-                for jj in range(J.shape[1]):
-                    for kk in range(self.N_JOINTS):
-                        dJ[ii, jj] += J[ii, jj].diff(self.q[kk]) * self.dq[kk]
-            dJ = sp.Matrix(dJ)
-
-            # save expression to file
-            abr_control.utils.os_utils.makedirs(
-                '%s/%s' % (self.config_folder, filename))
-            cloudpickle.dump(dJ, open(
-                '%s/%s/%s' % (self.config_folder, filename, filename), 'wb'))
-
-        if lambdify is False:
-            # if should return expression not function
-            return dJ
-
-        if dJ_func is None:
-            dJ_func = self._generate_and_save_function(
-                filename=filename, expression=dJ,
-                parameters=self.q+self.dq+self.x)
-        return dJ_func
-
-    def _calc_J(self, name, x, lambdify=True):
+        filename = self._offset_name(name, x)
+        filename += '_dJ' + self._rows_name(rows)
+        with self._cache_lock(filename):
+            # check to see if should try to load functions from file
+            dJ, dJ_func = self._load_from_file(filename, lambdify)
+
+            if dJ is None and dJ_func is None:
+                # if no saved file was loaded, generate function
+                print('Generating derivative of Jacobian ',
+                      'function for %s' % filename)
+                start_time = time.time()
+
+                J = self._calc_J(name, x=x, rows=rows, lambdify=False)
+                # calculate derivative of (x,y,z) wrt to time
+                # which each joint is dependent on
+                dJ = parallel.map_tasks(
+                    parallel.time_derivative,
+                    [(entry, self.q, self.dq) for entry in J],
+                    self.n_processes)
+                dJ = sp.Matrix(J.shape[0], J.shape[1], dJ)
+
+                # save to file
+                self._save_to_file(filename, dJ, start_time)
+
+            if lambdify is False:
+                # if should return expression not function
+                return dJ
+
+            if dJ_func is None:
+                dJ_func = self._generate_and_save_function(
+                    filename=filename, expression=dJ,
+                    parameters=[self.q, self.dq, self.x])
+            return dJ_func
+
+    def _calc_dJ_dq(self, name, x, rows='xyzabg', lambdify=True):
+        """ Generate the product of the derivative of the Jacobian and dq
+
+        Uses Sympy to generate np.dot(dJ, dq) for a joint or link, without
+        forming dJ, see parallel.jacobian_velocity_product
+
+        Parameters
+        ----------
+        name : string
+            name of the joint, link, or end-effector
+        x : numpy.array
+            the [x,y,z] offset inside the reference frame of 'name' [meters]
+            if not specified, (0, 0, 0) is hard coded in, rather than using
+            variable (x, y, z), which results in significant speedups.
+        rows : string, optional (Default: 'xyzabg')
+            the rows of the Jacobian to calculate, see J
+        lambdify : boolean, optional (Default: True)
+            if True returns a function to calculate the vector.
+            If False returns the Sympy matrix
+        """
+
+        dJ_dq = None
+        dJ_dq_func = None
+        filename = self._offset_name(name, x)
+        filename += '_dJ_dq' + self._rows_name(rows)
+        with self._cache_lock(filename):
+            # check to see if should try to load functions from file
+            dJ_dq, dJ_dq_func = self._load_from_file(filename, lambdify)
+
+            if dJ_dq is None and dJ_dq_func is None:
+                # if no saved file was loaded, generate function
+                print('Generating dJ dq function for %s' % filename)
+                start_time = time.time()
+
+                J = self._calc_J(name, x=x, rows=rows, lambdify=False)
+                dJ_dq = parallel.map_tasks(
+                    parallel.jacobian_velocity_product,
+                    [(list(J[ii, :]), self.q, self.dq)
+                     for ii in range(J.shape[0])],
+                    self.n_processes)
+                dJ_dq = sp.Matrix(dJ_dq)
+
+                # save to file
+                self._save_to_file(filename, dJ_dq, start_time)
+
+            if lambdify is False:
+                # if should return expression not function
+                return dJ_dq
+
+            if dJ_dq_func is None:
+                dJ_dq_func = self._generate_and_save_function(
+                    filename=filename, expression=dJ_dq,
+                    parameters=[self.q, self.dq, self.x])
+            return dJ_dq_func
+
+    def _calc_J(self, name, x, rows='xyzabg', lambdify=True):
         """ Uses Sympy to generate the Jacobian for a joint or link
 
         Parameters
@@ -507,6 +2458,8 @@ class BaseConfig():
             the [x,y,z] offset inside the reference frame of 'name' [meters]
             if not specified, (0, 0, 0) is hard coded in, rather than using
             variable (x, y, z), which results in significant speedups.
+        rows : string, optional (Default: 'xyzabg')
+            the rows of the Jacobian to calculate, see J
         lambdify : boolean, optional (Default: True)
             if True returns a function to calculate the matrix.
             If False returns the Sympy matrix
@@ -514,61 +2467,142 @@ class BaseConfig():
 
         J = None
         J_func = None
-        filename = name + '[0,0,0]' if np.allclose(x, 0) else name
-        filename += '_J'
-
-        # check to see if should try to load functions from file
-        J, J_func = self._load_from_file(filename, lambdify)
-
-        if J is None and J_func is None:
-            # if no saved file was loaded, generate function
-            print('Generating Jacobian function for %s' % filename)
-
-            Tx = self._calc_Tx(name, x=x, lambdify=False)
-            # NOTE: calculating the Jacobian this way doesn't incur any
-            # real computational cost (maybe 30ms) and it simplifies adding
-            # the orientation information below (as opposed to using
-            # sympy's Tx.jacobian method)
-            # TODO: rework to use the Jacobian function and automate
-            # derivation of the orientation Jacobian component
-            J = []
-            # calculate derivative of (x,y,z) wrt to each joint
-            for ii in range(self.N_JOINTS):
-                J.append([])
-                J[ii].append(Tx[0].diff(self.q[ii]))  # dx/dq[ii]
-                J[ii].append(Tx[1].diff(self.q[ii]))  # dy/dq[ii]
-                J[ii].append(Tx[2].diff(self.q[ii]))  # dz/dq[ii]
-
-            if 'EE' in name:
-                end_point = self.N_JOINTS
-            elif 'link' in name:
-                end_point = min(int(name.strip('link')), self.N_LINKS)
-            elif 'joint' in name:
-                end_point = min(int(name.strip('joint')), self.N_JOINTS)
-
-            # add on the orientation information up to the last joint
-            for ii in range(end_point):
-                J[ii] = J[ii] + list(self.J_orientation[ii])
-            # fill in the rest of the joints orientation info with 0
-            for ii in range(end_point, self.N_JOINTS):
-                J[ii] = J[ii] + [0, 0, 0]
-            J = sp.Matrix(J).T  # correct the orientation of J
-
-            # save to file
-            abr_control.utils.os_utils.makedirs(
-                '%s/%s' % (self.config_folder, filename))
-            cloudpickle.dump(J, open(
-                '%s/%s/%s' % (self.config_folder, filename, filename), 'wb'))
-
-        if lambdify is False:
-            # if should return expression not function
-            return J
-
-        if J_func is None:
-            J_func = self._generate_and_save_function(
-                filename=filename, expression=J,
-                parameters=self.q+self.x)
-        return J_func
+        filename = self._offset_name(name, x)
+        filename += '_J' + self._rows_name(rows)
+
+        with self._cache_lock(filename):
+            # check to see if should try to load functions from file
+            J, J_func = self._load_from_file(filename, lambdify)
+
+            if J is None and J_func is None:
+                # if no saved file was loaded, generate function
+                print('Generating Jacobian function for %s' % filename)
+                start_time = time.time()
+
+                Tx = self._calc_Tx(name, x=x, lambdify=False)
+                # NOTE: calculating the Jacobian this way doesn't incur any
+                # real computational cost (maybe 30ms) and it simplifies adding
+                # the orientation information below (as opposed to using
+                # sympy's Tx.jacobian method)
+                # TODO: rework to use the Jacobian function and automate
+                # derivation of the orientation Jacobian component
+                # calculate derivative of (x,y,z) wrt to each joint
+                if any(row in 'xyz' for row in rows):
+                    J = parallel.map_tasks(
+                        parallel.jacobian_position,
+                        [(Tx, self.q[ii]) for ii in range(self.N_JOINTS)],
+                        self.n_processes)
+                else:
+                    J = [[0, 0, 0] for ii in range(self.N_JOINTS)]
+                J = self._assemble_J(name, J, rows)
+
+                # save to file
+                self._save_to_file(filename, J, start_time)
+
+            if lambdify is False:
+                # if should return expression not function
+                return J
+
+            if J_func is None:
+                intermediates, J = self._chain_expression(
+                    J, lambda: self._chain_J(name, x, rows))
+                J_func = self._generate_and_save_function(
+                    filename=filename, expression=J,
+                    parameters=[self.q, self.x], intermediates=intermediates)
+            return J_func
+
+    def _assemble_J(self, name, J, rows, J_orientation=None):
+        """ Assembles the rows of the Jacobian from its position rows
+
+        Parameters
+        ----------
+        name : string
+            name of the joint, link, or end-effector
+        J : list
+            the derivative of (x,y,z) wrt each joint, N_JOINTS lists of 3
+        rows : string
+            the rows of the Jacobian to calculate, see J
+        J_orientation : list, optional (Default: None)
+            the orientation part of the Jacobian of each joint, if None
+            uses J_orientation
+        """
+
+        if any(row in 'abg' for row in rows):
+            J = self._add_J_orientation(name, J, J_orientation)
+        else:
+            # the orientation terms aren't needed
+            J = sp.Matrix(J).T
+        if rows != self._J_ROWS:
+            J = J.extract([self._J_ROWS.index(row) for row in rows],
+                          list(range(self.N_JOINTS)))
+        return J
+
+    def _add_J_orientation(self, name, J, J_orientation=None):
+        """ Assembles the Jacobian from its position rows
+
+        Parameters
+        ----------
+        name : string
+            name of the joint, link, or end-effector
+        J : list
+            the derivative of (x,y,z) wrt each joint, N_JOINTS lists of 3
+        J_orientation : list, optional (Default: None)
+            the orientation part of the Jacobian of each joint, if None
+            uses J_orientation
+        """
+
+        if J_orientation is None:
+            J_orientation = self.J_orientation
+
+        if 'EE' in name:
+            end_point = self.N_JOINTS
+        elif 'link' in name:
+            end_point = min(int(name.strip('link')), self.N_LINKS)
+        elif 'joint' in name:
+            end_point = min(int(name.strip('joint')), self.N_JOINTS)
+
+        # add on the orientation information up to the last joint
+        for ii in range(end_point):
+            J[ii] = J[ii] + list(J_orientation[ii])
+        # fill in the rest of the joints orientation info with 0
+        for ii in range(end_point, self.N_JOINTS):
+            J[ii] = J[ii] + [0, 0, 0]
+        return sp.Matrix(J).T  # correct the orientation of J
+
+    def _calc_J_links_joints(self):
+        """ Returns the Jacobians for the COM of each link and joint
+
+        Jacobians not already saved to file are generated together, with
+        the derivatives for every frame and joint derived in parallel if
+        n_processes is greater than 1.
+        """
+
+        names = (['link%s' % ii for ii in range(self.N_LINKS)] +
+                 ['joint%s' % ii for ii in range(self.N_JOINTS)])
+        Js = {}
+        for name in names:
+            Js[name], _ = self._load_from_file(
+                name + '[0,0,0]_J', lambdify=False)
+
+        missing = [name for name in names if Js[name] is None]
+        if len(missing) > 0:
+            print('Generating Jacobian functions for %s' % missing)
+            start_time = time.time()
+            Txs = [self._calc_Tx(name, x=[0, 0, 0], lambdify=False)
+                   for name in missing]
+            # calculate derivative of (x,y,z) wrt each joint for each frame
+            position = parallel.map_tasks(
+                parallel.jacobian_position,
+                [(Tx, self.q[ii]) for Tx in Txs
+                 for ii in range(self.N_JOINTS)],
+                self.n_processes)
+            for jj, name in enumerate(missing):
+                Js[name] = self._add_J_orientation(name, position[
+                    jj * self.N_JOINTS:(jj + 1) * self.N_JOINTS])
+                self._save_to_file(name + '[0,0,0]_J', Js[name], start_time)
+
+        return ([Js[name] for name in names[:self.N_LINKS]],
+                [Js[name] for name in names[self.N_LINKS:]])
 
     def _calc_M(self, lambdify=True):
         """ Uses Sympy to generate the inertia matrix in joint space
@@ -583,47 +2617,99 @@ class BaseConfig():
         M = None
         M_func = None
 
-        # check to see if we have our inertia matrix saved in file
-        M, M_func = self._load_from_file('M', lambdify)
+        with self._cache_lock('M'):
+            # check to see if we have our inertia matrix saved in file
+            M, M_func = self._load_from_file('M', lambdify)
 
-        if M is None and M_func is None:
-            # if no saved file was loaded, generate function
-            print('Generating inertia matrix function')
+            if M is None and M_func is None:
+                # if no saved file was loaded, generate function
+                print('Generating inertia matrix function')
+                start_time = time.time()
 
-            # get the Jacobians for each link's COM
-            J_links = [self._calc_J('link%s' % ii, x=[0, 0, 0],
-                                    lambdify=False)
-                       for ii in range(self.N_LINKS)]
-            J_joints = [self._calc_J('joint%s' % ii, x=[0, 0, 0],
-                                     lambdify=False)
-                        for ii in range(self.N_JOINTS)]
+                # get the Jacobians for each link and joint's COM
+                M = self._assemble_M(*self._calc_J_links_joints())
 
-            # sum together the effects of each arm segment's inertia
-            M = sp.zeros(self.N_JOINTS)
-            for ii in range(self.N_LINKS):
-                # transform each inertia matrix into joint space
-                M += (J_links[ii].T * self._M_LINKS[ii] * J_links[ii])
-            # sum together the effects of each joint's inertia on each motor
-            for ii in range(self.N_JOINTS):
-                # transform each inertia matrix into joint space
-                M += (J_joints[ii].T * self._M_JOINTS[ii] * J_joints[ii])
-            M = sp.Matrix(M)
-
-            # save to file
-            abr_control.utils.os_utils.makedirs(
-                '%s/M' % (self.config_folder))
-            cloudpickle.dump(M, open(
-                '%s/M/M' % self.config_folder, 'wb'))
-
-        if lambdify is False:
-            # if should return expression not function
-            return M
-
-        if M_func is None:
-            M_func = self._generate_and_save_function(
-                filename='M', expression=M,
-                parameters=self.q)
-        return M_func
+                # save to file
+                self._save_to_file('M', M, start_time)
+
+            if lambdify is False:
+                # if should return expression not function
+                return M
+
+            if M_func is None:
+                intermediates, M = self._chain_expression(M, self._chain_M)
+                M_func = self._generate_and_save_function(
+                    filename='M', expression=M,
+                    parameters=[self.q] + self._inertia_parameters(),
+                    intermediates=intermediates)
+            return M_func
+
+    def _assemble_M(self, J_links, J_joints):
+        """ Returns the inertia matrix in joint space from the Jacobians
+        of the COM of each link and joint
+
+        Parameters
+        ----------
+        J_links : list of sympy.Matrix
+            the Jacobian of the COM of each link
+        J_joints : list of sympy.Matrix
+            the Jacobian of the COM of each joint
+        """
+
+        M_links, M_joints = self._inertia_matrices()
+
+        # transform each inertia matrix into joint space, only the upper
+        # triangle as M is symmetric
+        terms = parallel.map_tasks(
+            parallel.inertia_term,
+            [(J_links[ii], M_links[ii]) for ii in range(self.N_LINKS)] +
+            [(J_joints[ii], M_joints[ii]) for ii in range(self.N_JOINTS)],
+            self.n_processes)
+
+        # sum together the effects of each arm segment's inertia,
+        # mirroring the upper triangle so that the entries below the
+        # diagonal are the same expressions, and calculated only once by
+        # the generated functions
+        upper = [sp.Add(*entries) for entries in zip(*terms)]
+        M = sp.zeros(self.N_JOINTS)
+        for (ii, jj), entry in zip(self._upper_triangle(), upper):
+            M[ii, jj] = M[jj, ii] = entry
+        return M
+
+    def _upper_triangle(self):
+        """ Returns the (row, column) of each entry of the upper triangle
+        of an N_JOINTS x N_JOINTS matrix, row by row """
+
+        return [(ii, jj) for ii in range(self.N_JOINTS)
+                for jj in range(ii, self.N_JOINTS)]
+
+    def _calc_dM(self):
+        """ Uses Sympy to generate the derivatives of the inertia matrix
+        wrt each joint angle
+
+        Returns dM, where dM[i][j][k] is the derivative of M[i, j] wrt
+        q[k]. Only the upper triangle is derived, as M is symmetric, and
+        dM[j][i] is the same list as dM[i][j]. The derivatives are saved
+        to file, and shared by the C, C_dq and C_v functions.
+        """
+
+        with self._cache_lock('dM'):
+            upper, _ = self._load_from_file('dM', lambdify=False)
+
+            if upper is None:
+                print('Generating inertia matrix derivatives')
+                start_time = time.time()
+                upper = parallel.map_tasks(
+                    parallel.inertia_derivative,
+                    self._upper_triangle(),
+                    self.n_processes,
+                    shared={'M': self._calc_M(lambdify=False), 'q': self.q})
+                self._save_to_file('dM', upper, start_time)
+
+        dM = [[None] * self.N_JOINTS for ii in range(self.N_JOINTS)]
+        for (ii, jj), derivatives in zip(self._upper_triangle(), upper):
+            dM[ii][jj] = dM[jj][ii] = derivatives
+        return dM
 
     def _calc_R(self, name, lambdify=True):
         """ Uses Sympy to generate the rotation matrix for a joint or link
@@ -640,26 +2726,30 @@ class BaseConfig():
         R_func = None
         filename = name + '_R'
 
-        # check to see if we have the rotation matrix saved in file
-        R, R_func = self._load_from_file(filename, lambdify=True)
+        with self._cache_lock(filename):
+            # check to see if we have the rotation matrix saved in file
+            R, R_func = self._load_from_file(filename, lambdify)
 
-        if R is None and R_func is None:
-            # if no saved file was loaded, generate function
-            print('Generating rotation matrix function.')
-            R = self._calc_T(name=name)[:3, :3]
+            if R is None and R_func is None:
+                # if no saved file was loaded, generate function
+                print('Generating rotation matrix function.')
+                start_time = time.time()
+                R = self._calc_T(name=name)[:3, :3]
 
-            # save to file
-            abr_control.utils.os_utils.makedirs(
-                '%s/%s' % (self.config_folder, filename))
-            cloudpickle.dump(sp.Matrix(R), open(
-                '%s/%s/%s' % (self.config_folder, filename, filename),
-                'wb'))
+                R = sp.Matrix(R)
+
+                # save to file
+                self._save_to_file(filename, R, start_time)
 
-        if R_func is None:
-            R_func = self._generate_and_save_function(
-                filename=filename, expression=R,
-                parameters=self.q)
-        return R_func
+            if lambdify is False:
+                # if should return expression not function
+                return R
+
+            if R_func is None:
+                R_func = self._generate_and_save_function(
+                    filename=filename, expression=R,
+                    parameters=[self.q])
+            return R_func
 
     def _calc_C(self, lambdify=True):
         """ Uses Sympy to generate the centrifugal and Coriolis forces
@@ -675,56 +2765,313 @@ class BaseConfig():
 
         C = None
         C_func = None
-        # check to see if we have our term saved in file
-        C, C_func = self._load_from_file('C', lambdify)
-
-        if C is None and C_func is None:
-            # if no saved file was loaded, generate function
-            print('Generating centrifugal and Coriolis compensation function')
-
-            # first get the inertia matrix
-            M = self._calc_M(lambdify=False)
-
-            # C_{kj} = sum_i c_{ijk}(q) \dot{q}_i
-            # c_{ijk} = 1/2 * sum_i (\frac{\partial M_{kj}}{\partial q_j} +
-            # \frac{\partial M_{ki}}{\partial q_j} - \frac{\partial M_{ij}}
-            # {\partial q_k})
-            C = sp.zeros(self.N_JOINTS, self.N_JOINTS)
-            for kk in range(self.N_JOINTS):
-                for jj in range(self.N_JOINTS):
-                    for ii in range(self.N_JOINTS):
-                        dMkjdqi = M[kk, jj].diff(self.q[ii])
-                        dMkidqj = M[kk, ii].diff(self.q[jj])
-                        dMijdqk = M[ii, jj].diff(self.q[kk])
-                        C[kk, jj] += .5 * (dMkjdqi + dMkidqj - dMijdqk) * self.dq[ii]
-                    C[kk, jj] = C[kk, jj]
-            C = sp.Matrix(C)
-
-            # save to file
-            abr_control.utils.os_utils.makedirs(
-                '%s/C' % self.config_folder)
-            cloudpickle.dump(C, open(
-                '%s/C/C' % self.config_folder, 'wb'))
-
-        if lambdify is False:
-            # if should return expression not function
-            return C
-
-        if C_func is None:
-            C_func = self._generate_and_save_function(
-                filename='C', expression=C,
-                parameters=self.q+self.dq)
-        return C_func
+        with self._cache_lock('C'):
+            # check to see if we have our term saved in file
+            C, C_func = self._load_from_file('C', lambdify)
+
+            if C is None and C_func is None:
+                # if no saved file was loaded, generate function
+                print('Generating centrifugal and Coriolis compensation '
+                      'function')
+                start_time = time.time()
+
+                # first get the derivatives of the inertia matrix
+                dM = self._calc_dM()
+
+                # C_{kj} = sum_i c_{ijk}(q) \dot{q}_i, each entry derived
+                # separately, with dM sent once to each process
+                C = parallel.map_tasks(
+                    parallel.coriolis_entry,
+                    [(kk, jj) for kk in range(self.N_JOINTS)
+                     for jj in range(self.N_JOINTS)],
+                    self.n_processes,
+                    shared={'dM': dM, 'dq': self.dq})
+                C = sp.Matrix(self.N_JOINTS, self.N_JOINTS, C)
+
+                # save to file
+                self._save_to_file('C', C, start_time)
+
+            if lambdify is False:
+                # if should return expression not function
+                return C
+
+            if C_func is None:
+                C_func = self._generate_and_save_function(
+                    filename='C', expression=C,
+                    parameters=[self.q, self.dq] + self._inertia_parameters())
+            return C_func
+
+    def _calc_C_product(self, multiplier, lambdify=True):
+        """ Uses Sympy to generate the product of the centrifugal and
+        Coriolis forces matrix with a vector
+
+        Each entry is derived directly from the derivatives of M,
+        without forming C, see parallel.coriolis_product
+
+        Parameters
+        ----------
+        multiplier : string
+            'dq' for np.dot(C, dq), or 'v' for np.dot(C, v) with v an
+            additional parameter of the function
+        lambdify : boolean, optional (Default: True)
+            if True returns a function to calculate the vector.
+            If False returns the Sympy matrix
+        """
+
+        C_v = None
+        C_v_func = None
+        filename = 'C_' + multiplier
+        v = self.dq if multiplier == 'dq' else self.v
+        with self._cache_lock(filename):
+            # check to see if we have our term saved in file
+            C_v, C_v_func = self._load_from_file(filename, lambdify)
+
+            if C_v is None and C_v_func is None:
+                # if no saved file was loaded, generate function
+                print('Generating centrifugal and Coriolis function for %s'
+                      % filename)
+                start_time = time.time()
+
+                # first get the derivatives of the inertia matrix
+                dM = self._calc_dM()
+
+                # each entry derived separately, with dM sent once to
+                # each process
+                C_v = parallel.map_tasks(
+                    parallel.coriolis_product,
+                    list(range(self.N_JOINTS)),
+                    self.n_processes,
+                    shared={'dM': dM, 'dq': self.dq, 'v': v})
+                C_v = sp.Matrix(C_v)
+
+                # save to file
+                self._save_to_file(filename, C_v, start_time)
+
+            if lambdify is False:
+                # if should return expression not function
+                return C_v
+
+            if C_v_func is None:
+                parameters = [self.q, self.dq]
+                if multiplier == 'v':
+                    parameters.append(self.v)
+                C_v_func = self._generate_and_save_function(
+                    filename=filename, expression=C_v,
+                    parameters=parameters + self._inertia_parameters())
+            return C_v_func
 
     def _calc_T(self, name):
         """ Uses Sympy to generate the transform for a joint or link
 
+        The transform to each frame of _CHAIN is the transform to the
+        frame before it, times a rotation about its z axis by its joint
+        angle, if it has one, times its fixed transform. Configs without
+        a kinematic chain override this.
+
         Parameters
         ----------
         name : string
             name of the joint, link, or end-effector
         """
-        raise NotImplementedError("_calc_T function not implemented")
+
+        if len(self._CHAIN) == 0:
+            raise NotImplementedError("_calc_T function not implemented")
+
+        if self._T.get(name, None) is None:
+            T = None
+            for frame, joint, transform in self._CHAIN:
+                if joint is not None:
+                    q = self.q[joint]
+                    transform = sp.Matrix([
+                        [sp.cos(q), -sp.sin(q), 0, 0],
+                        [sp.sin(q), sp.cos(q), 0, 0],
+                        [0, 0, 1, 0],
+                        [0, 0, 0, 1]]) * transform
+                T = transform if T is None else T * transform
+                if frame == name:
+                    break
+            else:
+                raise Exception('Invalid transformation name: %s' % name)
+            self._T[name] = T
+
+        return self._T[name]
+
+    def _transform_point(self, T, x):
+        """ Returns the transform of x into world coordinates
+
+        Parameters
+        ----------
+        T : sympy.Matrix
+            the transform of the reference frame x is in
+        x : numpy.array
+            the [x,y,z] offset inside the reference frame, see _calc_Tx
+        """
+
+        offset = self._constant_offset(x)
+        if offset is not None:
+            # if we're only interested in the origin or a registered
+            # offset, folding in the constant values rather than
+            # including the x variables significantly speeds things up
+            return sp.Matrix(T * sp.Matrix(list(offset) + [1]))
+        # if we're interested in other points in the given frame
+        # of reference, calculate transform with x variables
+        return sp.Matrix(T * sp.Matrix(self.x + [1]))
+
+    def _chain_transforms(self):
+        """ Returns the transforms of the kinematic chain as intermediate
+        variables, calculated in chain order
+
+        Returns (intermediates, frames, axes), where intermediates is a
+        list of (sympy.Symbol, expression) pairs, frames maps the name of
+        each frame in _CHAIN to its transform, and axes maps each joint
+        to the z axis and origin of the frame it rotates about. Each
+        entry of a transform that isn't constant is one of the
+        intermediate variables, calculated from those of the frame before
+        it, and the sine and cosine of its joint angle, so that every
+        frame reuses the transforms earlier in the chain.
+        """
+
+        if self._structured_chain is None:
+            intermediates = []
+            frames = {}
+            axes = {}
+            T = sp.eye(4)
+            for ii, (name, joint, transform) in enumerate(self._CHAIN):
+                if joint is not None:
+                    axes[joint] = (T[:3, 2], T[:3, 3])
+                    cos = sp.Symbol('_cq%i' % joint)
+                    sin = sp.Symbol('_sq%i' % joint)
+                    intermediates += [(cos, sp.cos(self.q[joint])),
+                                      (sin, sp.sin(self.q[joint]))]
+                    T = T * sp.Matrix([[cos, -sin, 0, 0],
+                                       [sin, cos, 0, 0],
+                                       [0, 0, 1, 0],
+                                       [0, 0, 0, 1]])
+                T = sp.Matrix(T * transform)
+                for jj in range(3):
+                    for kk in range(4):
+                        if not T[jj, kk].is_Atom:
+                            symbol = sp.Symbol('_T%i_%i%i' % (ii, jj, kk))
+                            intermediates.append((symbol, T[jj, kk]))
+                            T[jj, kk] = symbol
+                frames[name] = T
+            self._structured_chain = (intermediates, frames, axes)
+        return self._structured_chain
+
+    def _chain_expression(self, expression, calc, cse=None):
+        """ Returns the intermediate variables and expression to generate
+        a function from
+
+        With structured, the expression returned by calc, in terms of the
+        transforms of the kinematic chain, and the intermediate variables
+        of the transforms it uses, see _chain_transforms, if they take
+        fewer operations to calculate than expression, as the function is
+        generated. Otherwise, or if
+        the config has no kinematic chain or calc needs a frame that isn't
+        in it, no intermediate variables and expression.
+
+        Parameters
+        ----------
+        expression : sympy.Matrix
+            the expression in terms of the joint angles
+        calc : function
+            returns the expression in terms of the transforms of the chain
+        cse : boolean, optional (Default: None)
+            whether the function is generated with common subexpressions
+            calculated once, if None as the config's backend does
+        """
+
+        if not self.structured or len(self._CHAIN) == 0:
+            return (), expression
+        try:
+            chained = calc()
+        except KeyError:
+            return (), expression
+
+        used = self._chain_intermediates(chained)
+
+        # after common subexpression elimination, a single point, such as
+        # Tx, can take fewer operations expanded than with the rotations
+        # of every frame along the chain
+        if cse is None:
+            cse = self.streaming or backends.repeated_entries(expression) or (
+                self.backend in backends.BACKENDS and
+                backends.BACKENDS[self.backend].cse)
+        if (backends.count_ops(chained, used, cse=cse) >=
+                backends.count_ops(expression, cse=cse)):
+            return (), expression
+        return used, chained
+
+    def _chain_intermediates(self, expression):
+        """ Returns the intermediate variables of the kinematic chain an
+        expression depends on, in chain order, see _chain_transforms
+
+        Parameters
+        ----------
+        expression : sympy.Matrix
+            the expression in terms of the transforms of the chain
+        """
+
+        intermediates, _, _ = self._chain_transforms()
+        needed = set(expression.free_symbols)
+        used = []
+        for symbol, intermediate in reversed(intermediates):
+            if symbol in needed:
+                used.append((symbol, intermediate))
+                needed |= intermediate.free_symbols
+        return used[::-1]
+
+    def _chain_Tx(self, name, x):
+        """ Returns Tx for a frame in terms of the transforms of the
+        kinematic chain, see _calc_Tx and _chain_transforms """
+
+        _, frames, _ = self._chain_transforms()
+        return self._transform_point(frames[name], x)
+
+    def _chain_J(self, name, x, rows):
+        """ Returns the Jacobian for a frame in terms of the transforms of
+        the kinematic chain, see _calc_J and _chain_transforms
+
+        Rather than differentiating the position of the frame, the column
+        for each joint it moves with is the cross product of the joint's
+        axis with the offset of the position from the joint's origin.
+        """
+
+        _, frames, axes = self._chain_transforms()
+        Tx = self._chain_Tx(name, x)[:3, 0]
+        index = [frame for frame, _, _ in self._CHAIN].index(name)
+        moved = [joint for _, joint, _ in self._CHAIN[:index + 1]]
+
+        J = []
+        for ii in range(self.N_JOINTS):
+            if ii in moved and any(row in 'xyz' for row in rows):
+                z, origin = axes[ii]
+                J.append(list(z.cross(Tx - origin)))
+            else:
+                J.append([0, 0, 0])
+        return self._assemble_J(name, J, rows, J_orientation=[
+            frames['joint%i' % ii][:3, 2] for ii in range(self.N_JOINTS)])
+
+    def _chain_M(self):
+        """ Returns the inertia matrix in joint space in terms of the
+        transforms of the kinematic chain, see _calc_M """
+
+        return self._assemble_M(*self._chain_J_links_joints())
+
+    def _chain_g(self):
+        """ Returns the force of gravity in joint space in terms of the
+        transforms of the kinematic chain, see _calc_g """
+
+        return self._assemble_g(*self._chain_J_links_joints())
+
+    def _chain_J_links_joints(self):
+        """ Returns the Jacobians for the COM of each link and joint in
+        terms of the transforms of the kinematic chain """
+
+        return ([self._chain_J('link%i' % ii, [0, 0, 0], self._J_ROWS)
+                 for ii in range(self.N_LINKS)],
+                [self._chain_J('joint%i' % ii, [0, 0, 0], self._J_ROWS)
+                 for ii in range(self.N_JOINTS)])
 
     def _calc_Tx(self, name, x=None, lambdify=True):
         """Return transform from x in reference frame of 'name' to the origin
@@ -747,41 +3094,86 @@ class BaseConfig():
 
         Tx = None
         Tx_func = None
-        filename = name + '[0,0,0]' if np.allclose(x, 0) else name
+        filename = self._offset_name(name, x)
         filename += '_Tx'
-        # check to see if we have our transformation saved in file
-        Tx, Tx_func = self._load_from_file(filename, lambdify)
-
-        if Tx is None and Tx_func is None:
-            print('Generating transform function for %s' % filename)
-            T = self._calc_T(name=name)
-            # transform x into world coordinates
-            if np.allclose(x, 0):
-                # if we're only interested in the origin, not including
-                # the x variables significantly speeds things up
-                Tx = T * sp.Matrix([0, 0, 0, 1])
-            else:
-                # if we're interested in other points in the given frame
-                # of reference, calculate transform with x variables
-                Tx = T * sp.Matrix(self.x + [1])
-            Tx = sp.Matrix(Tx)
-
-            # save to file
-            abr_control.utils.os_utils.makedirs(
-                '%s/%s' % (self.config_folder, filename))
-            cloudpickle.dump(sp.Matrix(Tx), open(
-                '%s/%s/%s.Tx' % (self.config_folder, filename, filename),
-                'wb'))
-
-        if lambdify is False:
-            # if should return expression not function
-            return Tx
-
-        if Tx_func is None:
-            Tx_func = self._generate_and_save_function(
-                filename=filename, expression=Tx,
-                parameters=self.q+self.x)
-        return Tx_func
+        with self._cache_lock(filename):
+            # check to see if we have our transformation saved in file
+            Tx, Tx_func = self._load_from_file(filename, lambdify)
+
+            if Tx is None and Tx_func is None:
+                print('Generating transform function for %s' % filename)
+                start_time = time.time()
+                Tx = self._transform_point(self._calc_T(name=name), x)
+
+                # save to file
+                self._save_to_file(filename, Tx, start_time)
+
+            if lambdify is False:
+                # if should return expression not function
+                return Tx
+
+            if Tx_func is None:
+                intermediates, Tx = self._chain_expression(
+                    Tx, lambda: self._chain_Tx(name, x))
+                Tx_func = self._generate_and_save_function(
+                    filename=filename, expression=Tx,
+                    parameters=[self.q, self.x], intermediates=intermediates)
+            return Tx_func
+
+    def _calc_Tx_all(self, rotations, lambdify=True):
+        """ Uses Sympy to generate the positions of every frame at once
+
+        The transform to each frame in _CHAIN is the transform to the
+        frame before it times the transform between them, so common
+        subexpression elimination calculates each link of the chain
+        only once.
+
+        Parameters
+        ----------
+        rotations : boolean
+            if True, each row also includes the rotation matrix of the
+            frame, flattened in row-major order
+        lambdify : boolean, optional (Default: True)
+            if True returns a function to calculate the matrix.
+            If False returns the Sympy matrix
+        """
+
+        Tx_all = None
+        Tx_all_func = None
+        filename = 'Tx_all[R]' if rotations else 'Tx_all'
+        with self._cache_lock(filename):
+            # check to see if we have our transforms saved in file
+            Tx_all, Tx_all_func = self._load_from_file(filename, lambdify)
+
+            if Tx_all is None and Tx_all_func is None:
+                print('Generating transform function for %s' % filename)
+                start_time = time.time()
+                rows = []
+                for name in self.FRAMES:
+                    T = self._calc_T(name=name)
+                    row = list(T[:3, 3])
+                    if rotations:
+                        row += list(T[:3, :3])
+                    rows.append(row)
+                Tx_all = sp.Matrix(rows)
+
+                # save to file
+                self._save_to_file(filename, Tx_all, start_time)
+
+            if lambdify is False:
+                # if should return expression not function
+                return Tx_all
+
+            if Tx_all_func is None:
+                if self.backend != 'numpy':
+                    Tx_all_func = self._generate_and_save_function(
+                        filename=filename, expression=Tx_all,
+                        parameters=[self.q])
+                else:
+                    # share the transforms of the frames earlier in the chain
+                    Tx_all_func = self._lambdify_and_save(
+                        filename, Tx_all, [self.q], cse=True)
+            return Tx_all_func
 
     def _calc_T_inv(self, name, x, lambdify=True):
         """ Return the inverse transform matrix
@@ -804,32 +3196,32 @@ class BaseConfig():
 
         T_inv = None
         T_inv_func = None
-        filename = name + '[0,0,0]' if np.allclose(x, 0) else name
+        filename = self._offset_name(name, x)
         filename += '_Tinv'
-        # check to see if we have our transformation saved in file
-        T_inv, T_inv_func = self._load_from_file(filename, lambdify)
-
-        if T_inv is None and T_inv_func is None:
-            print('Generating inverse transform function for %s' % filename)
-            T = self._calc_T(name=name)
-            rotation_inv = T[:3, :3].T
-            translation_inv = -rotation_inv * T[:3, 3]
-            T_inv = rotation_inv.row_join(translation_inv).col_join(
-                sp.Matrix([[0, 0, 0, 1]]))
-            T_inv = sp.Matrix(T_inv)
-
-            # save to file
-            abr_control.utils.os_utils.makedirs(
-                '%s/%s' % (self.config_folder, filename))
-            cloudpickle.dump(T_inv, open(
-                '%s/%s.T_inv' % (self.config_folder, filename), 'wb'))
-
-        if lambdify is False:
-            # if should return expression not function
-            return T_inv
-
-        if T_inv_func is None:
-            T_inv_func = self._generate_and_save_function(
-                filename=filename, expression=T_inv,
-                parameters=self.q+self.x)
-        return T_inv_func
+        with self._cache_lock(filename):
+            # check to see if we have our transformation saved in file
+            T_inv, T_inv_func = self._load_from_file(filename, lambdify)
+
+            if T_inv is None and T_inv_func is None:
+                print('Generating inverse transform function for %s'
+                      % filename)
+                start_time = time.time()
+                T = self._calc_T(name=name)
+                rotation_inv = T[:3, :3].T
+                translation_inv = -rotation_inv * T[:3, 3]
+                T_inv = rotation_inv.row_join(translation_inv).col_join(
+                    sp.Matrix([[0, 0, 0, 1]]))
+                T_inv = sp.Matrix(T_inv)
+
+                # save to file
+                self._save_to_file(filename, T_inv, start_time)
+
+            if lambdify is False:
+                # if should return expression not function
+                return T_inv
+
+            if T_inv_func is None:
+                T_inv_func = self._generate_and_save_function(
+                    filename=filename, expression=T_inv,
+                    parameters=[self.q, self.x])
+            return T_inv_func
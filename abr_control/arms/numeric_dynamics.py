@@ -0,0 +1,295 @@
+import numpy as np
+
+
+def _cross(a, b):
+    """ Cross product of two 3D vectors, much faster than numpy.cross
+    for single vectors """
+    return np.array([a[1] * b[2] - a[2] * b[1],
+                     a[2] * b[0] - a[0] * b[2],
+                     a[0] * b[1] - a[1] * b[0]])
+
+
+class NumericDynamics():
+    """ Numerically calculates the joint space dynamics of a robot
+
+    An alternative to the symbolically generated M, g, and C functions,
+    with no generation cost. Uses the composite rigid body algorithm
+    (CRBA) for the inertia matrix and the recursive Newton-Euler
+    algorithm (RNEA) for the gravity and centrifugal / Coriolis terms,
+    driven by the kinematic chain and inertia matrices of the config.
+
+    To match the symbolic derivation in BaseConfig, the 6x6 inertia
+    matrix of each link and joint is applied to the linear velocity of
+    its center of mass and the angular velocity in world coordinates,
+    and the centrifugal and Coriolis terms are those of the resulting
+    Lagrangian (i.e. np.dot(C(q, dq), dq) with C from the Christoffel
+    symbols of M).
+
+    Parameters
+    ----------
+    robot_config : class instance
+        contains all relevant information about the arm
+        such as: number of joints, number of links, mass information etc.
+    """
+
+    def __init__(self, robot_config):
+        self.robot_config = robot_config
+        self.N_JOINTS = robot_config.N_JOINTS
+
+        # the fixed part of each transform in the chain, and
+        # the index of the joint rotating the frame (or None)
+        self.joints = []
+        self.transforms = []
+        # the inertia matrix of the mass at each frame (or None)
+        self.inertias = []
+        for name, joint, transform in robot_config._CHAIN:
+            self.joints.append(joint)
+            self.transforms.append(np.array(transform, dtype='float64'))
+            self.inertias.append(self._inertia(name))
+
+        self.gravity = np.array(
+            robot_config.gravity, dtype='float64').flatten()[:3]
+
+    def _inertia(self, name):
+        """ Returns the 6x6 inertia matrix at a frame, None if massless
+
+        Parameters
+        ----------
+        name : string
+            name of the joint, link, or end-effector
+        """
+        inertia = None
+        if name.startswith('link') and (
+                int(name[4:]) < self.robot_config.N_LINKS):
+            inertia = self.robot_config._M_LINKS[int(name[4:])]
+        elif name.startswith('joint') and (
+                int(name[5:]) < self.robot_config.N_JOINTS):
+            inertia = self.robot_config._M_JOINTS[int(name[5:])]
+
+        if inertia is not None:
+            inertia = np.array(inertia, dtype='float64')
+            if np.allclose(inertia, 0):
+                inertia = None
+        return inertia
+
+    def _forward_kinematics(self, q):
+        """ Returns the transform to each frame in the chain
+
+        Also returns the axis and position of each joint in
+        world coordinates.
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        """
+        T = np.eye(4)
+        frames = []
+        axes = np.zeros((self.N_JOINTS, 3))
+        pivots = np.zeros((self.N_JOINTS, 3))
+        for joint, transform in zip(self.joints, self.transforms):
+            if joint is not None:
+                # the joint rotates about the z axis of the previous frame
+                axes[joint] = T[:3, 2]
+                pivots[joint] = T[:3, 3]
+                c = np.cos(q[joint])
+                s = np.sin(q[joint])
+                T = np.dot(T, np.array([
+                    [c, -s, 0, 0],
+                    [s, c, 0, 0],
+                    [0, 0, 1, 0],
+                    [0, 0, 0, 1]]))
+            T = np.dot(T, transform)
+            frames.append(T)
+        return frames, axes, pivots
+
+    def _rnea(self, q, dq, ddq, base_acceleration, kinematics=None):
+        """ Recursive Newton-Euler algorithm in world coordinates
+
+        Returns the joint torques required to produce ddq at state (q, dq)
+        with the base accelerating at base_acceleration.
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        dq : numpy.array
+            joint velocities [radians/second]
+        ddq : numpy.array
+            joint accelerations [radians/second**2]
+        base_acceleration : numpy.array
+            linear acceleration of the base [meters/second**2]
+        kinematics : tuple, optional (Default: None)
+            the output of _forward_kinematics(q), if already calculated
+        """
+        if kinematics is None:
+            kinematics = self._forward_kinematics(q)
+        frames, axes, pivots = kinematics
+
+        # forward pass: track the motion of the body each frame is
+        # attached to through a reference point on that body
+        w = np.zeros(3)  # angular velocity
+        dw = np.zeros(3)  # angular acceleration
+        r = np.zeros(3)  # reference point
+        v = np.zeros(3)  # linear velocity of reference point
+        a = np.array(base_acceleration, dtype='float64')
+        wrenches = []
+        for joint, T, inertia in zip(self.joints, frames, self.inertias):
+            if joint is not None:
+                # move the reference point to the joint
+                d = pivots[joint] - r
+                v = v + _cross(w, d)
+                a = a + _cross(dw, d) + _cross(w, _cross(w, d))
+                r = pivots[joint]
+                z = axes[joint]
+                dw = dw + z * ddq[joint] + _cross(w, z * dq[joint])
+                w = w + z * dq[joint]
+
+            if inertia is None:
+                wrenches.append(None)
+                continue
+            c = T[:3, 3]
+            d = c - r
+            vc = v + _cross(w, d)
+            ac = a + _cross(dw, d) + _cross(w, _cross(w, d))
+            wrench = np.dot(inertia, np.hstack([ac, dw]))
+            # velocity product term from the rotational kinetic energy
+            momentum = np.dot(inertia[3:], np.hstack([vc, w]))
+            wrench[3:] += _cross(momentum, w)
+            wrenches.append((c, wrench))
+
+        # backward pass: accumulate the force and moment (about the
+        # origin) from every mass outboard of each joint
+        tau = np.zeros(self.N_JOINTS)
+        force = np.zeros(3)
+        moment = np.zeros(3)
+        for joint, wrench in zip(reversed(self.joints), reversed(wrenches)):
+            if wrench is not None:
+                c, f = wrench
+                force += f[:3]
+                moment += _cross(c, f[:3]) + f[3:]
+            if joint is not None:
+                tau[joint] = np.dot(
+                    axes[joint], moment - _cross(pivots[joint], force))
+        return tau
+
+    def M(self, q):
+        """ Calculates the joint space inertia matrix
+
+        Uses the composite rigid body algorithm.
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        """
+        frames, axes, pivots = self._forward_kinematics(q)
+
+        M = np.zeros((self.N_JOINTS, self.N_JOINTS))
+        # spatial inertia of all outboard bodies, about the origin
+        composite = np.zeros((6, 6))
+        for joint, T, inertia in zip(
+                reversed(self.joints), reversed(frames),
+                reversed(self.inertias)):
+            if inertia is not None:
+                # maps (origin velocity, angular velocity) to the
+                # (linear velocity, angular velocity) of the mass
+                c = T[:3, 3]
+                A = np.eye(6)
+                A[:3, 3:] = np.array([
+                    [0, c[2], -c[1]],
+                    [-c[2], 0, c[0]],
+                    [c[1], -c[0], 0]])
+                composite += np.dot(A.T, np.dot(inertia, A))
+            if joint is not None:
+                # the joint's motion in spatial coordinates
+                S = np.hstack([_cross(pivots[joint], axes[joint]),
+                               axes[joint]])
+                F = np.dot(composite, S)
+                for ii in range(joint + 1):
+                    Si = np.hstack([_cross(pivots[ii], axes[ii]),
+                                    axes[ii]])
+                    M[ii, joint] = M[joint, ii] = np.dot(Si, F)
+        return M
+
+    def g(self, q):
+        """ Calculates the force of gravity in joint space
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        """
+        zeros = np.zeros(self.N_JOINTS)
+        return self._rnea(q, zeros, zeros, self.gravity)
+
+    def C(self, q, dq):
+        """ Calculates the centrifugal and Coriolis forces matrix
+        such that np.dot(C, dq) is the full term
+
+        Calculated from the velocity product term of the RNEA,
+        which is a quadratic form in dq, by polarization.
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        dq : numpy.array
+            joint velocities [radians/second]
+        """
+        dq = np.asarray(dq, dtype='float64')
+        zeros = np.zeros(self.N_JOINTS)
+        kinematics = self._forward_kinematics(q)
+
+        def velocity_product(v):
+            return self._rnea(q, v, zeros, np.zeros(3), kinematics)
+
+        base = velocity_product(dq)
+        C = np.zeros((self.N_JOINTS, self.N_JOINTS))
+        for ii in range(self.N_JOINTS):
+            e = np.zeros(self.N_JOINTS)
+            e[ii] = 1.0
+            C[:, ii] = .5 * (velocity_product(dq + e) - base -
+                             velocity_product(e))
+        return C
+
+    def C_dq(self, q, dq):
+        """ Calculates the centrifugal and Coriolis forces vector,
+        equal to np.dot(C(q, dq), dq)
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        dq : numpy.array
+            joint velocities [radians/second]
+        """
+        zeros = np.zeros(self.N_JOINTS)
+        return self._rnea(q, dq, zeros, np.zeros(3))
+
+    def C_v(self, q, dq, v):
+        """ Calculates the product of the centrifugal and Coriolis forces
+        matrix with a vector, equal to np.dot(C(q, dq), v)
+
+        The velocity product term is a symmetric quadratic form in dq,
+        so the product is found by polarization.
+
+        Parameters
+        ----------
+        q : numpy.array
+            joint angles [radians]
+        dq : numpy.array
+            joint velocities [radians/second]
+        v : numpy.array
+            the vector to multiply C by
+        """
+        dq = np.asarray(dq, dtype='float64')
+        v = np.asarray(v, dtype='float64')
+        zeros = np.zeros(self.N_JOINTS)
+        kinematics = self._forward_kinematics(q)
+
+        def velocity_product(u):
+            return self._rnea(q, u, zeros, np.zeros(3), kinematics)
+
+        return .5 * (velocity_product(dq + v) - velocity_product(dq) -
+                     velocity_product(v))
@@ -33,8 +33,6 @@ class Config(BaseConfig):
         super(Config, self).__init__(
             N_JOINTS=1, N_LINKS=1, ROBOT_NAME='onelink', **kwargs)
 
-        self._T = {}  # dictionary for storing calculated transforms
-
         self.JOINT_NAMES = ['joint0']
         self.REST_ANGLES = np.array([np.pi/2.0])
 
@@ -71,19 +69,12 @@ class Config(BaseConfig):
             [0, 0, 0, 1]])
 
         # Transform matrix : joint 0 -> link 1
-        # account for rotation due to q
-        self.Tj0l1a = sp.Matrix([
-            [sp.cos(self.q[0]), -sp.sin(self.q[0]), 0, 0],
-            [sp.sin(self.q[0]), sp.cos(self.q[0]), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]])
         # account for change of axes and offsets
         self.Tj0l1b = sp.Matrix([
             [0, 0, 1, self.L[2, 0]],
             [0, 1, 0, self.L[2, 1]],
             [-1, 0, 0, self.L[2, 2]],
             [0, 0, 0, 1]])
-        self.Tj0l1 = self.Tj0l1a * self.Tj0l1b
 
         # Transform matrix : link 1 -> end-effector
         self.Tl1ee = sp.Matrix([
@@ -92,28 +83,13 @@ class Config(BaseConfig):
             [0, 0, 1, self.L[3, 2]],
             [0, 0, 0, 1]])
 
-        # orientation part of the Jacobian (compensating for angular velocity)
-        self.J_orientation = [
-            self._calc_T('joint0')[:3, :3] * self._KZ]  # joint 0 orientation
-
-    def _calc_T(self, name):  # noqa C907
-        """ Uses Sympy to generate the transform for a joint or link
-
-        name : string
-            name of the joint, link, or end-effector
-        """
-
-        if self._T.get(name, None) is None:
-            if name == 'link0':
-                self._T[name] = self.Torgl0
-            elif name == 'joint0':
-                self._T[name] = self._calc_T('link0') * self.Tl0j0
-            elif name == 'link1':
-                self._T[name] = self._calc_T('joint0') * self.Tj0l1
-            elif name == 'EE':
-                self._T[name] = self._calc_T('link1') * self.Tl1ee
-
-            else:
-                raise Exception('Invalid transformation name: %s' % name)
+        # kinematic chain, transforms between each frame and the next,
+        # after rotating about z by the joint angle, see _calc_T
+        self._CHAIN = [
+            ('link0', None, self.Torgl0),
+            ('joint0', None, self.Tl0j0),
+            ('link1', 0, self.Tj0l1b),
+            ('EE', None, self.Tl1ee)]
 
-        return self._T[name]
+        # if required, check all generated functions are saved to file
+        self._check_cached()
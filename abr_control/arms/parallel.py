@@ -0,0 +1,212 @@
+""" Functions for deriving the entries of generated expressions
+
+Each function takes a single picklable task and returns the derived
+expression, so that independent matrix entries and frames can be
+derived either in this process or spread across a process pool.
+Expressions that are needed by every task (such as the inertia matrix
+when deriving the Coriolis terms) are sent once to each worker process
+through the shared dictionary instead of with every task.
+"""
+
+import multiprocessing
+
+import sympy as sp
+
+
+# expressions shared by all tasks in the current map_tasks call
+_shared = {}
+
+
+def _initialize(shared):
+    """ Stores the expressions shared by all tasks in this process """
+    _shared.clear()
+    _shared.update(shared)
+
+
+def map_tasks(function, tasks, n_processes=1, shared=None):
+    """ Applies function to every task, returning the results in order
+
+    Parameters
+    ----------
+    function : function
+        a module level function of this module taking a single task
+    tasks : list
+        the arguments for each call to function
+    n_processes : int, optional (Default: 1)
+        the number of processes to use, if 1 the tasks are run in
+        this process. If None, one process is used per CPU
+    shared : dictionary, optional (Default: None)
+        expressions used by every task, available to function in _shared
+    """
+
+    shared = {} if shared is None else shared
+    if n_processes == 1 or len(tasks) < 2:
+        _initialize(shared)
+        results = [function(task) for task in tasks]
+        _shared.clear()
+        return results
+
+    with multiprocessing.Pool(n_processes, initializer=_initialize,
+                              initargs=(shared,)) as pool:
+        return pool.map(function, tasks)
+
+
+def jacobian_position(task):
+    """ Calculates the derivative of (x,y,z) wrt one joint angle
+
+    Parameters
+    ----------
+    task : tuple
+        (Tx, q), the position expression and the joint angle symbol
+    """
+    Tx, q = task
+    return [Tx[0].diff(q), Tx[1].diff(q), Tx[2].diff(q)]
+
+
+def time_derivative(task):
+    """ Calculates the time derivative of an expression of q
+
+    Parameters
+    ----------
+    task : tuple
+        (expression, q, dq), the expression and the lists of joint angle
+        and joint velocity symbols
+    """
+    expression, q, dq = task
+    derivative = sp.Float(0)
+    for q_k, dq_k in zip(q, dq):
+        derivative += expression.diff(q_k) * dq_k
+    return derivative
+
+
+def inertia_term(task):
+    """ Transforms the inertia matrix of a link or joint into joint space
+
+    Returns the upper triangle of J^T M J, which is symmetric, row by row
+
+    Parameters
+    ----------
+    task : tuple
+        (J, M), the Jacobian of the link or joint's center of mass
+        and its inertia matrix
+    """
+    J, M = task
+    JTM = J.T * M
+    return [(JTM[ii, :] * J[:, jj])[0] for ii in range(J.shape[1])
+            for jj in range(ii, J.shape[1])]
+
+
+def inertia_derivative(task):
+    """ Calculates the derivatives of an entry of the inertia matrix wrt
+    each joint angle
+
+    With the inertia matrix M and the list of joint angle symbols q in
+    _shared
+
+    Parameters
+    ----------
+    task : tuple
+        (ii, jj), the row and column of the entry
+    """
+    ii, jj = task
+    M = _shared['M']
+    q = _shared['q']
+    return [M[ii, jj].diff(q_k) for q_k in q]
+
+
+def gravity_term(task):
+    """ Transforms the effect of gravity on a link or joint into joint space
+
+    Parameters
+    ----------
+    task : tuple
+        (J, M, gravity), the Jacobian of the link or joint's center of
+        mass, its inertia matrix, and the gravity vector
+    """
+    J, M, gravity = task
+    return J.T * M * gravity
+
+
+def coriolis_entry(task):
+    """ Calculates one entry of the centrifugal and Coriolis matrix
+
+    C_{kj} = sum_i c_{ijk}(q) \\dot{q}_i, with the derivatives of the
+    inertia matrix dM, where dM[i][j][k] is
+    \\frac{\\partial M_{ij}}{\\partial q_k}, and the list of joint
+    velocity symbols dq in _shared
+
+    Parameters
+    ----------
+    task : tuple
+        (kk, jj), the row and column of the entry
+    """
+    kk, jj = task
+    dM = _shared['dM']
+    dq = _shared['dq']
+
+    # c_{ijk} = 1/2 * sum_i (\frac{\partial M_{kj}}{\partial q_j} +
+    # \frac{\partial M_{ki}}{\partial q_j} - \frac{\partial M_{ij}}
+    # {\partial q_k})
+    entry = sp.S.Zero
+    for ii in range(len(dq)):
+        entry += .5 * (dM[kk][jj][ii] + dM[kk][ii][jj] -
+                       dM[ii][jj][kk]) * dq[ii]
+    return entry
+
+
+def coriolis_product(task):
+    """ Calculates one entry of the centrifugal and Coriolis vector C v
+
+    The product of C(q, dq) with the vector v, without forming C. With
+    D_{ab} = \\frac{\\partial M_{ka}}{\\partial q_b} and
+    E_{ab} = \\frac{\\partial M_{ab}}{\\partial q_k}, the entry is
+
+    1/2 sum_{ab} (D_{ab} (\\dot{q}_b v_a + \\dot{q}_a v_b) -
+                  E_{ab} \\dot{q}_a v_b)
+
+    The sums are left expanded, which common subexpression elimination
+    reduces further than nesting them. The derivatives of the inertia
+    matrix dM, as for coriolis_entry, and the lists of joint velocity and
+    multiplier symbols dq and v are in _shared
+
+    Parameters
+    ----------
+    task : int
+        the row of the entry
+    """
+    kk = task
+    dM = _shared['dM']
+    dq = _shared['dq']
+    v = _shared['v']
+
+    entry = sp.S.Zero
+    for aa in range(len(dq)):
+        for bb in range(len(dq)):
+            D = dM[kk][aa][bb]
+            E = dM[aa][bb][kk]
+            if v == dq:
+                entry += (D - E / 2) * dq[aa] * dq[bb]
+            else:
+                entry += (D * (dq[bb] * v[aa] + dq[aa] * v[bb]) -
+                          E * dq[aa] * v[bb]) / 2
+    return entry
+
+
+def jacobian_velocity_product(task):
+    """ Calculates one entry of dJ dq from the row of the Jacobian
+
+    sum_{ij} \\frac{\\partial J_j}{\\partial q_i} \\dot{q}_i
+    \\dot{q}_j, without forming the row of dJ
+
+    Parameters
+    ----------
+    task : tuple
+        (row, q, dq), the row of the Jacobian and the lists of joint angle
+        and joint velocity symbols
+    """
+    row, q, dq = task
+    entry = sp.S.Zero
+    for jj in range(len(q)):
+        for ii in range(len(q)):
+            entry += row[jj].diff(q[ii]) * dq[ii] * dq[jj]
+    return entry
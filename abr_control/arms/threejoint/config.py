@@ -47,8 +47,6 @@ class Config(BaseConfig):
                 'dq': np.array([6.7, 12.37, 6.18])
                 }
 
-        self._T = {}  # dictionary for storing calculated transforms
-
         # for the null space controller, keep arm near these angles
         self.REST_ANGLES = np.array([np.pi/4.0, np.pi/4.0, np.pi/4.0],
                                     dtype='float32')
@@ -97,19 +95,12 @@ class Config(BaseConfig):
             [0, 0, 0, 1]])
 
         # Transform matrix : joint 0 -> link 1
-        # account for rotation of q
-        self.Tj0l1a = sp.Matrix([
-            [sp.cos(self.q[0]), -sp.sin(self.q[0]), 0, 0],
-            [sp.sin(self.q[0]), sp.cos(self.q[0]), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]])
         # no change of axes, account for offsets
         self.Tj0l1b = sp.Matrix([
             [1, 0, 0, self.L[2, 0]],
             [0, 1, 0, self.L[2, 1]],
             [0, 0, 1, self.L[2, 2]],
             [0, 0, 0, 1]])
-        self.Tj0l1 = self.Tj0l1a * self.Tj0l1b
 
         # Transform matrix : link 1 -> joint 1
         # no change of axes, account for offsets
@@ -120,19 +111,12 @@ class Config(BaseConfig):
             [0, 0, 0, 1]])
 
         # Transform matrix : joint 1 -> link 2
-        # account for rotation of q
-        self.Tj1l2a = sp.Matrix([
-            [sp.cos(self.q[1]), -sp.sin(self.q[1]), 0, 0],
-            [sp.sin(self.q[1]), sp.cos(self.q[1]), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]])
         # no change of axes, account for offsets
         self.Tj1l2b = sp.Matrix([
             [1, 0, 0, self.L[4, 0]],
             [0, 1, 0, self.L[4, 1]],
             [0, 0, 1, self.L[4, 2]],
             [0, 0, 0, 1]])
-        self.Tj1l2 = self.Tj1l2a * self.Tj1l2b
 
         # Transform matrix : link 2 -> joint 2
         # no change of axes, account for offsets
@@ -143,19 +127,12 @@ class Config(BaseConfig):
             [0, 0, 0, 1]])
 
         # Transform matrix : joint 2 -> link 3
-        # account for rotation of q
-        self.Tj2l3a = sp.Matrix([
-            [sp.cos(self.q[2]), -sp.sin(self.q[2]), 0, 0],
-            [sp.sin(self.q[2]), sp.cos(self.q[2]), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]])
         # no change of axes, account for offsets
         self.Tj2l3b = sp.Matrix([
             [1, 0, 0, self.L[6, 0]],
             [0, 1, 0, self.L[6, 1]],
             [0, 0, 1, self.L[6, 2]],
             [0, 0, 0, 1]])
-        self.Tj2l3 = self.Tj2l3a * self.Tj2l3b
 
         # Transform matrix : link 3 -> end-effector
         # no change of axes, account for offsets
@@ -165,38 +142,17 @@ class Config(BaseConfig):
             [0, 0, 1, self.L[7, 2]],
             [0, 0, 0, 1]])
 
-        # orientation part of the Jacobian (compensating for angular velocity)
-        self.J_orientation = [
-            self._calc_T('joint0')[:3, :3] * self._KZ,  # joint 0 orientation
-            self._calc_T('joint1')[:3, :3] * self._KZ,  # joint 1 orientation
-            self._calc_T('joint2')[:3, :3] * self._KZ]  # joint 2 orientation
-
-    def _calc_T(self, name):
-        """ Uses Sympy to generate the transform for a joint or link
-
-        name : string
-            name of the joint, link, or end-effector
-        """
-
-        if self._T.get(name, None) is None:
-            if name == 'link0':
-                self._T[name] = self.Torgl0
-            elif name == 'joint0':
-                self._T[name] = self._calc_T('link0') * self.Tl0j0
-            elif name == 'link1':
-                self._T[name] = self._calc_T('joint0') * self.Tj0l1
-            elif name == 'joint1':
-                self._T[name] = self._calc_T('link1') * self.Tl1j1
-            elif name == 'link2':
-                self._T[name] = self._calc_T('joint1') * self.Tj1l2
-            elif name == 'joint2':
-                self._T[name] = self._calc_T('link2') * self.Tl2j2
-            elif name == 'link3':
-                self._T[name] = self._calc_T('joint2') * self.Tj2l3
-            elif name == 'EE':
-                self._T[name] = self._calc_T('link3') * self.Tl3ee
-
-            else:
-                raise Exception('Invalid transformation name: %s' % name)
-
-        return self._T[name]
+        # kinematic chain, transforms between each frame and the next,
+        # after rotating about z by the joint angle, see _calc_T
+        self._CHAIN = [
+            ('link0', None, self.Torgl0),
+            ('joint0', None, self.Tl0j0),
+            ('link1', 0, self.Tj0l1b),
+            ('joint1', None, self.Tl1j1),
+            ('link2', 1, self.Tj1l2b),
+            ('joint2', None, self.Tl2j2),
+            ('link3', 2, self.Tj2l3b),
+            ('EE', None, self.Tl3ee)]
+
+        # if required, check all generated functions are saved to file
+        self._check_cached()
@@ -20,6 +20,8 @@ class ArmSim():
     def __init__(self, robot_config, dt=.001, q_init=None):
 
         self.robot_config = robot_config
+        # the rows of Tx_all for each joint and the end-effector
+        self.joint_frames = self.robot_config.joint_frames
 
         self.q_init = (q_init if q_init is not None else
                        self.robot_config.REST_ANGLES)
@@ -93,9 +95,7 @@ class ArmSim():
         """ Compute x,y position of the hand
         """
 
-        xy = [self.robot_config.Tx('joint%i' % ii, q=self.q)
-              for ii in range(self.robot_config.N_JOINTS)]
-        xy = np.vstack([xy, self.robot_config.Tx('EE', q=self.q)])
+        xy = self.robot_config.Tx_all(self.q)[self.joint_frames]
         self.joints_x = xy[:, 0]
         self.joints_y = xy[:, 1]
         return np.array([self.joints_x, self.joints_y])
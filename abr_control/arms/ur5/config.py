@@ -47,8 +47,6 @@ class Config(BaseConfig):
                 'dq': np.array([12.47, 2.5, 1.986, 3.374, 10.557, 6.223])
                 }
 
-        self._T = {}  # dictionary for storing calculated transforms
-
         self.JOINT_NAMES = ['UR5_joint%i' % ii
                             for ii in range(self.N_JOINTS)]
 
@@ -111,19 +109,12 @@ class Config(BaseConfig):
             [0, 0, 0, 1]])
 
         # Transform matrix : joint 0 -> link 1
-        # account for rotations due to q
-        self.Tj0l1a = sp.Matrix([
-            [sp.cos(self.q[0]), -sp.sin(self.q[0]), 0, 0],
-            [sp.sin(self.q[0]), sp.cos(self.q[0]), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]])
         # no change of axes, account for offsets
         self.Tj0l1b = sp.Matrix([
             [1, 0, 0, self.L[2, 0]],
             [0, 1, 0, self.L[2, 1]],
             [0, 0, 1, self.L[2, 2]],
             [0, 0, 0, 1]])
-        self.Tj0l1 = self.Tj0l1a * self.Tj0l1b
 
         # Transform matrix : link 1 -> joint 1
         # account for axes rotation and offset
@@ -134,19 +125,12 @@ class Config(BaseConfig):
             [0, 0, 0, 1]])
 
         # Transform matrix : joint 1 -> link 2
-        # account for rotations due to q
-        self.Tj1l2a = sp.Matrix([
-            [sp.cos(self.q[1]), -sp.sin(self.q[1]), 0, 0],
-            [sp.sin(self.q[1]), sp.cos(self.q[1]), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]])
         # account for axes rotation and offsets
         self.Tj1l2b = sp.Matrix([
             [0, 0, 1, self.L[4, 0]],
             [0, 1, 0, self.L[4, 1]],
             [-1, 0, 0, self.L[4, 2]],
             [0, 0, 0, 1]])
-        self.Tj1l2 = self.Tj1l2a * self.Tj1l2b
 
         # Transform matrix : link 2 -> joint 2
         # account for axes rotation and offsets
@@ -157,19 +141,12 @@ class Config(BaseConfig):
             [0, 0, 0, 1]])
 
         # Transform matrix : joint 2 -> link 3
-        # account for rotations due to q
-        self.Tj2l3a = sp.Matrix([
-            [sp.cos(self.q[2]), -sp.sin(self.q[2]), 0, 0],
-            [sp.sin(self.q[2]), sp.cos(self.q[2]), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]])
         # account for axes rotation and offsets
         self.Tj2l3b = sp.Matrix([
             [0, 0, 1, self.L[6, 0]],
             [0, 1, 0, self.L[6, 1]],
             [-1, 0, 0, self.L[6, 2]],
             [0, 0, 0, 1]])
-        self.Tj2l3 = self.Tj2l3a * self.Tj2l3b
 
         # Transform matrix : link 3 -> joint 3
         # account for axes change and offsets
@@ -180,19 +157,12 @@ class Config(BaseConfig):
             [0, 0, 0, 1]])
 
         # Transform matrix: joint 3 -> link 4
-        # account for rotations due to q
-        self.Tj3l4a = sp.Matrix([
-            [sp.cos(self.q[3]), -sp.sin(self.q[3]), 0, 0],
-            [sp.sin(self.q[3]), sp.cos(self.q[3]), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]])
         # account for axes and rotation and offsets
         self.Tj3l4b = sp.Matrix([
             [0, 0, 1, self.L[8, 0]],
             [0, 1, 0, self.L[8, 1]],
             [-1, 0, 0, self.L[8, 2]],
             [0, 0, 0, 1]])
-        self.Tj3l4 = self.Tj3l4a * self.Tj3l4b
 
         # Transform matrix: link 4 -> joint 4
         # no axes change, account for offsets
@@ -203,12 +173,6 @@ class Config(BaseConfig):
             [0, 0, 0, 1]])
 
         # Transform matrix: joint 4 -> link 5
-        # account for rotations due to q
-        self.Tj4l5a = sp.Matrix([
-            [sp.cos(self.q[4]), -sp.sin(self.q[4]), 0, 0],
-            [sp.sin(self.q[4]), sp.cos(self.q[4]), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]])
         # account for axes and rotation and offsets
         # no axes change, account for offsets
         self.Tj4l5b = sp.Matrix([
@@ -216,7 +180,6 @@ class Config(BaseConfig):
             [0, 1, 0, self.L[10, 1]],
             [0, 0, 1, self.L[10, 2]],
             [0, 0, 0, 1]])
-        self.Tj4l5 = self.Tj4l5a * self.Tj4l5b
 
         # Transform matrix : link 5 -> joint 5
         # account for axes change and offsets
@@ -227,65 +190,30 @@ class Config(BaseConfig):
             [0, 0, 0, 1]])
 
         # Transform matrix: joint 5 -> link 6
-        # account for rotations due to q
-        self.Tj5l6a = sp.Matrix([
-            [sp.cos(self.q[5]), -sp.sin(self.q[5]), 0, 0],
-            [sp.sin(self.q[5]), sp.cos(self.q[5]), 0, 0],
-            [0, 0, 1, 0],
-            [0, 0, 0, 1]])
         # no axes change, account for offsets
         self.Tj5l6b = sp.Matrix([
             [1, 0, 0, self.L[12, 0]],
             [0, 1, 0, self.L[12, 1]],
             [0, 0, 1, self.L[12, 2]],
             [0, 0, 0, 1]])
-        self.Tj5l6 = self.Tj5l6a * self.Tj5l6b
-
-        # orientation part of the Jacobian (compensating for angular velocity)
-        self.J_orientation = [
-            self._calc_T('joint0')[:3, :3] * self._KZ,  # joint 0 orientation
-            self._calc_T('joint1')[:3, :3] * self._KZ,  # joint 1 orientation
-            self._calc_T('joint2')[:3, :3] * self._KZ,  # joint 2 orientation
-            self._calc_T('joint3')[:3, :3] * self._KZ,  # joint 3 orientation
-            self._calc_T('joint4')[:3, :3] * self._KZ,  # joint 4 orientation
-            self._calc_T('joint5')[:3, :3] * self._KZ]  # joint 5 orientation
-
-    def _calc_T(self, name):  # noqa C907
-        """ Uses Sympy to generate the transform for a joint or link
-
-        name : string
-            name of the joint, link, or end-effector
-        """
-
-        if self._T.get(name, None) is None:
-            if name == 'link0':
-                self._T[name] = self.Torgl0
-            elif name == 'joint0':
-                self._T[name] = self._calc_T('link0') * self.Tl0j0
-            elif name == 'link1':
-                self._T[name] = self._calc_T('joint0') * self.Tj0l1
-            elif name == 'joint1':
-                self._T[name] = self._calc_T('link1') * self.Tl1j1
-            elif name == 'link2':
-                self._T[name] = self._calc_T('joint1') * self.Tj1l2
-            elif name == 'joint2':
-                self._T[name] = self._calc_T('link2') * self.Tl2j2
-            elif name == 'link3':
-                self._T[name] = self._calc_T('joint2') * self.Tj2l3
-            elif name == 'joint3':
-                self._T[name] = self._calc_T('link3') * self.Tl3j3
-            elif name == 'link4':
-                self._T[name] = self._calc_T('joint3') * self.Tj3l4
-            elif name == 'joint4':
-                self._T[name] = self._calc_T('link4') * self.Tl4j4
-            elif name == 'link5':
-                self._T[name] = self._calc_T('joint4') * self.Tj4l5
-            elif name == 'joint5':
-                self._T[name] = self._calc_T('link5') * self.Tl5j5
-            elif name == 'link6' or name == 'EE':
-                self._T[name] = self._calc_T('joint5') * self.Tj5l6
-
-            else:
-                raise Exception('Invalid transformation name: %s' % name)
-
-        return self._T[name]
+
+        # kinematic chain, transforms between each frame and the next,
+        # after rotating about z by the joint angle, see _calc_T
+        self._CHAIN = [
+            ('link0', None, self.Torgl0),
+            ('joint0', None, self.Tl0j0),
+            ('link1', 0, self.Tj0l1b),
+            ('joint1', None, self.Tl1j1),
+            ('link2', 1, self.Tj1l2b),
+            ('joint2', None, self.Tl2j2),
+            ('link3', 2, self.Tj2l3b),
+            ('joint3', None, self.Tl3j3),
+            ('link4', 3, self.Tj3l4b),
+            ('joint4', None, self.Tl4j4),
+            ('link5', 4, self.Tj4l5b),
+            ('joint5', None, self.Tl5j5),
+            ('link6', 5, self.Tj5l6b),
+            ('EE', None, sp.eye(4))]
+
+        # if required, check all generated functions are saved to file
+        self._check_cached()
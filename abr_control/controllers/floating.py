@@ -23,7 +23,12 @@ class Floating(controller.Controller):
         super(Floating, self).__init__(robot_config)
         self.dynamic = dynamic
 
-    def generate(self, q, dq=None):
+        # arrays written into when generate is called with out
+        self._M = np.zeros((robot_config.N_JOINTS, robot_config.N_JOINTS))
+        self._g = np.zeros(robot_config.N_JOINTS)
+        self._u = np.zeros(robot_config.N_JOINTS)
+
+    def generate(self, q, dq=None, out=None):
         """ Generates the control signal to compensate for gravity
 
         Parameters
@@ -32,8 +37,20 @@ class Floating(controller.Controller):
             the current joint angles [radians]
         dq : float numpy.array
             the current joint velocities [radians/second]
+        out : float numpy.array, optional (Default: None)
+            if provided, the control signal is written into out and out
+            is returned, without allocating any new arrays
         """
 
+        if out is not None:
+            # write every intermediate result into preallocated arrays
+            np.negative(self.robot_config.g(q, out=self._g), out=out)
+            if self.dynamic:
+                M = self.robot_config.M(q, out=self._M)
+                np.dot(M, dq, out=self._u)
+                out -= self._u
+            return out
+
         # calculate the effect of gravity in joint space
         g = self.robot_config.g(q)
         u = -g
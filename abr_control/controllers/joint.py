@@ -27,7 +27,14 @@ class Joint(controller.Controller):
         self.ZEROS_N_JOINTS = np.zeros(robot_config.N_JOINTS)
         self.q_tilde = np.copy(self.ZEROS_N_JOINTS)
 
-    def generate(self, q, dq, target_pos, target_vel=None):
+        # arrays written into when generate is called with out
+        self._M = np.zeros((robot_config.N_JOINTS, robot_config.N_JOINTS))
+        self._g = np.copy(self.ZEROS_N_JOINTS)
+        self._dq_tilde = np.copy(self.ZEROS_N_JOINTS)
+        self._error = np.copy(self.ZEROS_N_JOINTS)
+        self._u = np.copy(self.ZEROS_N_JOINTS)
+
+    def generate(self, q, dq, target_pos, target_vel=None, out=None):
         """Generate a joint space control signal
 
         Parameters
@@ -40,11 +47,17 @@ class Joint(controller.Controller):
             desired joint angles [radians]
         target_vel : float numpy.array, optional (Default: None)
             desired joint velocities [radians/sec]
+        out : float numpy.array, optional (Default: None)
+            if provided, the control signal is written into out and out
+            is returned, without allocating any new arrays
         """
 
         if target_vel is None:
             target_vel = self.ZEROS_N_JOINTS
 
+        if out is not None:
+            return self._generate_in_place(q, dq, target_pos, target_vel, out)
+
         # calculate the direction for each joint to move, wrapping
         # around the -pi to pi limits to find the shortest distance
         self.q_tilde = ((target_pos - q + np.pi) % (np.pi * 2)) - np.pi
@@ -57,3 +70,41 @@ class Joint(controller.Controller):
         u -= self.robot_config.g(q)
 
         return u
+
+    def _generate_in_place(self, q, dq, target_pos, target_vel, out):
+        """ Generates the control signal, writing every intermediate
+        result into preallocated arrays
+
+        Parameters
+        ----------
+        q : float numpy.array
+            current joint angles [radians]
+        dq : float numpy.array
+            current joint velocities [radians/second]
+        target_pos : float numpy.array
+            desired joint angles [radians]
+        target_vel : float numpy.array
+            desired joint velocities [radians/sec]
+        out : float numpy.array
+            the array to write the control signal into
+        """
+
+        # calculate the direction for each joint to move, wrapping
+        # around the -pi to pi limits to find the shortest distance
+        np.subtract(target_pos, q, out=self.q_tilde)
+        self.q_tilde += np.pi
+        np.mod(self.q_tilde, np.pi * 2, out=self.q_tilde)
+        self.q_tilde -= np.pi
+
+        np.subtract(target_vel, dq, out=self._dq_tilde)
+        self._dq_tilde *= self.kv
+        np.multiply(self.q_tilde, self.kp, out=self._error)
+        self._error += self._dq_tilde
+
+        # get the joint space inertia matrix
+        M = self.robot_config.M(q, out=self._M)
+        np.dot(M, self._error, out=self._u)
+        # account for gravity
+        np.subtract(self._u, self.robot_config.g(q, out=self._g), out=out)
+
+        return out
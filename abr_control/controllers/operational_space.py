@@ -0,0 +1,123 @@
+""" Operational space calculations shared by the controllers and signals
+
+The joint space inertia matrix is factored once with a Cholesky
+decomposition, M = L L^T, and the task space inertia matrix
+
+    Mx = (J M^-1 J^T)^-1
+
+and dynamically consistent generalized inverse of the Jacobian
+
+    Jbar = M^-1 J^T Mx
+
+calculated from it with triangular solves rather than inverting M.
+Mx is inverted with a Cholesky decomposition too, and with a damped SVD
+only when J M^-1 J^T is close to singular. The null space filter
+(I - J^T Jbar^T) is applied as products, without forming the
+N_JOINTS x N_JOINTS matrix.
+
+The LAPACK routines are called directly, as the scipy.linalg wrappers
+take longer than the decompositions of these small matrices.
+"""
+import numpy as np
+from scipy.linalg.lapack import dpotrf, dpotrs, dtrtrs
+
+
+def cholesky(M):
+    """ Returns the lower triangular Cholesky factor of M
+
+    Returns None if M is not positive definite.
+
+    Parameters
+    ----------
+    M : float numpy.array
+        the joint space inertia matrix
+    """
+
+    L, info = dpotrf(M, lower=1, clean=1)
+    if info != 0:
+        return None
+    return L
+
+
+def task_space_inertia(M, J, L=None, rcond=.005):
+    """ Returns the task space inertia matrix Mx, and M^-1 J^T
+
+    M^-1 J^T is returned for calculating the generalized inverse of the
+    Jacobian, Jbar = M^-1 J^T Mx, or filtering through null_space.
+
+    If the ratio of the smallest and largest singular values of
+    J M^-1 J^T is below rcond, Mx is calculated with a damped SVD,
+    reducing the gain along the directions with singular values below
+    the threshold smoothly to 0, rather than letting it grow unbounded.
+
+    Parameters
+    ----------
+    M : float numpy.array
+        the joint space inertia matrix
+    J : float numpy.array
+        the Jacobian of the point being controlled
+    L : float numpy.array, optional (Default: None)
+        the Cholesky factor of M, for sharing it between calls with the
+        same M. If None it is calculated
+    rcond : float, optional (Default: 0.005)
+        the ratio of singular values below which J M^-1 J^T is treated
+        as singular, also used to set the damping
+    """
+
+    if L is None:
+        L = cholesky(M)
+
+    if L is None:
+        # M isn't positive definite, fall back to the pseudo-inverse
+        M_inv_JT = np.dot(np.linalg.pinv(M), J.T)
+        Mx_inv = np.dot(J, M_inv_JT)
+    else:
+        # A = L^-1 J^T, so that J M^-1 J^T = A^T A
+        A = dtrtrs(L, J.T, lower=1)[0]
+        Mx_inv = np.dot(A.T, A)
+        # M^-1 J^T = L^-T A
+        M_inv_JT = dtrtrs(L, A, lower=1, trans=1)[0]
+
+    # J M^-1 J^T is symmetric positive semi-definite, so its singular
+    # values are its eigenvalues, in ascending order
+    eigenvalues = np.linalg.eigvalsh(Mx_inv)
+    well_conditioned = eigenvalues[0] > rcond * eigenvalues[-1]
+    if well_conditioned:
+        Lx, info = dpotrf(Mx_inv, lower=1, clean=1)
+        well_conditioned = info == 0
+    if well_conditioned:
+        Mx = dpotrs(Lx, np.eye(Mx_inv.shape[0]), lower=1)[0]
+    else:
+        # damped least squares inverse, only damping the singular values
+        # below the threshold, so the rest are inverted exactly, and with
+        # the damping growing as they get smaller so the gain goes
+        # smoothly to 0 at the singularity
+        U, s, _ = np.linalg.svd(Mx_inv, hermitian=True)
+        threshold = rcond * s[0]
+        damping = np.where(s < threshold, threshold ** 2 - s ** 2, 0)
+        s_inv = np.divide(s, s ** 2 + damping, out=np.zeros_like(s),
+                          where=s > 0)
+        Mx = np.dot(U * s_inv, U.T)
+
+    return Mx, M_inv_JT
+
+
+def null_space(u_null, J, Mx, M_inv_JT):
+    """ Returns u_null filtered into the null space of the task
+
+    Calculates (I - J^T Jbar^T) u_null, as
+    u_null - J^T (Mx (M^-1 J^T)^T u_null).
+
+    Parameters
+    ----------
+    u_null : float numpy.array
+        the joint space control signal to filter
+    J : float numpy.array
+        the Jacobian of the point being controlled
+    Mx : float numpy.array
+        the task space inertia matrix, from task_space_inertia
+    M_inv_JT : float numpy.array
+        M^-1 J^T, from task_space_inertia
+    """
+
+    return u_null - np.dot(J.T, np.dot(Mx, np.dot(M_inv_JT.T, u_null)))
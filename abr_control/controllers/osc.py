@@ -1,6 +1,7 @@
 import numpy as np
 
 from . import controller
+from . import operational_space
 
 
 class OSC(controller.Controller):
@@ -41,6 +42,10 @@ class OSC(controller.Controller):
         derivative gain term for null controller
     integrated_error : float list, optional (Default: None)
         task-space integrated error term
+    training_signal : float numpy.array
+        the control signal of the last call to generate, without gravity
+        compensation, for training dynamics adaptation. Written into in
+        place each call
     """
     def __init__(self, robot_config, kp=1, kv=None, ki=0, vmax=0.5,
                  null_control=True, use_g=True, use_C=False, use_dJ=False):
@@ -56,20 +61,46 @@ class OSC(controller.Controller):
         self.use_g = use_g
         self.use_C = use_C
         self.use_dJ = use_dJ
+        # the quantities calculated together from the robot config each call
+        self.want = ['Tx', 'J', 'M']
+        if self.use_dJ:
+            self.want.append('dJ_dq')
+        if self.use_g:
+            self.want.append('g')
+        if self.use_C:
+            self.want.append('C_dq')
 
         self.integrated_error = np.array([0.0, 0.0, 0.0])
 
         # null_indices is a mask for identifying which joints have REST_ANGLES
         self.null_indices = ~np.isnan(self.robot_config.REST_ANGLES)
         self.dq_des = np.zeros(self.robot_config.N_JOINTS)
-        self.IDENTITY_N_JOINTS = np.eye(self.robot_config.N_JOINTS)
         # null space filter gains
         self.nkp = self.kp * .1
         self.nkv = np.sqrt(self.nkp)
 
+        N_JOINTS = self.robot_config.N_JOINTS
+        self.training_signal = np.zeros(N_JOINTS)
+        # arrays written into each call
+        self._u_task = np.zeros(3)
+        self._x_tilde = np.zeros(3)
+        self._sat = np.zeros(3)
+        self._scale = np.ones(3)
+        self._dx = np.zeros(3)
+        self._force = np.zeros(3)
+        self._u_joint = np.zeros(N_JOINTS)
+        self._u_null = np.zeros(N_JOINTS)
+        # the terms from the robot config when generate is called with out
+        self._Tx = np.zeros(3)
+        self._J = np.zeros((3, N_JOINTS))
+        self._M = np.zeros((N_JOINTS, N_JOINTS))
+        self._g = np.zeros(N_JOINTS)
+        self._dJ_dq = np.zeros(3)
+        self._C_dq = np.zeros(N_JOINTS)
+
     def generate(self, q, dq,
                  target_pos, target_vel=0,
-                 ref_frame='EE', offset=[0, 0, 0]):
+                 ref_frame='EE', offset=[0, 0, 0], out=None):
         """ Generates the control signal to move the EE to a target
 
         Parameters
@@ -86,96 +117,114 @@ class OSC(controller.Controller):
             the point being controlled, default is the end-effector.
         offset : list, optional (Default: [0, 0, 0])
             point of interest inside the frame of reference [meters]
+        out : float numpy.array, optional (Default: None)
+            if provided, the control signal is written into out and out
+            is returned, with the terms from the robot config also
+            written into arrays owned by the controller. Unlike Joint
+            and Floating, the task space inertia matrix and the null
+            space filtered signal are still allocated every call
         """
 
+        if out is None:
+            out = np.zeros(self.robot_config.N_JOINTS)
+            # calculate all of the kinematic and dynamic terms in one call,
+            # sharing the trig and transform calculations between them,
+            # and only the position rows of the Jacobian terms
+            dynamics = self.robot_config.dynamics(
+                q, dq, name=ref_frame, x=offset, want=self.want, rows='xyz')
+        else:
+            dynamics = self._dynamics_in_place(q, dq, ref_frame, offset)
+
         # calculate the end-effector position information
-        xyz = self.robot_config.Tx(ref_frame, q, x=offset)
+        xyz = dynamics['Tx']
 
-        # calculate the Jacobian for the end effector
-        J = self.robot_config.J(ref_frame, q, x=offset)
-        # isolate position component of Jacobian
-        J = J[:3]
+        # calculate the position Jacobian for the end effector
+        J = dynamics['J']
 
         # calculate the inertia matrix in joint space
-        M = self.robot_config.M(q)
-
-        # calculate the inertia matrix in task space
-        M_inv = np.linalg.inv(M)
-        # calculate the Jacobian for end-effector with no offset
-        Mx_inv = np.dot(J, np.dot(M_inv, J.T))
-        if np.linalg.det(Mx_inv) != 0:
-            # do the linalg inverse if matrix is non-singular
-            # because it's faster and more accurate
-            Mx = np.linalg.inv(Mx_inv)
-        else:
-            # using the rcond to set singular values < thresh to 0
-            # singular values < (rcond * max(singular_values)) set to 0
-            Mx = np.linalg.pinv(Mx_inv, rcond=.005)
+        M = dynamics['M']
+
+        # calculate the inertia matrix in task space, factoring M once
+        Mx, M_inv_JT = operational_space.task_space_inertia(M, J)
 
-        u_task = np.zeros(3)  # task space control signal
+        u_task = self._u_task  # task space control signal
 
         # calculate the position error
-        x_tilde = np.array(xyz - target_pos)
+        x_tilde = self._x_tilde
+        np.subtract(xyz, target_pos, out=x_tilde)
 
         if self.vmax is not None:
             # implement velocity limiting
-            sat = self.vmax / (self.lamb * np.abs(x_tilde))
+            sat = self._sat
+            np.abs(x_tilde, out=sat)
+            sat *= self.lamb
+            np.divide(self.vmax, sat, out=sat)
+            scale = self._scale
+            scale.fill(1)
             if np.any(sat < 1):
                 index = np.argmin(sat)
                 unclipped = self.kp * x_tilde[index]
                 clipped = self.kv * self.vmax * np.sign(x_tilde[index])
-                scale = np.ones(3, dtype='float32') * clipped / unclipped
+                scale.fill(clipped / unclipped)
                 scale[index] = 1
-            else:
-                scale = np.ones(3, dtype='float32')
 
-            dx = np.dot(J, dq)
-            u_task[:3] = -self.kv * (dx - target_vel -
-                                     np.clip(sat / scale, 0, 1) *
-                                     -self.lamb * scale * x_tilde)
+            # u_task = -kv * (dx - target_vel - clip(sat / scale, 0, 1) *
+            #                 -lamb * scale * x_tilde)
+            np.divide(sat, scale, out=sat)
+            np.clip(sat, 0, 1, out=sat)
+            sat *= scale
+            sat *= x_tilde
+            sat *= self.lamb
+            np.matmul(J, dq, out=self._dx)
+            np.subtract(self._dx, target_vel, out=u_task)
+            u_task += sat
+            u_task *= -self.kv
             # low level signal set to zero
-            u = 0.0
+            out.fill(0)
         else:
             # generate (x,y,z) force without velocity limiting)
-            u_task = -self.kp * x_tilde
+            np.multiply(x_tilde, -self.kp, out=u_task)
             if np.all(target_vel == 0):
                 # if the target velocity is zero, it's more accurate to
                 # apply velocity compensation in joint space
-                u = -self.kv * np.dot(M, dq)
+                np.matmul(M, dq, out=out)
+                out *= -self.kv
             else:
-                dx = np.dot(J, dq)
+                np.matmul(J, dq, out=self._dx)
                 # high level signal includes velocity compensation
-                u_task -= self.kv * (dx - target_vel)
-                u = 0.0
+                self._dx -= target_vel
+                self._dx *= self.kv
+                u_task -= self._dx
+                out.fill(0)
 
         if self.use_dJ:
-            # add in estimate of current acceleration
-            dJ = self.robot_config.dJ(ref_frame, q=q, dq=dq)
-            # apply mask
-            dJ = dJ[:3]
-            u_task += np.dot(dJ, dq)
+            # add in estimate of current acceleration, np.dot(dJ, dq)
+            u_task += dynamics['dJ_dq']
 
         if self.ki != 0:
             # add in the integrated error term
             self.integrated_error += x_tilde
-            u_task -= self.ki * self.integrated_error
+            np.multiply(self.integrated_error, self.ki, out=self._dx)
+            u_task -= self._dx
 
         # incorporate task space inertia matrix
-        u += np.dot(J.T, np.dot(Mx, u_task))
+        np.matmul(Mx, u_task, out=self._force)
+        np.matmul(J.T, self._force, out=self._u_joint)
+        out += self._u_joint
 
         if self.use_C:
             # add in estimation of full centrifugal and Coriolis effects
-            u -= np.dot(self.robot_config.C(q=q, dq=dq), dq)
+            out -= dynamics['C_dq']
 
         # store the current control signal u for training in case
         # dynamics adaptation signal is being used
         # NOTE: training signal should not include gravity compensation
-        self.training_signal = np.copy(u)
+        np.copyto(self.training_signal, out)
 
         # cancel out effects of gravity
         if self.use_g:
             # add in gravity term in joint space
-            u -= self.robot_config.g(q=q)
+            out -= dynamics['g']
 
             # add in gravity term in task space
             # Jbar = np.dot(M_inv, np.dot(J.T, Mx))
@@ -194,9 +243,41 @@ class OSC(controller.Controller):
             # self.prev_q = np.copy(q)
             #
             # u_null = np.dot(M, (self.nkp * q_des - self.nkv * self.dq_des))
-            Jbar = np.dot(M_inv, np.dot(J.T, Mx))
-            u_null = np.dot(M, -10.0*dq)
-            null_filter = (self.IDENTITY_N_JOINTS - np.dot(J.T, Jbar.T))
-            u += np.dot(null_filter, u_null)
+            np.matmul(M, dq, out=self._u_null)
+            self._u_null *= -10.0
+            # apply the null space filter (I - J^T Jbar^T) as products
+            out += operational_space.null_space(
+                self._u_null, J, Mx, M_inv_JT)
 
-        return u
+        return out
+
+    def _dynamics_in_place(self, q, dq, ref_frame, offset):
+        """ Returns the terms generate needs from the robot config,
+        written into arrays owned by the controller
+
+        Parameters
+        ----------
+        q : float numpy.array
+            current joint angles [radians]
+        dq : float numpy.array
+            current joint velocities [radians/second]
+        ref_frame : string
+            the point being controlled
+        offset : list
+            point of interest inside the frame of reference [meters]
+        """
+
+        robot_config = self.robot_config
+        dynamics = {
+            'Tx': robot_config.Tx(ref_frame, q, x=offset, out=self._Tx),
+            'J': robot_config.J(ref_frame, q, x=offset, rows='xyz',
+                                out=self._J),
+            'M': robot_config.M(q, out=self._M)}
+        if self.use_dJ:
+            dynamics['dJ_dq'] = robot_config.dJ_dq(
+                ref_frame, q, dq, x=offset, rows='xyz', out=self._dJ_dq)
+        if self.use_g:
+            dynamics['g'] = robot_config.g(q, out=self._g)
+        if self.use_C:
+            dynamics['C_dq'] = robot_config.C_dq(q, dq, out=self._C_dq)
+        return dynamics
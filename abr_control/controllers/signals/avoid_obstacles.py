@@ -1,6 +1,7 @@
 import numpy as np
 
 from .signal import Signal
+from .. import operational_space
 
 
 class AvoidObstacles(Signal):
@@ -23,6 +24,8 @@ class AvoidObstacles(Signal):
 
         self.robot_config = robot_config
         self.threshold = threshold
+        # the rows of Tx_all for each joint and the end-effector
+        self.joint_frames = self.robot_config.joint_frames
         self.obstacles = np.copy(obstacles)
 
     def generate(self, q):  # noqa901
@@ -36,8 +39,15 @@ class AvoidObstacles(Signal):
 
         u_psp = np.zeros(self.robot_config.N_JOINTS, dtype='float32')
 
-        # calculate the inertia matrix in joint space
-        M = self.robot_config.M(q)
+        # the joint space inertia matrix and its Cholesky factor,
+        # calculated the first time they're needed and shared by all
+        # obstacles and segments
+        M = None
+        L = None
+
+        # the start and end-points of each arm segment, shared by all
+        # obstacles
+        points = self.robot_config.Tx_all(q)[self.joint_frames]
 
         # add in obstacle avoidance
         for obstacle in self.obstacles:
@@ -47,11 +57,8 @@ class AvoidObstacles(Signal):
             # find the closest point of each link to the obstacle
             for ii in range(self.robot_config.N_JOINTS):
                 # get the start and end-points of the arm segment
-                p1 = self.robot_config.Tx('joint%i' % ii, q=q)
-                if ii == self.robot_config.N_JOINTS - 1:
-                    p2 = self.robot_config.Tx('EE', q=q)
-                else:
-                    p2 = self.robot_config.Tx('joint%i' % (ii + 1), q=q)
+                p1 = points[ii]
+                p2 = points[ii + 1]
 
                 # calculate minimum distance from arm segment to obstacle
                 # the vector of our line
@@ -89,14 +96,17 @@ class AvoidObstacles(Signal):
                     T_inv = self.robot_config.T_inv('link%i' % (ii+1), q=q)
                     m = np.dot(T_inv, np.hstack([closest, [1]]))[:-1]
                     # calculate the Jacobian for this point
-                    Jpsp = self.robot_config.J('link%i' % (ii+1), x=m, q=q)[:3]
+                    Jpsp = self.robot_config.J(
+                        'link%i' % (ii+1), x=m, q=q, rows='xyz')
 
+                    if M is None:
+                        # calculate the inertia matrix in joint space
+                        M = self.robot_config.M(q)
+                        L = operational_space.cholesky(M)
                     # calculate the inertia matrix for the
                     # point subjected to the potential space
-                    Mxpsp_inv = np.dot(Jpsp, np.dot(np.linalg.inv(M), Jpsp.T))
-                    # using the rcond to set singular values < thresh to 0
-                    # is slightly faster than doing it manually with svd
-                    Mxpsp = np.linalg.pinv(Mxpsp_inv, rcond=.01)
+                    Mxpsp = operational_space.task_space_inertia(
+                        M, Jpsp, L=L, rcond=.01)[0]
 
                     u_psp += -np.dot(Jpsp.T, np.dot(Mxpsp, Fpsp))
 
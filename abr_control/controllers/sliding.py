@@ -20,6 +20,11 @@ class Sliding(controller.Controller):
         if True transforms control from Cartesian into joint space
         if False control assumed to be entirely in joint space
 
+    Attributes
+    ----------
+    s : float numpy.array
+        the sliding surface of the last call to generate, for training
+        dynamics adaptation. Written into in place each call
     """
     def __init__(self, robot_config,
                  kd=160.0, lamb=30.0,
@@ -31,9 +36,27 @@ class Sliding(controller.Controller):
         self.lamb = lamb
         self.cartesian = cartesian
 
+        N_JOINTS = self.robot_config.N_JOINTS
+        n_task = 3 if self.cartesian else N_JOINTS
+        self.s = np.zeros(N_JOINTS)
+        # arrays written into each call
+        self._zeros = np.zeros(n_task)
+        self._task = np.zeros(n_task)
+        self._dxyz = np.zeros(3)
+        self._dq_ref = np.zeros(N_JOINTS)
+        self._ddq_ref = np.zeros(N_JOINTS)
+        self._u_joint = np.zeros(N_JOINTS)
+        # the terms from the robot config when generate is called with out
+        self._Tx = np.zeros(3)
+        self._J = np.zeros((3, N_JOINTS))
+        self._dJ = np.zeros((3, N_JOINTS))
+        self._M = np.zeros((N_JOINTS, N_JOINTS))
+        self._g = np.zeros(N_JOINTS)
+        self._C_dq_ref = np.zeros(N_JOINTS)
+
     def generate(self, q, dq,
                  target_pos, target_vel=None, target_acc=None,
-                 ref_frame='EE', offset=[0, 0, 0]):
+                 ref_frame='EE', offset=[0, 0, 0], out=None):
         """ Generates the control signal to move the EE to a target
 
         Parameters
@@ -50,52 +73,114 @@ class Sliding(controller.Controller):
             the point being controlled, default is the end-effector.
         offset : list, optional (Default: [0, 0, 0])
             point of interest inside the frame of reference [meters]
+        out : float numpy.array, optional (Default: None)
+            if provided, the control signal is written into out and out
+            is returned, with the terms from the robot config also
+            written into arrays owned by the controller. Unlike Joint
+            and Floating, the pseudo-inverse of the Jacobian is still
+            allocated every call
         """
-        if self.cartesian:
-            if target_vel is None:
-                target_vel = np.zeros(3)
-            if target_acc is None:
-                target_acc = np.zeros(3)
 
+        if target_vel is None:
+            target_vel = self._zeros
+        if target_acc is None:
+            target_acc = self._zeros
+
+        if out is None:
+            out = np.zeros(self.robot_config.N_JOINTS)
+            # calculate all of the kinematic and dynamic terms in one call,
+            # sharing the trig and transform calculations between them
+            if self.cartesian:
+                dynamics = self.robot_config.dynamics(
+                    q, dq, name=ref_frame, x=offset,
+                    want=('Tx', 'J', 'dJ', 'M', 'g'), rows='xyz')
+            else:
+                dynamics = self.robot_config.dynamics(
+                    q, dq, want=('M', 'g'))
+            C_out = None
+        else:
+            dynamics = self._dynamics_in_place(q, dq, ref_frame, offset)
+            C_out = self._C_dq_ref
+
+        dq_ref = self._dq_ref
+        ddq_ref = self._ddq_ref
+        task = self._task
+        if self.cartesian:
             # calculate the position Jacobian for the end effector
-            J = self.robot_config.J(ref_frame, q, x=offset)[:3]
+            J = dynamics['J']
 
             # calculate the end-effector position information
-            xyz = self.robot_config.Tx(ref_frame, q, x=offset)
-            dxyz = np.dot(J, dq)
+            xyz = dynamics['Tx']
+            dxyz = np.matmul(J, dq, out=self._dxyz)
 
             J_inv = np.linalg.pinv(J)
-            dJ = self.robot_config.dJ(ref_frame, q, dq, x=offset)[:3]
-
-            dq_ref = np.dot(
-                J_inv,
-                target_vel + self.lamb * (target_pos - xyz))
-            ddq_ref = np.dot(
-                J_inv,
-                target_acc + self.lamb * (target_vel - dxyz) -
-                np.dot(dJ, dq_ref))
+            dJ = dynamics['dJ']
+
+            # dq_ref = J_inv (target_vel + lamb (target_pos - xyz))
+            np.subtract(target_pos, xyz, out=task)
+            task *= self.lamb
+            task += target_vel
+            np.matmul(J_inv, task, out=dq_ref)
+            # ddq_ref = J_inv (target_acc + lamb (target_vel - dxyz) -
+            #                  dJ dq_ref)
+            np.subtract(target_vel, dxyz, out=task)
+            task *= self.lamb
+            task += target_acc
+            task -= np.matmul(dJ, dq_ref, out=self._dxyz)
+            np.matmul(J_inv, task, out=ddq_ref)
         else:
-            if target_vel is None:
-                target_vel = np.zeros(self.robot_config.N_JOINTS)
-            if target_acc is None:
-                target_acc = np.zeros(self.robot_config.N_JOINTS)
-
-            q_tilde = q - target_pos
-            dq_tilde = dq - target_vel
-            dq_ref = target_vel - self.lamb * q_tilde
-            ddq_ref = target_acc - self.lamb * dq_tilde
+            # dq_ref = target_vel - lamb (q - target_pos)
+            np.subtract(q, target_pos, out=task)
+            task *= -self.lamb
+            np.add(target_vel, task, out=dq_ref)
+            # ddq_ref = target_acc - lamb (dq - target_vel)
+            np.subtract(dq, target_vel, out=task)
+            task *= -self.lamb
+            np.add(target_acc, task, out=ddq_ref)
 
         # store the control signal s for training in case
         # dynamics adaptation signal is being used
-        self.s = dq - dq_ref
+        np.subtract(dq, dq_ref, out=self.s)
 
         # calculate the inertia matrix in joint space
-        M = self.robot_config.M(q)
-        # calculate the partial centrifugal and Coriolis effects
-        C = self.robot_config.C(q=q, dq=dq)
+        M = dynamics['M']
+        # calculate the centrifugal and Coriolis effects, np.dot(C, dq_ref)
+        C_dq_ref = self.robot_config.C_v(q, dq, dq_ref, out=C_out)
         # calculate the effects of gravity
-        g = self.robot_config.g(q=q)
+        g = dynamics['g']
+
+        # u = np.dot(M, ddq_ref) + C_dq_ref + g - kd * s
+        np.multiply(self.s, -self.kd, out=out)
+        out += np.matmul(M, ddq_ref, out=self._u_joint)
+        out += C_dq_ref
+        out += g
 
-        u = np.dot(M, ddq_ref) + np.dot(C, dq_ref) + g - self.kd * self.s
+        return out
 
-        return u
+    def _dynamics_in_place(self, q, dq, ref_frame, offset):
+        """ Returns the terms generate needs from the robot config,
+        written into arrays owned by the controller
+
+        Parameters
+        ----------
+        q : float numpy.array
+            current joint angles [radians]
+        dq : float numpy.array
+            current joint velocities [radians/second]
+        ref_frame : string
+            the point being controlled
+        offset : list
+            point of interest inside the frame of reference [meters]
+        """
+
+        robot_config = self.robot_config
+        dynamics = {'M': robot_config.M(q, out=self._M),
+                    'g': robot_config.g(q, out=self._g)}
+        if self.cartesian:
+            dynamics['Tx'] = robot_config.Tx(
+                ref_frame, q, x=offset, out=self._Tx)
+            dynamics['J'] = robot_config.J(
+                ref_frame, q, x=offset, rows='xyz', out=self._J)
+            dynamics['dJ'] = robot_config.dJ(
+                ref_frame, q, dq, x=offset, rows='xyz', out=self._dJ)
+        return dynamics
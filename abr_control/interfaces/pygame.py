@@ -31,6 +31,8 @@ class PyGame():
                  line_width=15):
         self.robot_config = robot_config
         self.arm_sim = arm_sim
+        # the rows of Tx_all for each joint and the end-effector
+        self.joint_frames = self.robot_config.joint_frames
 
         # set up size of pygame window
         self.width = 642
@@ -185,16 +187,16 @@ class PyGame():
 
         self.display.fill(self.white)
 
+        # get (x,y) positions of the joints and end-effector relative to
+        # joint 0, with joint 0 repeated for the origin -> joint 0 offset
+        xyz = self.robot_config.Tx_all(q)[[self.joint_frames[0]] +
+                                          self.joint_frames]
+        xyz = (xyz - xyz[0]) * self.scaling_term
+        points = np.array(self.base_offset + np.vstack(
+            [xyz[:, 0], -xyz[:, 1]]).T, dtype='int')
+
         # need to pad q with a 0 for the origin -> joint 0 offset
         q = [0] + list(q)
-        # get (x,y) positions of the joints
-        joints_x = np.array(np.cumsum([0] + [
-            int(self.L[ii] * np.cos(np.sum(q[:ii+1])))
-            for ii in range(len(self.L))])) + self.base_offset[0]
-        joints_y = np.array(np.cumsum([0] + [
-            int(-self.L[ii] * np.sin(np.sum(q[:ii+1])))
-            for ii in range(len(self.L))])) + self.base_offset[1]
-        points = np.vstack([joints_x, joints_y]).T
 
         self.lines = []
         self.rects = []
@@ -0,0 +1,306 @@
+"""
+Lists and cleans up the cache of generated functions and saved weights.
+
+Every change to the symbolic model of a config saves its functions to a
+new folder, cache_dir/<ROBOT_NAME>/saved_functions/<config_hash>, and
+every run of DynamicsAdaptation.save_weights adds another file to
+cache_dir/saved_weights, so the cache only grows. Each config folder,
+and each file of saved weights, is an entry of the cache. Configs record
+when they last loaded a function from their folder, and entries are
+evicted least recently used first until the cache fits a size budget.
+
+Saved weights are only evicted when asked for, as they can't be
+generated again. Their last use is when they were saved.
+
+Example usage:
+
+    python -m abr_control.manage_cache list
+    python -m abr_control.manage_cache evict --max-size 2G --dry-run
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import time
+
+import abr_control.utils.os_utils
+import abr_control.utils.paths
+
+
+# the file in a config folder whose modification time is its last use
+LAST_USED = '.last_used'
+SIZE_UNITS = {'': 1, 'K': 2 ** 10, 'M': 2 ** 20, 'G': 2 ** 30, 'T': 2 ** 40}
+
+
+def record_use(config_folder):
+    """ Records that a function was loaded from a config folder
+
+    Parameters
+    ----------
+    config_folder : string
+        the folder the functions of a config are saved to
+    """
+
+    path = os.path.join(config_folder, LAST_USED)
+    try:
+        with open(path, 'a'):
+            os.utime(path)
+    except OSError:
+        # a read-only cache can still be loaded from
+        pass
+
+
+def folder_size(folder):
+    """ Returns the total size of the files in a folder, in bytes
+
+    Parameters
+    ----------
+    folder : string
+        the folder to measure
+    """
+
+    size = 0
+    for root, _, filenames in os.walk(folder):
+        for filename in filenames:
+            try:
+                size += os.lstat(os.path.join(root, filename)).st_size
+            except OSError:
+                # removed since it was listed
+                pass
+    return size
+
+
+def last_used(config_folder):
+    """ Returns the time a config folder was last used, in seconds since
+    the epoch
+
+    The time recorded by record_use, or for folders saved before uses
+    were recorded, the time of the last file saved to it.
+
+    Parameters
+    ----------
+    config_folder : string
+        the folder the functions of a config are saved to
+    """
+
+    path = os.path.join(config_folder, LAST_USED)
+    if os.path.isfile(path):
+        return os.path.getmtime(path)
+    latest = os.path.getmtime(config_folder)
+    for root, _, filenames in os.walk(config_folder):
+        for filename in filenames:
+            try:
+                latest = max(latest, os.path.getmtime(
+                    os.path.join(root, filename)))
+            except OSError:
+                pass
+    return latest
+
+
+def entries(folder=None, weights=True):
+    """ Returns the entries of the cache, least recently used first
+
+    Each entry is a (path, kind, size, last_used) tuple, where kind is
+    'functions' for a config folder or 'weights' for a file of saved
+    weights, size is in bytes, and last_used is in seconds since the
+    epoch.
+
+    Parameters
+    ----------
+    folder : string, optional (Default: None)
+        the cache folder, if None uses cache_dir
+    weights : boolean, optional (Default: True)
+        if True, the files of saved weights are included
+    """
+
+    if folder is None:
+        folder = abr_control.utils.paths.cache_dir
+    if not os.path.isdir(folder):
+        return []
+
+    found = []
+    for robot_name in sorted(os.listdir(folder)):
+        functions_folder = os.path.join(folder, robot_name, 'saved_functions')
+        if not os.path.isdir(functions_folder):
+            continue
+        for config_hash in sorted(os.listdir(functions_folder)):
+            path = os.path.join(functions_folder, config_hash)
+            if os.path.isdir(path):
+                found.append((path, 'functions', folder_size(path),
+                              last_used(path)))
+
+    weights_folder = os.path.join(folder, 'saved_weights')
+    if weights and os.path.isdir(weights_folder):
+        for root, _, filenames in os.walk(weights_folder):
+            for filename in sorted(filenames):
+                path = os.path.join(root, filename)
+                stat = os.stat(path)
+                found.append((path, 'weights', stat.st_size, stat.st_mtime))
+
+    return sorted(found, key=lambda entry: entry[3])
+
+
+def evict(max_size, folder=None, weights=False, dry_run=False):
+    """ Removes the least recently used entries until the cache fits in
+    max_size
+
+    Returns the entries removed, as (path, kind, size, last_used) tuples.
+    Config folders with a function locked by another process are
+    skipped, and the locks of their functions held while removing them.
+
+    Parameters
+    ----------
+    max_size : int
+        the size to fit the cache in [bytes]
+    folder : string, optional (Default: None)
+        the cache folder, if None uses cache_dir
+    weights : boolean, optional (Default: False)
+        if True, files of saved weights can also be removed. Either way
+        their size counts towards the cache
+    dry_run : boolean, optional (Default: False)
+        if True, returns the entries that would be removed without
+        removing them
+    """
+
+    cached = entries(folder=folder)
+    size = sum(entry[2] for entry in cached)
+    removed = []
+    for entry in cached:
+        if size <= max_size:
+            break
+        path, kind, entry_size, _ = entry
+        if kind == 'weights' and not weights:
+            continue
+        if kind == 'functions':
+            with contextlib.ExitStack() as locks:
+                try:
+                    for lock in function_locks(path):
+                        locks.enter_context(
+                            abr_control.utils.os_utils.file_lock(
+                                lock, blocking=False))
+                except OSError:
+                    # a function is being loaded or generated by another
+                    # process, or the folder can't be written to
+                    continue
+                if not dry_run:
+                    shutil.rmtree(path, ignore_errors=True)
+        elif not dry_run:
+            os.remove(path)
+        size -= entry_size
+        removed.append(entry)
+    return removed
+
+
+def function_locks(config_folder):
+    """ Returns the lock files of the functions in a config folder
+
+    Configs hold the lock of a function while loading or generating it,
+    see BaseConfig._cache_lock.
+
+    Parameters
+    ----------
+    config_folder : string
+        the folder the functions of a config are saved to
+    """
+
+    locks = [os.path.join(config_folder, name, '.lock')
+             for name in sorted(os.listdir(config_folder))]
+    return [lock for lock in locks if os.path.isfile(lock)]
+
+
+def parse_size(size):
+    """ Returns the number of bytes in a size such as 500M or 2G
+
+    Parameters
+    ----------
+    size : string
+        a number of bytes, optionally followed by K, M, G or T
+    """
+
+    size = size.strip().upper().rstrip('B')
+    unit = size[-1:] if size[-1:] in SIZE_UNITS else ''
+    try:
+        return int(float(size[:len(size) - len(unit)]) * SIZE_UNITS[unit])
+    except ValueError:
+        raise ValueError('Invalid size: %s' % size)
+
+
+def format_size(size):
+    """ Returns a size in bytes as a string such as 1.5M
+
+    Parameters
+    ----------
+    size : int
+        the number of bytes
+    """
+
+    for unit in ('', 'K', 'M', 'G'):
+        if size < 1024:
+            break
+        size /= 1024.
+    else:
+        unit = 'T'
+    return ('%i%s' if unit == '' else '%.1f%s') % (size, unit)
+
+
+def print_entries(cached, folder):
+    """ Prints a table of cache entries
+
+    Parameters
+    ----------
+    cached : list of tuples
+        the (path, kind, size, last_used) entries to print
+    folder : string
+        the cache folder, paths are printed relative to it
+    """
+
+    print('%10s  %-16s  %-9s  %s' % ('size', 'last used', 'kind', 'path'))
+    for path, kind, size, used in cached:
+        print('%10s  %-16s  %-9s  %s' % (
+            format_size(size),
+            time.strftime('%Y-%m-%d %H:%M', time.localtime(used)),
+            kind, os.path.relpath(path, folder)))
+    print('%10s  total' % format_size(sum(entry[2] for entry in cached)))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m abr_control.manage_cache',
+        description='List and clean up the cache of generated functions '
+        'and saved weights')
+    parser.add_argument(
+        '--folder', default=None,
+        help='the cache folder, defaults to %s' %
+        abr_control.utils.paths.cache_dir)
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+    subparsers.add_parser(
+        'list', help='list the entries, least recently used first')
+    evict_parser = subparsers.add_parser(
+        'evict', help='remove the least recently used entries until the '
+        'cache fits in a size')
+    evict_parser.add_argument(
+        '--max-size', required=True, type=parse_size,
+        help='the size to fit the cache in, e.g. 500M or 2G')
+    evict_parser.add_argument(
+        '--weights', action='store_true',
+        help='also remove saved weights, which can not be generated again')
+    evict_parser.add_argument(
+        '--dry-run', action='store_true',
+        help='only list the entries that would be removed')
+    args = parser.parse_args(args)
+
+    folder = args.folder or abr_control.utils.paths.cache_dir
+    if args.command == 'list':
+        print_entries(entries(folder=folder), folder)
+        return
+
+    removed = evict(args.max_size, folder=folder, weights=args.weights,
+                    dry_run=args.dry_run)
+    print('%s %i entries:' % (
+        'Would remove' if args.dry_run else 'Removed', len(removed)))
+    print_entries(removed, folder)
+
+
+if __name__ == '__main__':
+    main()
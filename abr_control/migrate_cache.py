@@ -0,0 +1,236 @@
+"""
+Adopts the functions saved by earlier versions of the library, which
+named the config folder by a hash of the config's source file, into the
+folder named by the hash of its symbolic model, so that they don't need
+to be generated again.
+
+Every other folder saved for the robot is a candidate, as the source
+file may have been edited since the functions were saved, or a folder
+can be given explicitly. A candidate is only adopted if the inertia
+matrix saved in it, or the position of the end-effector if it has no
+inertia matrix, matches the current model of the config, so folders
+saved for other models of the robot are left untouched. The functions
+in it were generated with an earlier calling convention, so only their
+saved expressions are kept, and the functions are generated again from
+them when first used.
+
+Example usage:
+
+    python -m abr_control.migrate_cache --arm jaco2 --hand-attached
+"""
+import argparse
+import importlib
+import os
+import shutil
+
+import cloudpickle
+import numpy as np
+import sympy as sp
+
+from abr_control.arms import base_config
+from abr_control.arms.numeric_dynamics import NumericDynamics
+
+
+def candidate_folders(robot_config):
+    """ Returns every folder saved for the robot but the config_folder,
+    most recently modified first
+
+    Parameters
+    ----------
+    robot_config : class instance
+        contains all relevant information about the arm
+        such as: number of joints, number of links, mass information etc.
+    """
+
+    functions_folder = os.path.join(
+        base_config.cache_dir, robot_config.ROBOT_NAME, 'saved_functions')
+    if not os.path.isdir(functions_folder):
+        return []
+    folders = [os.path.join(functions_folder, name)
+               for name in os.listdir(functions_folder)]
+    folders = [folder for folder in folders if os.path.isdir(folder) and
+               os.path.abspath(folder) !=
+               os.path.abspath(robot_config.config_folder)]
+    return sorted(folders, key=os.path.getmtime, reverse=True)
+
+
+def load_expression(folder, filename):
+    """ Returns the expression saved for a function in folder, or None
+    if there isn't one or it can't be loaded
+
+    Parameters
+    ----------
+    folder : string
+        the config folder the function was saved to
+    filename : string
+        the name of the function
+    """
+
+    path = os.path.join(folder, filename, filename)
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, 'rb') as afile:
+            return cloudpickle.load(afile)
+    except Exception:
+        # saved by a version of the libraries that can't be loaded
+        return None
+
+
+def matches_model(robot_config, folder, n_samples=5):
+    """ Returns True if the functions saved in folder were generated
+    from the current model of the config
+
+    The inertia matrix saved in folder, or if there isn't one the
+    position of the end-effector, is compared to the current model at
+    random joint angles. Folders with neither aren't adopted.
+
+    Parameters
+    ----------
+    robot_config : class instance
+        contains all relevant information about the arm
+        such as: number of joints, number of links, mass information etc.
+    folder : string
+        the config folder to check
+    n_samples : int, optional (Default: 5)
+        the number of joint angles compared at
+    """
+
+    M = load_expression(folder, 'M')
+    if M is not None:
+        expression = M
+        numeric = NumericDynamics(robot_config)
+        current = numeric.M
+    else:
+        expression = load_expression(folder, 'EE[0,0,0]_Tx')
+        if expression is None:
+            return False
+        T = robot_config._calc_T('EE')
+        current = sp.lambdify([robot_config.q], T[:3, 3], 'numpy')
+    expression = sp.Matrix(expression)
+    if not expression.free_symbols <= set(robot_config.q):
+        # functions of other parameters, such as symbolic inertia
+        return False
+    saved = sp.lambdify([robot_config.q], expression, 'numpy')
+
+    rng = np.random.RandomState(0)
+    for _ in range(n_samples):
+        q = rng.uniform(-np.pi, np.pi, robot_config.N_JOINTS)
+        saved_value = np.asarray(saved(q), dtype='float64')
+        current_value = np.asarray(current(q), dtype='float64')
+        if M is None:
+            # the saved position is in homogeneous coordinates
+            saved_value = saved_value[:3]
+        # the numeric inertia matrix differs from the symbolic one as far
+        # as the rotations of the transforms aren't orthonormal, so only
+        # differences relative to the largest entry count
+        if (saved_value.size != current_value.size or not np.allclose(
+                saved_value.flatten(), current_value.flatten(), rtol=0,
+                atol=1e-4 * np.max(np.abs(current_value)))):
+            return False
+    return True
+
+
+def migrate(robot_config, folders=None):
+    """ Moves the functions saved for earlier versions of a config into
+    its config_folder
+
+    Functions already in config_folder are kept, and only the saved
+    expression of each function moved. Returns a list of the
+    (folder, filename) of each function moved, the folders they were
+    moved from are removed if they're left empty.
+
+    Parameters
+    ----------
+    robot_config : class instance
+        contains all relevant information about the arm
+        such as: number of joints, number of links, mass information etc.
+    folders : list of strings, optional (Default: None)
+        the folders to adopt functions from, if None every other folder
+        saved for the robot. Folders that don't match the current model
+        of the config are skipped either way
+    """
+
+    folder = robot_config.config_folder
+    if folders is None:
+        folders = candidate_folders(robot_config)
+
+    moved = []
+    for legacy_folder in folders:
+        if (not os.path.isdir(legacy_folder) or
+                os.path.abspath(legacy_folder) == os.path.abspath(folder) or
+                not matches_model(robot_config, legacy_folder)):
+            continue
+
+        for filename in sorted(os.listdir(legacy_folder)):
+            if (not os.path.isdir(os.path.join(legacy_folder, filename)) or
+                    os.path.exists(os.path.join(folder, filename))):
+                continue
+            os.rename(os.path.join(legacy_folder, filename),
+                      os.path.join(folder, filename))
+            remove_functions(os.path.join(folder, filename), filename)
+            moved.append((legacy_folder, filename))
+
+        # the remaining files record when the folder was last used
+        if all(not os.path.isdir(os.path.join(legacy_folder, name))
+               for name in os.listdir(legacy_folder)):
+            shutil.rmtree(legacy_folder)
+    return moved
+
+
+def remove_functions(function_folder, filename):
+    """ Removes everything saved for a function but its expression
+
+    Parameters
+    ----------
+    function_folder : string
+        the folder saved for the function
+    filename : string
+        the name of the function, and of its saved expression
+    """
+
+    if not os.path.isdir(function_folder):
+        return
+    for saved_file in os.listdir(function_folder):
+        if saved_file == filename:
+            continue
+        path = os.path.join(function_folder, saved_file)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m abr_control.migrate_cache',
+        description='Adopt the functions saved by earlier versions of the '
+        'library for a robot config')
+    parser.add_argument(
+        '--arm', required=True,
+        help='the arm to adopt functions for, e.g. jaco2 or ur5')
+    parser.add_argument(
+        '--hand-attached', action='store_true',
+        help='create the config with hand_attached=True (jaco2)')
+    parser.add_argument(
+        '--from', dest='folders', action='append', default=None,
+        metavar='FOLDER',
+        help='a config folder to adopt functions from, can be repeated, '
+        'defaults to every other folder saved for the arm')
+    args = parser.parse_args(args)
+
+    arm = importlib.import_module('abr_control.arms.%s' % args.arm)
+    kwargs = {}
+    if args.hand_attached:
+        kwargs['hand_attached'] = True
+    robot_config = arm.Config(**kwargs)
+
+    moved = migrate(robot_config, folders=args.folders)
+    for legacy_folder, filename in moved:
+        print('Adopted %s from %s' % (filename, legacy_folder))
+    print('\nAdopted %i functions into %s' % (
+        len(moved), robot_config.config_folder))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Generates and saves every function a robot config can need ahead of
+time, so that nothing is generated inside a control loop. Configs created
+with require_cached=True check that this has been done.
+
+Example usage:
+
+    python -m abr_control.precompile --arm jaco2 --hand-attached \
+        --offset 0 0 0.12 --use-cython --dynamics Tx,J,M,C --rows xyz
+
+On machines with little memory, --streaming generates each function one
+matrix entry at a time, and the peak memory used while generating each
+function is reported.
+"""
+import argparse
+import importlib
+import time
+
+from abr_control.arms import backends
+
+
+def precompile(robot_config, offsets=(), dynamics=(), rows='xyzabg'):
+    """ Loads or generates every function a robot config can need
+
+    Returns a list of (filename, seconds, status) tuples, where status
+    is 'cached' if the function was already saved to file, and
+    'generated' otherwise.
+
+    Parameters
+    ----------
+    robot_config : class instance
+        contains all relevant information about the arm
+        such as: number of joints, number of links, mass information etc.
+    offsets : list of numpy.array, optional (Default: ())
+        [x,y,z] offsets inside the end-effector reference frame, for
+        which Tx, J, dJ, and T_inv are also needed [meters]
+    dynamics : list of tuples of strings, optional (Default: ())
+        the sets of quantities requested from dynamics() for the
+        end-effector, at each of the offsets and [0,0,0]
+    rows : string, optional (Default: 'xyzabg')
+        the rows of J, dJ and dJ_dq requested from dynamics()
+    """
+
+    timings = []
+    for filename, generate in robot_config._required_functions(
+            offsets=offsets, dynamics=dynamics, rows=rows):
+        status = 'cached' if robot_config._is_cached(filename) else (
+            'generated')
+        start_time = time.time()
+        generate()
+        timings.append((filename, time.time() - start_time, status))
+    return timings
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m abr_control.precompile',
+        description='Generate and save every function a robot config '
+        'can need ahead of time')
+    parser.add_argument(
+        '--arm', required=True,
+        help='the arm to generate functions for, e.g. jaco2 or ur5')
+    parser.add_argument(
+        '--hand-attached', action='store_true',
+        help='create the config with hand_attached=True (jaco2)')
+    parser.add_argument(
+        '--offset', nargs=3, type=float, action='append', default=[],
+        metavar=('X', 'Y', 'Z'),
+        help='an [x,y,z] offset inside the end-effector reference frame, '
+        'registered on the config so that Tx, J, dJ, and T_inv are also '
+        'generated with its values folded in, can be repeated')
+    parser.add_argument(
+        '--dynamics', action='append', default=[],
+        metavar='QUANTITIES',
+        help='comma separated quantities requested from dynamics(), '
+        'e.g. Tx,J,M,C, can be repeated')
+    parser.add_argument(
+        '--rows', default='xyzabg',
+        help='the rows of J, dJ and dJ_dq requested from dynamics(), e.g. '
+        'xyz for the position rows used by OSC and Sliding')
+    parser.add_argument(
+        '--symbolic-inertia', action='store_true',
+        help='generate M, g, C, C_dq and C_v with the link masses and '
+        'inertias as parameters, see BaseConfig.set_link_inertia')
+    parser.add_argument(
+        '--use-cython', action='store_true',
+        help='compile the functions with Cython')
+    parser.add_argument(
+        '--backend', default=None,
+        choices=['auto'] + sorted(backends.BACKENDS),
+        help='how the functions are evaluated, auto benchmarks every '
+        'available backend and uses the fastest for each function')
+    parser.add_argument(
+        '--n-processes', type=int, default=1,
+        help='the number of processes used to derive the expressions')
+    parser.add_argument(
+        '--streaming', action='store_true',
+        help='generate the functions one matrix entry at a time, which '
+        'bounds the memory needed for arms with many joints')
+    parser.add_argument(
+        '--structured', action='store_true',
+        help='generate Tx, J, M and g in terms of the transforms along '
+        'the kinematic chain, calculated once in order')
+    args = parser.parse_args(args)
+
+    arm = importlib.import_module('abr_control.arms.%s' % args.arm)
+    kwargs = {'use_cython': args.use_cython,
+              'backend': args.backend,
+              'n_processes': args.n_processes,
+              'streaming': args.streaming,
+              'structured': args.structured,
+              'symbolic_inertia': args.symbolic_inertia}
+    if args.hand_attached:
+        kwargs['hand_attached'] = True
+    if len(args.offset) > 0:
+        kwargs['OFFSETS'] = {'offset%i' % ii: offset
+                             for ii, offset in enumerate(args.offset)}
+    robot_config = arm.Config(**kwargs)
+
+    timings = precompile(
+        robot_config,
+        dynamics=[tuple(want.split(',')) for want in args.dynamics],
+        rows=args.rows)
+
+    width = max(len(filename) for filename, _, _ in timings)
+    print('\n%s %10s %14s  %s' % (
+        'function'.ljust(width), 'time (s)', 'peak RSS (MB)', 'status'))
+    for filename, seconds, status in timings:
+        peak = robot_config.generation_peak_rss.get(filename, None)
+        print('%s %10.3f %14s  %s' % (
+            filename.ljust(width), seconds,
+            '-' if peak is None else '%.1f' % (peak / 2**20), status))
+    print('%s %10.3f' % ('total'.ljust(width),
+                         sum(seconds for _, seconds, _ in timings)))
+    print('\nFunctions saved to %s' % robot_config.config_folder)
+
+
+if __name__ == '__main__':
+    main()
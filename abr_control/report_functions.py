@@ -0,0 +1,300 @@
+"""
+Reports how expensive each function saved to a config's cache is: the
+number of operations in the expression it was generated from, before
+and after common subexpression elimination, the size of the saved
+expression and of everything generated for it, and the median and 99th
+percentile time per call of the function with each backend. Functions
+generated with structured are counted, and generated for the other
+backends, in terms of the intermediate variables they were generated
+with.
+
+Functions saved with a backend are loaded from the cache, for the other
+backends they are generated from the saved expression into a temporary
+folder, which can take a while for the large matrices of arms with many
+joints, such as C of the jaco2. The report can be saved as JSON, to
+track changes in the cost of the functions across releases.
+
+Example usage:
+
+    python -m abr_control.report_functions --arm jaco2 --hand-attached \
+        --backends numpy,math --function M --function EE[0,0,0]_J
+"""
+import argparse
+import importlib
+import json
+import os
+import shutil
+import tempfile
+
+import cloudpickle
+import numpy as np
+
+from abr_control import manage_cache
+from abr_control.arms import backends, base_config
+from abr_control.version import version
+
+
+def saved_functions(robot_config):
+    """ Returns the names of the functions saved to the config's cache,
+    sorted
+
+    Only folders with an expression and a function generated from it by
+    any of the backends are included, not the expressions saved only to
+    derive others from, such as dM.
+
+    Parameters
+    ----------
+    robot_config : class instance
+        contains all relevant information about the arm
+        such as: number of joints, number of links, mass information etc.
+    """
+
+    folder = robot_config.config_folder
+    if not os.path.isdir(folder):
+        return []
+    filenames = []
+    for filename in os.listdir(folder):
+        function_folder = os.path.join(folder, filename)
+        if not os.path.isfile(os.path.join(function_folder, filename)):
+            continue
+        if any(backend.is_saved(function_folder, filename)
+               for backend in backends.BACKENDS.values()):
+            filenames.append(filename)
+    return sorted(filenames)
+
+
+def generated_expression(robot_config, filename):
+    """ Returns the (intermediates, expression) a saved function was
+    generated from
+
+    The expression in terms of the intermediate variables of the
+    kinematic chain if it was generated with structured, otherwise no
+    intermediate variables and the saved expression.
+
+    Parameters
+    ----------
+    robot_config : class instance
+        contains all relevant information about the arm
+    filename : string
+        the name of the function
+    """
+
+    folder = os.path.join(robot_config.config_folder, filename)
+    path = os.path.join(folder, base_config.STRUCTURED)
+    if not os.path.isfile(path):
+        path = os.path.join(folder, filename)
+        if not os.path.isfile(path):
+            raise ValueError('No expression saved for %s' % filename)
+        with open(path, 'rb') as afile:
+            return [], cloudpickle.load(afile)
+    with open(path, 'rb') as afile:
+        return cloudpickle.load(afile)
+
+
+def load_function(robot_config, filename, backend, expression, parameters,
+                  temporary_folder, intermediates=()):
+    """ Returns a function with a backend, loaded from the cache if it's
+    saved there, otherwise generated into temporary_folder
+
+    Returns None if the backend can't generate the function.
+
+    Parameters
+    ----------
+    robot_config : class instance
+        contains all relevant information about the arm
+    filename : string
+        the name of the function
+    backend : string
+        the name of the backend
+    expression : sympy.Matrix or list of sympy.Matrix
+        the expression the function was generated from
+    parameters : list of lists of sympy.Symbol
+        the groups of parameters of the function
+    temporary_folder : string
+        the folder to generate functions not saved to the cache into
+    intermediates : list of tuples, optional (Default: ())
+        the (sympy.Symbol, expression) pairs of intermediate variables
+        the expression is written in terms of
+    """
+
+    folder = os.path.join(robot_config.config_folder, filename)
+    function = backends.BACKENDS[backend].load(folder, filename)
+    if function is not None:
+        return function
+
+    folder = os.path.join(temporary_folder, backend, filename)
+    os.makedirs(folder)
+    if isinstance(expression, list):
+        # the fused dynamics() functions are only lambdified
+        if backend != 'numpy':
+            return None
+        return backends.BACKENDS['numpy'].generate(
+            folder, filename, expression, parameters, cse=True)
+    return backends.BACKENDS[backend].generate(
+        folder, filename, expression, parameters, intermediates)
+
+
+def report(robot_config, backend_names=None, filenames=None, n_calls=1000):
+    """ Returns the cost of each function saved to the config's cache
+
+    Returns a dictionary keyed by function name, of dictionaries with
+    'ops' and 'ops_cse', the number of operations in the expression the
+    function was generated from, before and after common subexpression
+    elimination, 'structured', whether it was generated in terms of the
+    transforms of the kinematic chain, 'expression_bytes' and
+    'folder_bytes', the size of the saved expression and of its folder,
+    and 'latency_us', the 'median' and 'p99' time per call of the
+    function with each backend, in microseconds.
+
+    Parameters
+    ----------
+    robot_config : class instance
+        contains all relevant information about the arm
+        such as: number of joints, number of links, mass information etc.
+    backend_names : list of strings, optional (Default: None)
+        the backends to time the functions with, if None every available
+        backend
+    filenames : list of strings, optional (Default: None)
+        the functions to report on, if None every saved function
+    n_calls : int, optional (Default: 1000)
+        the number of calls timed for each function and backend
+    """
+
+    if backend_names is None:
+        backend_names = backends.available()
+    if filenames is None:
+        filenames = saved_functions(robot_config)
+
+    results = {}
+    temporary_folder = tempfile.mkdtemp()
+    try:
+        for filename in filenames:
+            path = os.path.join(robot_config.config_folder, filename, filename)
+            intermediates, expression = generated_expression(
+                robot_config, filename)
+            parameters = robot_config._function_parameters(filename)
+            sizes = [len(group) for group in parameters]
+
+            latency = {}
+            for backend in backend_names:
+                function = load_function(
+                    robot_config, filename, backend, expression, parameters,
+                    temporary_folder, intermediates)
+                if function is None:
+                    continue
+                times = backends.call_times(function, sizes, n_calls) * 1e6
+                latency[backend] = {'median': float(np.median(times)),
+                                    'p99': float(np.percentile(times, 99))}
+
+            results[filename] = {
+                'ops': backends.count_ops(
+                    expression, intermediates, cse=False),
+                'ops_cse': backends.count_ops(expression, intermediates),
+                'structured': len(intermediates) > 0,
+                'expression_bytes': os.path.getsize(path),
+                'folder_bytes': manage_cache.folder_size(
+                    os.path.dirname(path)),
+                'latency_us': latency}
+    finally:
+        shutil.rmtree(temporary_folder, ignore_errors=True)
+    return results
+
+
+def print_report(results, backend_names):
+    """ Prints a table of the cost of each function
+
+    Parameters
+    ----------
+    results : dictionary
+        the cost of each function, see report
+    backend_names : list of strings
+        the backends to print the latency of
+    """
+
+    width = max([len('function')] + [len(filename) for filename in results])
+    print(('%s %10s %10s %10s %10s   %s' % (
+        'function'.ljust(width), 'ops', 'ops (CSE)', 'expression', 'folder',
+        '   '.join('%-19s' % ('%s (us)' % name)
+                   for name in backend_names))).rstrip())
+    print('%s %10s %10s %10s %10s   %s' % (
+        ''.ljust(width), '', '', '', '',
+        '   '.join('%9s %9s' % ('median', 'p99') for _ in backend_names)))
+    for filename, result in results.items():
+        latency = result['latency_us']
+        print('%s %10i %10i %10s %10s   %s' % (
+            filename.ljust(width), result['ops'], result['ops_cse'],
+            manage_cache.format_size(result['expression_bytes']),
+            manage_cache.format_size(result['folder_bytes']),
+            '   '.join(
+                '%9.2f %9.2f' % (latency[name]['median'],
+                                 latency[name]['p99'])
+                if name in latency else '%9s %9s' % ('-', '-')
+                for name in backend_names)))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m abr_control.report_functions',
+        description='Report the number of operations, size and time per '
+        'call of the functions saved to a config\'s cache')
+    parser.add_argument(
+        '--arm', required=True,
+        help='the arm to report on, e.g. jaco2 or ur5')
+    parser.add_argument(
+        '--hand-attached', action='store_true',
+        help='create the config with hand_attached=True (jaco2)')
+    parser.add_argument(
+        '--symbolic-inertia', action='store_true',
+        help='report on the functions generated with the link masses and '
+        'inertias as parameters')
+    parser.add_argument(
+        '--structured', action='store_true',
+        help='report on the functions generated with structured=True')
+    parser.add_argument(
+        '--backends', default=None,
+        help='comma separated backends to time the functions with, '
+        'defaults to every available backend')
+    parser.add_argument(
+        '--function', action='append', default=None, metavar='NAME',
+        help='a function to report on, e.g. M or EE[0,0,0]_J, can be '
+        'repeated, defaults to every saved function')
+    parser.add_argument(
+        '--n-calls', type=int, default=1000,
+        help='the number of calls timed for each function and backend')
+    parser.add_argument(
+        '--json', default=None, metavar='PATH',
+        help='also save the report as JSON to PATH')
+    args = parser.parse_args(args)
+
+    arm = importlib.import_module('abr_control.arms.%s' % args.arm)
+    kwargs = {'symbolic_inertia': args.symbolic_inertia,
+              'structured': args.structured}
+    if args.hand_attached:
+        kwargs['hand_attached'] = True
+    robot_config = arm.Config(**kwargs)
+
+    backend_names = (backends.available() if args.backends is None
+                     else args.backends.split(','))
+    for name in backend_names:
+        if name not in backends.available():
+            raise ValueError('Backend not available: %s' % name)
+    results = report(
+        robot_config, backend_names=backend_names,
+        filenames=args.function,
+        n_calls=args.n_calls)
+
+    print('\nFunctions saved to %s' % robot_config.config_folder)
+    print_report(results, backend_names)
+    if args.json is not None:
+        with open(args.json, 'w') as afile:
+            json.dump({'version': version,
+                       'robot': robot_config.ROBOT_NAME,
+                       'config_hash': robot_config.config_hash,
+                       'n_calls': args.n_calls,
+                       'functions': results}, afile, indent=2,
+                      sort_keys=True)
+        print('\nReport saved to %s' % args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,12 @@
+import multiprocessing
 import numpy as np
+import os
+import pytest
+import stat
 
+from abr_control.arms import backends
 from abr_control.arms import twojoint as arm
+from abr_control.utils import os_utils
 
 from .testarm import TwoJoint
 
@@ -134,6 +140,56 @@ def test_M():
             assert np.allclose(robot_config.M(q), test_arm.M(q))
 
 
+def test_symmetric_M():
+    robot_config = arm.Config()
+
+    # the mirrored entries are the same expressions, calculated once
+    M = robot_config._calc_M(lambdify=False)
+    assert M[0, 1] is M[1, 0]
+    assert backends.repeated_entries(M)
+    dM = robot_config._calc_dM()
+    assert dM[0][1] is dM[1][0]
+    assert dM[0][1][1] == M[0, 1].diff(robot_config.q[1])
+
+
+def test_symbolic_inertia():
+    robot_config = arm.Config(symbolic_inertia=True)
+    reference = arm.Config()
+    numeric = arm.Config(dynamics_engine='numeric')
+    q = np.array([.3, -1.2])
+    dq = np.array([.5, 2.0])
+
+    assert robot_config.config_hash != reference.config_hash
+    assert np.allclose(robot_config.M(q), reference.M(q))
+    assert np.allclose(robot_config.g(q), reference.g(q))
+    assert np.allclose(robot_config.C(q, dq), reference.C(q, dq))
+
+    # adding a payload to the last link is a numeric update
+    config_hash = robot_config.config_hash
+    M_func = robot_config._M
+    for config in (robot_config, numeric):
+        config.set_link_inertia(2, mass=2.5, inertia=[.2, .2, .3])
+    assert robot_config.config_hash == config_hash
+    assert robot_config._M is M_func
+    assert not np.allclose(robot_config.M(q), reference.M(q))
+    assert np.allclose(robot_config.M(q), numeric.M(q), atol=1e-5)
+    assert np.allclose(robot_config.g(q), numeric.g(q), atol=1e-5)
+    assert np.allclose(robot_config.C_dq(q, dq), numeric.C_dq(q, dq),
+                       atol=1e-5)
+    assert np.allclose(robot_config.C_v(q, dq, q), numeric.C_v(q, dq, q),
+                       atol=1e-5)
+    dynamics = robot_config.dynamics(q, dq, want=('J', 'M', 'g', 'C'))
+    assert np.allclose(dynamics['M'], numeric.M(q), atol=1e-5)
+    assert np.allclose(dynamics['C'], numeric.C(q, dq), atol=1e-5)
+    out = np.zeros(2)
+    assert np.allclose(robot_config.g(q, out=out), numeric.g(q), atol=1e-5)
+    assert np.allclose(robot_config.M_batch([q, q])[1], numeric.M(q),
+                       atol=1e-5)
+
+    with pytest.raises(Exception):
+        reference.set_link_inertia(2, mass=2.5)
+
+
 def test_g():
     test_arm = TwoJoint()
     robot_config = arm.Config()
@@ -158,3 +214,435 @@ def test_C():
                 for dq1 in q_vals:
                     dq = [dq0, dq1]
                     assert np.allclose(robot_config.C(q, dq), test_arm.C(q, dq))
+
+
+def test_batch():
+    robot_config = arm.Config()
+
+    q_vals = np.linspace(0, 2*np.pi, 10)
+    q = np.array([[q0, q1] for q0 in q_vals for q1 in q_vals])
+    dq = q[::-1] - np.pi
+    x = [.1, .2, .3]
+
+    for name in ['link0', 'joint0', 'link1', 'joint1', 'link2', 'EE']:
+        Tx = robot_config.Tx_batch(name, q, x=x)
+        J = robot_config.J_batch(name, q)
+        R = robot_config.R_batch(name, q)
+        T_inv = robot_config.T_inv_batch(name, q)
+        assert Tx.shape == (q.shape[0], 3)
+        assert J.shape == (q.shape[0], 6, 2)
+        for ii in range(q.shape[0]):
+            assert np.allclose(Tx[ii], robot_config.Tx(name, q[ii], x=x))
+            assert np.allclose(J[ii], robot_config.J(name, q[ii]))
+            assert np.allclose(R[ii], robot_config.R(name, q[ii]))
+            assert np.allclose(T_inv[ii], robot_config.T_inv(name, q[ii]))
+
+    dJ = robot_config.dJ_batch('EE', q, dq)
+    M = robot_config.M_batch(q)
+    g = robot_config.g_batch(q)
+    C = robot_config.C_batch(q, dq)
+    assert g.shape == (q.shape[0], 2)
+    for ii in range(q.shape[0]):
+        assert np.allclose(dJ[ii], robot_config.dJ('EE', q[ii], dq[ii]))
+        assert np.allclose(M[ii], robot_config.M(q[ii]))
+        assert np.allclose(g[ii], robot_config.g(q[ii]))
+        assert np.allclose(C[ii], robot_config.C(q[ii], dq[ii]))
+
+    # an offset per state, and the same constant offset for every state
+    for x in (np.random.RandomState(0).uniform(-.5, .5, (q.shape[0], 3)),
+              np.zeros((q.shape[0], 3))):
+        Tx = robot_config.Tx_batch('EE', q, x=x)
+        J = robot_config.J_batch('EE', q, x=x)
+        dJ = robot_config.dJ_batch('EE', q, dq, x=x)
+        for ii in range(q.shape[0]):
+            assert np.allclose(Tx[ii], robot_config.Tx('EE', q[ii], x=x[ii]))
+            assert np.allclose(J[ii], robot_config.J('EE', q[ii], x=x[ii]))
+            assert np.allclose(
+                dJ[ii], robot_config.dJ('EE', q[ii], dq[ii], x=x[ii]))
+
+
+def test_dynamics():
+    robot_config = arm.Config()
+
+    want = ('Tx', 'J', 'dJ', 'M', 'g', 'C', 'R', 'T_inv')
+    q_vals = np.linspace(0, 2*np.pi, 10)
+    for q0 in q_vals:
+        for q1 in q_vals:
+            q = [q0, q1]
+            dq = [q1 - np.pi, q0]
+            for x in ([0, 0, 0], [.1, .2, .3]):
+                dynamics = robot_config.dynamics(
+                    q, dq, name='link2', x=x, want=want)
+                assert sorted(dynamics.keys()) == sorted(want)
+                assert np.allclose(
+                    dynamics['Tx'], robot_config.Tx('link2', q, x=x))
+                assert np.allclose(
+                    dynamics['J'], robot_config.J('link2', q, x=x))
+                assert np.allclose(
+                    dynamics['dJ'], robot_config.dJ('link2', q, dq, x=x))
+                assert np.allclose(dynamics['M'], robot_config.M(q))
+                assert np.allclose(dynamics['g'], robot_config.g(q))
+                assert np.allclose(dynamics['C'], robot_config.C(q, dq))
+                assert np.allclose(
+                    dynamics['R'], robot_config.R('link2', q))
+                assert np.allclose(
+                    dynamics['T_inv'], robot_config.T_inv('link2', q, x=x))
+
+
+def test_parallel_generation(tmpdir):
+    serial = arm.Config()
+    serial.config_folder = str(tmpdir.mkdir('serial'))
+    parallel = arm.Config(n_processes=2)
+    parallel.config_folder = str(tmpdir.mkdir('parallel'))
+
+    for robot_config in [serial, parallel]:
+        robot_config._calc_C(lambdify=False)
+        robot_config._calc_g(lambdify=False)
+        robot_config._calc_dJ('EE', x=[0, 0, 0], lambdify=False)
+
+    # the same expressions are saved to file
+    assert sorted(serial.generation_times.keys()) == sorted(
+        parallel.generation_times.keys())
+    for filename in serial.generation_times:
+        assert serial._load_from_file(filename, lambdify=False)[0] == (
+            parallel._load_from_file(filename, lambdify=False)[0])
+
+
+def test_cython(tmpdir):
+    pytest.importorskip('Cython')
+    folder = str(tmpdir)
+
+    lambdified = arm.Config()
+    compiled = arm.Config(use_cython=True)
+    compiled.config_folder = folder
+
+    q = [.3, -1.2]
+    assert np.allclose(compiled.J('EE', q), lambdified.J('EE', q))
+    assert np.allclose(compiled.M(q), lambdified.M(q))
+
+    # the compiled functions are loaded from file on later starts
+    loaded = arm.Config(use_cython=True)
+    loaded.config_folder = folder
+    assert loaded._is_cached('M')
+    assert np.allclose(loaded.M(q), lambdified.M(q))
+
+
+def test_generated_source(tmpdir):
+    folder = str(tmpdir)
+    robot_config = arm.Config()
+    robot_config.config_folder = folder
+
+    q = [.3, -1.2]
+    dq = [.5, 2.0]
+    M = robot_config.M(q)
+    dynamics = robot_config.dynamics(q, dq, want=('J', 'C'))
+    J_batch = robot_config.J_batch('EE', [q, dq])
+
+    # warm starts load the generated source, not the saved expressions
+    os.remove(os.path.join(folder, 'M', 'M'))
+    filename = 'EE[0,0,0]_dynamics[J,C]'
+    os.remove(os.path.join(folder, filename, filename))
+    filename = 'EE[0,0,0]_J_batch'
+    os.remove(os.path.join(folder, filename, filename))
+
+    loaded = arm.Config()
+    loaded.config_folder = folder
+    assert np.allclose(loaded.M(q), M)
+    loaded_dynamics = loaded.dynamics(q, dq, want=('J', 'C'))
+    for key in dynamics:
+        assert np.allclose(loaded_dynamics[key], dynamics[key])
+    assert np.allclose(loaded.J_batch('EE', [q, dq]), J_batch)
+
+
+def test_register_offset(tmpdir):
+    offset = [.1, -.05, .2]
+    general = arm.Config()
+    general.config_folder = str(tmpdir.mkdir('general'))
+    robot_config = arm.Config(OFFSETS={'tip': offset})
+    robot_config.config_folder = str(tmpdir.mkdir('registered'))
+
+    q = [.3, -1.2]
+    dq = [.5, 2.0]
+    assert np.allclose(robot_config.Tx('EE', q, x=offset),
+                       general.Tx('EE', q, x=offset))
+    assert np.allclose(robot_config.J('EE', q, x=offset),
+                       general.J('EE', q, x=offset))
+    assert np.allclose(robot_config.dJ('EE', q, dq, x=offset),
+                       general.dJ('EE', q, dq, x=offset))
+
+    # the registered offset is folded into the expression as a constant
+    assert 'EE[0.1,-0.05,0.2]' in robot_config._J
+    J = robot_config._calc_J('EE', x=offset, lambdify=False)
+    assert len(J.free_symbols & set(robot_config.x)) == 0
+
+    # other offsets use the general function
+    other = [.3, 0, 0]
+    assert np.allclose(robot_config.Tx('EE', q, x=other),
+                       general.Tx('EE', q, x=other))
+    assert 'EE' in robot_config._Tx
+
+
+def test_at():
+    robot_config = arm.Config()
+    q = np.array([.3, -1.2])
+    dq = np.array([.5, 2.0])
+
+    with robot_config.at(q, dq):
+        dynamics = robot_config.dynamics(q, dq, want=('Tx', 'J', 'M', 'g'))
+        assert robot_config.tick_misses == 4
+        # quantities from dynamics() are shared with the accessors
+        M = robot_config.M(q)
+        assert M is dynamics['M']
+        assert robot_config.J('EE', q) is dynamics['J']
+        assert robot_config.tick_hits == 2
+        # and are read-only
+        with pytest.raises(ValueError):
+            M[0, 0] = 0
+        # the accessors calculate each quantity once
+        C = robot_config.C(q, dq)
+        assert robot_config.C(q, dq) is C
+        out = np.zeros((2, 2))
+        assert robot_config.C(q, dq, out=out) is out
+        assert np.allclose(out, C)
+        assert robot_config.tick_misses == 5
+        assert robot_config.tick_hits == 4
+        # other states are calculated as usual
+        other = robot_config.M(q + .1)
+        assert not np.allclose(other, M)
+        assert robot_config.tick_misses == 5
+
+    # outside of the with block nothing is shared
+    assert np.allclose(robot_config.M(q), M)
+    assert robot_config.M(q) is not M
+    assert robot_config._tick is None
+    assert np.allclose(robot_config.C(q, dq), C)
+
+
+def test_Tx_all():
+    robot_config = arm.Config()
+
+    assert robot_config.FRAMES == [
+        'link0', 'joint0', 'link1', 'joint1', 'link2', 'EE']
+    assert robot_config.joint_frames == [1, 3, 5]
+    q_vals = np.linspace(0, 2*np.pi, 10)
+    for q0 in q_vals:
+        for q1 in q_vals:
+            q = [q0, q1]
+            positions = robot_config.Tx_all(q)
+            assert positions.shape == (6, 3)
+            xyz, R = robot_config.Tx_all(q, rotations=True)
+            assert np.allclose(xyz, positions)
+            for ii, name in enumerate(robot_config.FRAMES):
+                assert np.allclose(positions[ii], robot_config.Tx(name, q))
+                assert np.allclose(R[ii], robot_config.R(name, q))
+
+
+def test_rows():
+    robot_config = arm.Config()
+    q = np.array([.3, -1.2])
+    dq = np.array([.5, 2.0])
+    x = [.1, 0, 0]
+
+    J = robot_config.J('EE', q, x=x)
+    assert np.allclose(robot_config.J('EE', q, x=x, rows='xyz'), J[:3])
+    assert np.allclose(robot_config.J('EE', q, x=x, rows='gx'), J[[5, 0]])
+    assert np.allclose(robot_config.dJ('EE', q, dq, rows='xyz'),
+                       robot_config.dJ('EE', q, dq)[:3])
+    assert np.allclose(robot_config.dJ_dq('EE', q, dq, rows='xyz'),
+                       robot_config.dJ_dq('EE', q, dq)[:3])
+    out = np.zeros((3, 2))
+    assert robot_config.J('EE', q, rows='xyz', out=out) is out
+    assert np.allclose(out, robot_config.J('EE', q)[:3])
+    assert np.allclose(robot_config.J_batch('EE', [q, q], rows='xyz')[1],
+                       robot_config.J('EE', q)[:3])
+
+    # the position rows are generated without the orientation terms
+    J = robot_config._calc_J('EE', x=[0, 0, 0], rows='xyz', lambdify=False)
+    assert J.shape == (3, 2)
+
+    dynamics = robot_config.dynamics(
+        q, dq, want=('J', 'dJ_dq', 'M'), rows='xyz')
+    assert np.allclose(dynamics['J'], robot_config.J('EE', q)[:3])
+    assert np.allclose(dynamics['dJ_dq'], robot_config.dJ_dq('EE', q, dq)[:3])
+    with robot_config.at(q, dq):
+        dynamics = robot_config.dynamics(q, dq, want=('J',), rows='xyz')
+        assert robot_config.J('EE', q, rows='xyz') is dynamics['J']
+        assert robot_config.J('EE', q).shape == (6, 2)
+
+    with pytest.raises(ValueError):
+        robot_config.J('EE', q, rows='xyzw')
+
+
+def test_backends(tmpdir):
+    q = [.3, -1.2]
+    dq = [.5, 2.0]
+    reference = arm.Config()
+
+    for name in backends.available() + ['auto']:
+        robot_config = arm.Config(backend=name)
+        robot_config.config_folder = str(tmpdir.mkdir(name))
+        assert np.allclose(robot_config.J('EE', q), reference.J('EE', q))
+        assert np.allclose(robot_config.C(q, dq), reference.C(q, dq))
+        assert robot_config._is_cached('EE[0,0,0]_J')
+        # the functions take an array or sequence per group of parameters
+        read_only = np.array(q)
+        read_only.flags.writeable = False
+        assert np.allclose(robot_config._J['EE[0,0,0]'](read_only, (0, 0, 0)),
+                           reference.J('EE', q))
+
+    # the backend chosen for each function is loaded on later starts
+    loaded = arm.Config(backend='auto')
+    loaded.config_folder = str(tmpdir.join('auto'))
+    assert loaded._function_backend('C') == robot_config.backends['C']
+    assert np.allclose(loaded.C(q, dq), reference.C(q, dq))
+
+    with pytest.raises(ValueError):
+        arm.Config(backend='fortran')
+
+
+def test_streaming(tmpdir):
+    q = [.3, -1.2]
+    dq = [.5, 2.0]
+    v = [.1, .7]
+    reference = arm.Config()
+
+    for name in [name for name in backends.available()
+                 if backends.BACKENDS[name].streams]:
+        robot_config = arm.Config(backend=name, streaming=True)
+        robot_config.config_folder = str(tmpdir.mkdir(name))
+        assert np.allclose(robot_config.M(q), reference.M(q))
+        assert np.allclose(robot_config.C(q, dq), reference.C(q, dq))
+        assert np.allclose(robot_config.C_v(q, dq, v),
+                           reference.C_v(q, dq, v))
+        M = np.empty((2, 2))
+        robot_config.M(q, out=M)
+        assert np.allclose(M, reference.M(q))
+        dynamics = robot_config.dynamics(q, dq, want=('J', 'M'))
+        assert np.allclose(dynamics['J'], reference.J('EE', q))
+        assert np.allclose(dynamics['M'], reference.M(q))
+        # the mirrored entries of M are still calculated once
+        with open(os.path.join(robot_config.config_folder, 'M',
+                               'M_out.py')) as afile:
+            lines = dict(line.strip().split(' = ') for line in afile
+                         if line.startswith('    out['))
+        assert lines['out[1, 0]'] == lines['out[0, 1]']
+
+    if os_utils.peak_rss() is not None:
+        assert robot_config.generation_peak_rss['C'] > 0
+    with pytest.raises(ValueError):
+        arm.Config(backend='cython', streaming=True)
+
+
+def test_structured(tmpdir):
+    q = np.array([.3, -1.2])
+    x = np.array([.1, -.2, .3])
+    reference = arm.Config()
+
+    for name in backends.available():
+        robot_config = arm.Config(backend=name, structured=True)
+        robot_config.config_folder = str(tmpdir.mkdir(name))
+        assert np.allclose(robot_config.Tx('EE', q, x=x),
+                           reference.Tx('EE', q, x=x))
+        assert np.allclose(robot_config.J('EE', q, rows='xy'),
+                           reference.J('EE', q, rows='xy'))
+        assert np.allclose(robot_config.M(q), reference.M(q))
+        assert np.allclose(robot_config.g(q), reference.g(q))
+        M = np.empty((2, 2))
+        robot_config.M(q, out=M)
+        assert np.allclose(M, reference.M(q))
+
+    # M takes fewer operations in terms of the transforms along the
+    # chain, which are calculated once, in order
+    with open(os.path.join(robot_config.config_folder, 'M',
+                           'M_out.py')) as afile:
+        source = afile.read()
+    assert 0 < source.index('_cq0 = ') < source.index('_cq1 = ')
+
+    # the Jacobians from the chain match the derivatives of Tx
+    for frame in ('link1', 'EE'):
+        J = robot_config._chain_J(frame, x, 'xyzabg')
+        function = backends.BACKENDS['numpy'].generate(
+            str(tmpdir.mkdir(frame)), 'J', J,
+            [robot_config.q, robot_config.x],
+            robot_config._chain_intermediates(J))
+        assert np.allclose(function(q, x), reference.J(frame, q, x=x))
+
+
+def test_config_hash():
+    robot_config = arm.Config()
+    # parameters that don't change the generated functions share a folder
+    scaled = arm.Config(MEANS={'q': np.zeros(2), 'dq': np.zeros(2)})
+    assert scaled.config_hash == robot_config.config_hash
+    assert scaled.config_folder == robot_config.config_folder
+
+    # changing the model changes the hash
+    heavier = arm.Config()
+    heavier._M_LINKS[1] = heavier._M_LINKS[1] * 2
+    assert heavier.config_hash != robot_config.config_hash
+    longer = arm.Config()
+    longer.L = longer.L * 2
+    assert longer.config_hash != robot_config.config_hash
+    # structured functions differ slightly, so aren't shared
+    structured = arm.Config(structured=True)
+    assert structured.config_hash != robot_config.config_hash
+
+    # the transforms are multiplied out from the hashed kinematic chain
+    moved = arm.Config()
+    name, joint, transform = moved._CHAIN[-1]
+    moved._CHAIN[-1] = (name, joint, transform * 2)
+    assert moved.config_hash != robot_config.config_hash
+    assert moved._calc_T('EE') != robot_config._calc_T('EE')
+    assert moved._calc_T('link2') == robot_config._calc_T('link2')
+
+
+def test_lazy_model(tmpdir):
+    q = [.3, -1.2]
+    robot_config = arm.Config()
+    robot_config.config_folder = str(tmpdir)
+    # nothing is multiplied out until a function is generated
+    assert robot_config._J_orientation is None
+    assert len(robot_config._T) == 0
+    J = robot_config.J('EE', q)
+    assert robot_config._J_orientation is not None
+
+    # a config loading every function it uses from file never builds them
+    cached = arm.Config()
+    cached.config_folder = str(tmpdir)
+    assert np.allclose(cached.J('EE', q), J)
+    assert cached._J_orientation is None
+    assert len(cached._T) == 0
+
+
+def generate_M(folder):
+    """ Loads or generates M in folder, returning its value and whether
+    this process generated it """
+    robot_config = arm.Config()
+    robot_config.config_folder = folder
+    M = robot_config.M([.3, -1.2])
+    return M, 'M' in robot_config.generation_times
+
+
+def test_atomic_write(tmpdir):
+    path = str(tmpdir.join('saved'))
+    with os_utils.atomic_write(path) as afile:
+        afile.write('saved')
+    umask = os.umask(0o022)
+    os.umask(umask)
+    # created with the permissions of open, not of temporary files
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o666 & ~umask
+    with open(path) as afile:
+        assert afile.read() == 'saved'
+
+
+def test_concurrent_generation(tmpdir):
+    folder = str(tmpdir)
+    with multiprocessing.get_context('spawn').Pool(3) as pool:
+        results = pool.map(generate_M, [folder] * 3)
+
+    # one process generated M, the others waited and loaded it
+    assert sum(generated for _, generated in results) == 1
+    for M, _ in results:
+        assert np.allclose(M, results[0][0])
+    # no temporary files are left behind
+    assert not any(name.endswith('.tmp')
+                   for _, _, names in os.walk(folder) for name in names)
@@ -0,0 +1,78 @@
+import numpy as np
+import os
+import time
+
+from abr_control import manage_cache
+from abr_control.arms import base_config
+from abr_control.arms import twojoint as arm
+from abr_control.utils import os_utils
+
+
+def test_evict(tmpdir, monkeypatch):
+    monkeypatch.setattr(base_config, 'cache_dir', str(tmpdir))
+    q = np.array([.3, -1.2])
+    robot_config = arm.Config()
+    robot_config.M(q)
+    current = robot_config.config_folder
+
+    # a config folder and saved weights not used for a day
+    day_ago = time.time() - 24 * 60 * 60
+    stale = os.path.join(str(tmpdir), robot_config.ROBOT_NAME,
+                         'saved_functions', 'stale')
+    os.makedirs(os.path.join(stale, 'M'))
+    with open(os.path.join(stale, 'M', 'M'), 'wb') as f:
+        f.write(b'0' * 1000)
+    weights = os.path.join(str(tmpdir), 'saved_weights', 'run0.npz')
+    os.makedirs(os.path.dirname(weights))
+    np.savez_compressed(weights, weights=np.zeros(10))
+    for path in (os.path.join(stale, 'M', 'M'), os.path.join(stale, 'M'),
+                 stale, weights):
+        os.utime(path, (day_ago, day_ago))
+
+    # loading from the cache records its use
+    assert not os.path.isfile(os.path.join(current, manage_cache.LAST_USED))
+    arm.Config().M(q)
+    assert os.path.isfile(os.path.join(current, manage_cache.LAST_USED))
+
+    cached = manage_cache.entries(str(tmpdir))
+    assert [entry[0] for entry in cached][-1] == current
+    assert set(entry[0] for entry in cached[:2]) == set([stale, weights])
+
+    # saved weights are only evicted when asked for
+    assert manage_cache.evict(0, str(tmpdir), dry_run=True) == [
+        entry for entry in cached if entry[1] == 'functions']
+    # the saved weights count towards the size of the cache
+    removed = manage_cache.evict(
+        manage_cache.folder_size(current) + os.path.getsize(weights),
+        str(tmpdir))
+    assert [entry[0] for entry in removed] == [stale]
+    assert not os.path.exists(stale)
+    assert os.path.isfile(weights)
+    assert np.allclose(arm.Config().M(q), robot_config.M(q))
+
+    # config folders with a function locked by another process are kept
+    with os_utils.file_lock(os.path.join(current, 'M', '.lock')):
+        assert manage_cache.evict(0, str(tmpdir)) == []
+    assert os.path.isfile(os.path.join(current, 'M', 'M'))
+
+    manage_cache.evict(0, str(tmpdir), weights=True)
+    assert manage_cache.entries(str(tmpdir)) == []
+
+
+def test_main(tmpdir, capsys):
+    weights = os.path.join(str(tmpdir), 'saved_weights', 'run0.npz')
+    os.makedirs(os.path.dirname(weights))
+    np.savez_compressed(weights, weights=np.zeros(10))
+
+    manage_cache.main(['--folder', str(tmpdir), 'list'])
+    assert os.path.join('saved_weights', 'run0.npz') in (
+        capsys.readouterr().out)
+
+    manage_cache.main(['--folder', str(tmpdir), 'evict', '--max-size', '0',
+                       '--weights', '--dry-run'])
+    assert 'Would remove 1 entries' in capsys.readouterr().out
+    assert os.path.isfile(weights)
+
+    assert manage_cache.parse_size('2G') == 2 * 2 ** 30
+    assert manage_cache.parse_size('1.5k') == 1536
+    assert manage_cache.parse_size('100') == 100
@@ -0,0 +1,64 @@
+import hashlib
+import numpy as np
+import os
+
+from abr_control.arms import base_config
+from abr_control.arms import twojoint as arm
+from abr_control.migrate_cache import main, migrate
+
+
+def legacy_folder(robot_config, source):
+    """ The folder earlier versions of the library saved to, named by
+    the hash of the config's source file when the functions were saved """
+    return os.path.join(
+        base_config.cache_dir, robot_config.ROBOT_NAME, 'saved_functions',
+        hashlib.md5(source.encode('utf-8')).hexdigest())
+
+
+def test_migrate(tmpdir, monkeypatch):
+    monkeypatch.setattr(base_config, 'cache_dir', str(tmpdir))
+    q = np.array([.3, -1.2])
+
+    # save functions where earlier versions of the library did, for a
+    # source file that has been edited since
+    legacy = arm.Config()
+    legacy.config_folder = legacy_folder(legacy, 'an earlier source')
+    M = legacy.M(q)
+    legacy.g(q)
+    # and for a different model of the robot
+    heavier = arm.Config()
+    heavier._M_LINKS[1] = heavier._M_LINKS[1] * 2
+    heavier.config_folder = legacy_folder(heavier, 'a heavier source')
+    heavier.M(q)
+
+    robot_config = arm.Config()
+    assert not robot_config._is_cached('M')
+    moved = migrate(robot_config)
+    filenames = [filename for _, filename in moved]
+    assert 'M' in filenames and 'g' in filenames
+    assert not os.path.exists(legacy.config_folder)
+    # the folder saved for the heavier model isn't adopted
+    assert all(folder == legacy.config_folder for folder, _ in moved)
+    assert os.path.isfile(os.path.join(heavier.config_folder, 'M', 'M'))
+
+    # the expressions are adopted, the functions generated from them
+    robot_config = arm.Config()
+    assert os.path.isfile(os.path.join(robot_config.config_folder, 'M', 'M'))
+    assert not robot_config._is_cached('M')
+    assert np.allclose(robot_config.M(q), M)
+    assert 'M' not in robot_config.generation_times
+    # nothing left to adopt
+    assert migrate(robot_config) == []
+
+
+def test_main(tmpdir, monkeypatch, capsys):
+    monkeypatch.setattr(base_config, 'cache_dir', str(tmpdir))
+
+    legacy = arm.Config()
+    legacy.config_folder = str(tmpdir.join('copied'))
+    legacy.M(np.array([.3, -1.2]))
+
+    main(['--arm', 'twojoint', '--from', legacy.config_folder])
+    output = capsys.readouterr().out
+    assert 'Adopted M' in output
+    assert os.path.isfile(os.path.join(arm.Config().config_folder, 'M', 'M'))
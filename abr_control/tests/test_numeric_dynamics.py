@@ -0,0 +1,116 @@
+import numpy as np
+import sympy as sp
+
+from abr_control.arms import twojoint as arm
+from abr_control.arms.base_config import BaseConfig
+
+from .testarm import TwoJoint
+
+
+class SpatialConfig(BaseConfig):
+    """ A two joint arm with perpendicular joint axes and non-uniform
+    inertia, so that every term of the dynamics is non-trivial """
+
+    def __init__(self, **kwargs):
+
+        super(SpatialConfig, self).__init__(
+            N_JOINTS=2, N_LINKS=3, ROBOT_NAME='test_spatial', **kwargs)
+
+        self._M_LINKS = [
+            sp.diag(1.0, 1.0, 1.0, 0.1, 0.1, 0.1),  # link0
+            sp.diag(2.0, 2.0, 2.0, 0.3, 0.2, 0.1),  # link1
+            sp.diag(1.5, 1.5, 1.5, 0.05, 0.2, 0.4)]  # link2
+        self._M_JOINTS = [sp.diag(0.5, 0.5, 0.5, 0, 0, 0),
+                          sp.zeros(6, 6)]
+
+        self._CHAIN = [
+            ('link0', None, sp.Matrix([
+                [1, 0, 0, 0],
+                [0, 1, 0, 0],
+                [0, 0, 1, 0.1],
+                [0, 0, 0, 1]])),
+            ('joint0', None, sp.Matrix([
+                [1, 0, 0, 0],
+                [0, 1, 0, 0],
+                [0, 0, 1, 0.1],
+                [0, 0, 0, 1]])),
+            ('link1', 0, sp.Matrix([
+                [1, 0, 0, 0.3],
+                [0, 0, -1, 0.05],
+                [0, 1, 0, 0.2],
+                [0, 0, 0, 1]])),
+            ('joint1', None, sp.Matrix([
+                [1, 0, 0, 0.3],
+                [0, 1, 0, 0],
+                [0, 0, 1, 0],
+                [0, 0, 0, 1]])),
+            ('link2', 1, sp.Matrix([
+                [0, 0, 1, 0.2],
+                [0, 1, 0, 0.1],
+                [-1, 0, 0, 0],
+                [0, 0, 0, 1]])),
+            ('EE', None, sp.Matrix([
+                [1, 0, 0, 0.2],
+                [0, 1, 0, 0],
+                [0, 0, 1, 0],
+                [0, 0, 0, 1]]))]
+
+
+def test_twojoint():
+    test_arm = TwoJoint()
+    robot_config = arm.Config(dynamics_engine='numeric')
+
+    q_vals = np.linspace(0, 2*np.pi, 15)
+    for q0 in q_vals:
+        for q1 in q_vals:
+            q = [q0, q1]
+            assert np.allclose(robot_config.M(q), test_arm.M(q))
+            assert np.allclose(robot_config.g(q), test_arm.g(q))
+            for dq0 in q_vals[::3]:
+                for dq1 in q_vals[::3]:
+                    dq = [dq0, dq1]
+                    assert np.allclose(
+                        robot_config.C(q, dq), test_arm.C(q, dq),
+                        atol=1e-5)
+
+
+def test_parity():
+    symbolic = SpatialConfig()
+    numeric = SpatialConfig(dynamics_engine='numeric')
+
+    np.random.seed(0)
+    for ii in range(100):
+        q = np.random.random(2) * 2 * np.pi
+        dq = np.random.random(2) * 10 - 5
+        assert np.allclose(numeric.M(q), symbolic.M(q), atol=1e-5)
+        assert np.allclose(numeric.g(q), symbolic.g(q), atol=1e-5)
+        assert np.allclose(
+            numeric.C(q, dq), symbolic.C(q, dq), atol=1e-5)
+        v = np.random.random(2) * 10 - 5
+        assert np.allclose(
+            numeric.C_v(q, dq, v), symbolic.C_v(q, dq, v), atol=1e-4)
+
+
+def test_products():
+    # the product-form functions match the matrices they replace, on an
+    # arm where every term of the dynamics is non-trivial
+    robot_config = SpatialConfig()
+
+    np.random.seed(1)
+    for ii in range(20):
+        q = np.random.random(2) * 2 * np.pi
+        dq = np.random.random(2) * 10 - 5
+        v = np.random.random(2) * 10 - 5
+        C = robot_config.C(q, dq)
+        assert np.allclose(robot_config.C_dq(q, dq), np.dot(C, dq),
+                           atol=1e-4)
+        assert np.allclose(robot_config.C_v(q, dq, v), np.dot(C, v),
+                           atol=1e-4)
+        for name in ['link1', 'EE']:
+            assert np.allclose(
+                robot_config.dJ_dq(name, q, dq),
+                np.dot(robot_config.dJ(name, q, dq), dq), atol=1e-4)
+
+        dynamics = robot_config.dynamics(q, dq, want=('dJ_dq', 'C_dq'))
+        assert np.allclose(dynamics['C_dq'], np.dot(C, dq), atol=1e-4)
+        assert dynamics['dJ_dq'].shape == (6,)
@@ -0,0 +1,77 @@
+import numpy as np
+
+from abr_control.arms import twojoint as arm
+from abr_control.controllers import OSC, operational_space, signals
+
+
+def random_dynamics(n_joints):
+    A = np.random.random((n_joints, n_joints))
+    M = np.dot(A, A.T) + np.eye(n_joints)
+    J = np.random.random((3, n_joints))
+    return M, J
+
+
+def test_task_space_inertia():
+    np.random.seed(0)
+    for n_joints in [3, 6, 7]:
+        M, J = random_dynamics(n_joints)
+        M_inv = np.linalg.inv(M)
+
+        Mx, M_inv_JT = operational_space.task_space_inertia(M, J)
+        assert np.allclose(Mx, np.linalg.inv(np.dot(J, np.dot(M_inv, J.T))))
+        assert np.allclose(M_inv_JT, np.dot(M_inv, J.T))
+        # sharing the Cholesky factor gives the same results
+        L = operational_space.cholesky(M)
+        assert np.allclose(
+            operational_space.task_space_inertia(M, J, L=L)[0], Mx)
+
+        u_null = np.random.random(n_joints)
+        Jbar = np.dot(M_inv_JT, Mx)
+        null_filter = np.eye(n_joints) - np.dot(J.T, Jbar.T)
+        assert np.allclose(
+            operational_space.null_space(u_null, J, Mx, M_inv_JT),
+            np.dot(null_filter, u_null))
+
+
+def test_singular():
+    np.random.seed(1)
+    M, J = random_dynamics(2)
+    # a planar arm can't move along z, so J M^-1 J^T is singular
+    J[2] = 0
+
+    Mx = operational_space.task_space_inertia(M, J)[0]
+    assert np.all(np.isfinite(Mx))
+    expected = np.linalg.pinv(np.dot(J, np.dot(np.linalg.inv(M), J.T)))
+    assert np.allclose(Mx, expected, rtol=1e-3, atol=1e-6)
+
+    # close to singular is damped, by the ratio of the singular values,
+    # here about .002, rather than of the Cholesky diagonal, about .008
+    e = .004
+    J = np.array([[1, 0], [1 - e, np.sqrt(1 - (1 - e) ** 2)]])
+    s = np.linalg.svd(np.dot(J, J.T), compute_uv=False)
+    assert s[-1] < .005 * s[0] < s[-1] * 5
+    Mx = operational_space.task_space_inertia(np.eye(2), J)[0]
+    assert np.linalg.norm(Mx, 2) <= 1 / (.005 * s[0])
+
+    # not positive definite M falls back to the pseudo-inverse
+    assert operational_space.cholesky(np.zeros((2, 2))) is None
+    assert np.all(np.isfinite(
+        operational_space.task_space_inertia(np.zeros((2, 2)), J)[0]))
+
+
+def test_controllers():
+    robot_config = arm.Config()
+    q = np.array([.3, -1.2])
+    dq = np.array([.5, 2.0])
+
+    ctrlr = OSC(robot_config, kp=20, vmax=None)
+    u = ctrlr.generate(q, dq, target_pos=np.array([.5, .5, 0]))
+    assert u.shape == (2,) and np.all(np.isfinite(u))
+
+    # an obstacle touching the end-effector
+    xyz = robot_config.Tx('EE', q)
+    avoid = signals.AvoidObstacles(
+        robot_config, obstacles=[list(xyz) + [.05]])
+    u = avoid.generate(q)
+    assert u.shape == (2,) and np.all(np.isfinite(u))
+    assert np.any(u != 0)
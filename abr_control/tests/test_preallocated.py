@@ -0,0 +1,97 @@
+import sys
+import tracemalloc
+
+import numpy as np
+
+from abr_control.arms import twojoint as arm
+from abr_control.controllers import OSC, Floating, Joint, Sliding
+
+
+def numpy_allocations(function, n_ticks=5):
+    """ Returns the number of NumPy arrays allocated by n_ticks calls to
+    function, keeping every returned value alive
+
+    The arrays alive are counted at every call and return inside
+    function, so temporaries freed before function returns are counted
+    too, as long as they're alive when another function is called or
+    returns, as the operands and results of NumPy calls are.
+    """
+
+    # warm up, loading or generating everything needed
+    function()
+    results = []
+    domain = tracemalloc.DomainFilter(True, np.lib.tracemalloc_domain)
+    counts = []
+
+    def count_arrays(frame, event, arg):
+        snapshot = tracemalloc.take_snapshot().filter_traces([domain])
+        counts.append(len(snapshot.traces))
+
+    tracemalloc.start()
+    counts.append(0)
+    sys.setprofile(count_arrays)
+    try:
+        for ii in range(n_ticks):
+            results.append(function())
+    finally:
+        sys.setprofile(None)
+        tracemalloc.stop()
+
+    # every increase in the number of arrays alive is an allocation
+    return sum(max(after - before, 0)
+               for before, after in zip(counts[:-1], counts[1:]))
+
+
+def test_accessors():
+    robot_config = arm.Config()
+    q = np.array([.3, -1.2])
+    dq = np.array([.5, 2.0])
+
+    calls = [
+        ('M', (q,), (2, 2)), ('g', (q,), (2,)), ('C', (q, dq), (2, 2)),
+        ('Tx', ('EE', q), (3,)), ('J', ('EE', q), (6, 2)),
+        ('dJ', ('EE', q, dq), (6, 2)), ('R', ('EE', q), (3, 3)),
+        ('T_inv', ('EE', q), (4, 4)), ('C_dq', (q, dq), (2,)),
+        ('C_v', (q, dq, q), (2,)), ('dJ_dq', ('EE', q, dq), (6,))]
+    for name, args, shape in calls:
+        accessor = getattr(robot_config, name)
+        out = np.zeros(shape)
+        assert accessor(*args, out=out) is out
+        assert np.allclose(out, accessor(*args), atol=1e-6)
+        assert numpy_allocations(lambda: accessor(*args, out=out)) == 0
+    # the check is sensitive enough to catch the allocating calls,
+    # and temporaries that don't outlive the call
+    assert numpy_allocations(lambda: robot_config.M(q)) > 0
+    assert numpy_allocations(lambda: np.add(q, dq).sum()) > 0
+
+
+def test_controllers():
+    robot_config = arm.Config()
+    q = np.array([.3, -1.2])
+    dq = np.array([.5, 2.0])
+    target = np.array([1.0, .5])
+    out = np.zeros(2)
+
+    ctrlr = Joint(robot_config, kp=10)
+    u = ctrlr.generate(q, dq, target)
+    assert ctrlr.generate(q, dq, target, out=out) is out
+    assert np.allclose(out, u, atol=1e-5)
+    assert numpy_allocations(
+        lambda: ctrlr.generate(q, dq, target, out=out)) == 0
+
+    ctrlr = Floating(robot_config, dynamic=True)
+    u = ctrlr.generate(q, dq)
+    assert ctrlr.generate(q, dq, out=out) is out
+    assert np.allclose(out, u, atol=1e-5)
+    assert numpy_allocations(lambda: ctrlr.generate(q, dq, out=out)) == 0
+
+    # the operational space controllers still allocate the results of
+    # the decompositions of M and J every call, so only their results
+    # are checked
+    target = np.array([.5, .8, 0.0])
+    for ctrlr in [OSC(robot_config, kp=20, vmax=None),
+                  OSC(robot_config, kp=20, use_C=True, use_dJ=True),
+                  Sliding(robot_config)]:
+        u = ctrlr.generate(q, dq, target)
+        assert ctrlr.generate(q, dq, target, out=out) is out
+        assert np.allclose(out, u, atol=1e-5)
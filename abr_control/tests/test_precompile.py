@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from abr_control.arms import base_config
+from abr_control.arms import twojoint as arm
+from abr_control.precompile import main, precompile
+
+
+def test_precompile(tmpdir, monkeypatch):
+    monkeypatch.setattr(base_config, 'cache_dir', str(tmpdir))
+
+    with pytest.raises(Exception):
+        arm.Config(require_cached=True)
+
+    offset = [.1, .2, 0]
+    timings = precompile(arm.Config(), offsets=[offset],
+                         dynamics=[('Tx', 'J', 'M')])
+    assert all(status == 'generated' for _, _, status in timings)
+    filenames = [filename for filename, _, _ in timings]
+    for filename in ['EE[0,0,0]_J', 'link2[0,0,0]_dJ', 'joint1_R',
+                     'EE_Tinv', 'M', 'C', 'EE_dynamics[Tx,J,M]',
+                     'EE[0,0,0]_J_batch', 'EE_Tx_batch', 'M_batch']:
+        assert filename in filenames
+
+    # everything is now loaded from file
+    robot_config = arm.Config(require_cached=True)
+    q = np.array([.3, -1.2])
+    robot_config.M(q)
+    robot_config.J('EE', q, x=offset)
+    robot_config.dynamics(q, x=offset, want=('Tx', 'J', 'M'))
+    robot_config.M_batch([q, q])
+    robot_config.Tx_batch('EE', [q, q], x=[offset, [0, 0, 0]])
+    # but nothing can be generated
+    with pytest.raises(Exception):
+        robot_config.dynamics(q, want=('J', 'g'))
+
+
+def test_main(tmpdir, monkeypatch, capsys):
+    monkeypatch.setattr(base_config, 'cache_dir', str(tmpdir))
+
+    main(['--arm', 'twojoint', '--offset', '0', '0', '.1'])
+    output = capsys.readouterr().out
+    assert 'EE[0,0,0.1]_J' in output
+    assert 'total' in output
+    assert 'peak RSS' in output
+    arm.Config(require_cached=True, OFFSETS={'tip': [0, 0, .1]})
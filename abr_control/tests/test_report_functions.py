@@ -0,0 +1,84 @@
+import json
+import numpy as np
+import os
+
+from abr_control import report_functions
+from abr_control.arms import backends, base_config
+from abr_control.arms import twojoint as arm
+
+
+def test_report(tmpdir, monkeypatch):
+    monkeypatch.setattr(base_config, 'cache_dir', str(tmpdir))
+    q = np.array([.3, -1.2])
+    robot_config = arm.Config()
+    robot_config.M(q)
+    robot_config.J('EE', q)
+    robot_config.dJ('link1', q, q)
+    robot_config.dynamics(q, want=('Tx', 'J'))
+    robot_config.C(q, q)
+
+    filenames = report_functions.saved_functions(robot_config)
+    assert 'M' in filenames
+    assert 'EE[0,0,0]_J' in filenames
+    # expressions only saved to derive others from aren't functions
+    assert os.path.isdir(os.path.join(robot_config.config_folder, 'dM'))
+    assert 'dM' not in filenames
+
+    results = report_functions.report(
+        robot_config, backend_names=['numpy', 'math'], n_calls=20)
+    assert sorted(results) == filenames
+    M = results['M']
+    assert M['ops_cse'] <= M['ops']
+    assert 0 < M['expression_bytes'] <= M['folder_bytes']
+    for backend in ('numpy', 'math'):
+        latency = M['latency_us'][backend]
+        assert 0 < latency['median'] <= latency['p99']
+    # the fused dynamics() functions are only lambdified
+    dynamics, = [filename for filename in filenames
+                 if 'dynamics[' in filename]
+    assert list(results[dynamics]['latency_us']) == ['numpy']
+    # functions generated for the report aren't saved to the cache
+    assert not os.path.isfile(os.path.join(
+        robot_config.config_folder, 'M', 'M_math.py'))
+
+
+def test_structured(tmpdir, monkeypatch):
+    monkeypatch.setattr(base_config, 'cache_dir', str(tmpdir))
+    robot_config = arm.Config(structured=True, backend='math')
+    robot_config.M(np.array([.3, -1.2]))
+
+    # the operations are counted on the expression M was generated from,
+    # in terms of the transforms of the kinematic chain
+    intermediates, expression = report_functions.generated_expression(
+        robot_config, 'M')
+    assert len(intermediates) > 0
+    results = report_functions.report(
+        robot_config, backend_names=['numpy', 'math'], filenames=['M'],
+        n_calls=20)
+    assert results['M']['structured']
+    assert results['M']['ops'] == backends.count_ops(
+        expression, intermediates, cse=False)
+    assert results['M']['ops'] < backends.count_ops(
+        robot_config._calc_M(lambdify=False), cse=False)
+
+
+def test_main(tmpdir, monkeypatch, capsys):
+    monkeypatch.setattr(base_config, 'cache_dir', str(tmpdir))
+    q = np.array([.3, -1.2])
+    arm.Config().M(q)
+    arm.Config().J('EE', q)
+    capsys.readouterr()
+
+    path = str(tmpdir.join('report.json'))
+    report_functions.main(['--arm', 'twojoint', '--backends', 'numpy',
+                           '--function', 'M', '--n-calls', '20',
+                           '--json', path])
+    output = capsys.readouterr().out
+    assert 'median' in output
+    assert 'EE[0,0,0]_J' not in output
+
+    with open(path) as afile:
+        saved = json.load(afile)
+    assert saved['robot'] == 'twojoint'
+    assert list(saved['functions']) == ['M']
+    assert 'p99' in saved['functions']['M']['latency_us']['numpy']
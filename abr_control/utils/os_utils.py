@@ -1,4 +1,17 @@
+import contextlib
 import os
+import sys
+import tempfile
+import time
+
+try:
+    import fcntl
+    import resource
+except ImportError:
+    # Windows
+    fcntl = None
+    resource = None
+    import msvcrt
 
 
 def makedirs(folder):
@@ -22,4 +35,155 @@ def makedirs(folder):
         if parent and not os.path.isdir(parent):
             makedirs(parent)
         if directory:
-            os.mkdir(folder)
+            try:
+                os.mkdir(folder)
+            except FileExistsError:
+                # created by another process since the check
+                if not os.path.isdir(folder):
+                    raise
+
+
+@contextlib.contextmanager
+def file_lock(path, message=None, blocking=True):
+    """ Holds an exclusive lock on a file inside the with block
+
+    Blocks until no other process holds the lock, or if blocking is
+    False raises BlockingIOError. The lock is released when the block
+    exits, or the process ends.
+
+    Parameters
+    ----------
+    path : string
+        the file to lock, created if it does not exist
+    message : string, optional (Default: None)
+        printed if another process holds the lock, before waiting for it
+    blocking : boolean, optional (Default: True)
+        if False, raises BlockingIOError rather than waiting for another
+        process to release the lock
+    """
+
+    with open(path, 'a+') as afile:
+        if not _lock(afile, blocking=False):
+            if not blocking:
+                raise BlockingIOError('%s is locked by another process' % path)
+            if message is not None:
+                print(message)
+            _lock(afile, blocking=True)
+        try:
+            yield
+        finally:
+            _unlock(afile)
+
+
+def _lock(afile, blocking):
+    """ Locks an open file, returning False if it's locked by another
+    process and blocking is False """
+
+    if fcntl is not None:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(afile.fileno(), flags)
+        except (BlockingIOError, PermissionError):
+            return False
+        return True
+
+    # msvcrt locks the first byte, and gives up after 10 seconds when
+    # blocking, so keep retrying
+    afile.seek(0)
+    while True:
+        try:
+            msvcrt.locking(afile.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            if not blocking:
+                return False
+            time.sleep(.1)
+
+
+def _unlock(afile):
+    """ Unlocks a file locked with _lock """
+
+    if fcntl is not None:
+        fcntl.flock(afile.fileno(), fcntl.LOCK_UN)
+    else:
+        afile.seek(0)
+        msvcrt.locking(afile.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode='w'):
+    """ Opens a temporary file to write to, renamed to path on success
+
+    Other processes see either the previous contents of path or the
+    complete new contents, never a partially written file. If the with
+    block raises, the temporary file is removed and path is untouched.
+    The file is given the permissions of a file created with open,
+    rather than the owner only permissions of temporary files, so that
+    caches shared between users stay readable.
+
+    Parameters
+    ----------
+    path : string
+        the file to write
+    mode : string, optional (Default: 'w')
+        the mode to open the file with, 'w' or 'wb'
+    """
+
+    folder, name = os.path.split(path)
+    handle, temporary = tempfile.mkstemp(
+        dir=folder or '.', prefix='.%s.' % name, suffix='.tmp')
+    try:
+        with os.fdopen(handle, mode) as afile:
+            yield afile
+        os.chmod(temporary, 0o666 & ~_umask())
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def _umask():
+    """ Returns the file mode creation mask of this process """
+
+    # the mask can only be read by setting it
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+def peak_rss():
+    """ Returns the peak resident set size of this process in bytes
+
+    On Linux, the peak since the last call to reset_peak_rss, otherwise
+    the peak since the process started. None if it can't be measured.
+    """
+
+    try:
+        with open('/proc/self/status') as afile:
+            for line in afile:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes, except on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def reset_peak_rss():
+    """ Resets the peak resident set size of this process to its current
+    resident set size
+
+    Returns False if it can't be reset, which is only supported on Linux.
+    """
+
+    try:
+        with open('/proc/self/clear_refs', 'w') as afile:
+            afile.write('5')
+    except OSError:
+        return False
+    return True
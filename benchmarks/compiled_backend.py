@@ -0,0 +1,67 @@
+"""
+Compares the per-call latency of the functions generated with each of
+the available backends (NumPy lambdify, math, Numba, Cython), for each
+accessor of each of the shipped arms.
+
+The first run generates and compiles every function, which can take a
+long time for the larger arms, later runs load them from the cache.
+
+Usage: python compiled_backend.py [arm names]
+"""
+import importlib
+import sys
+import timeit
+
+import numpy as np
+
+from abr_control.arms import backends
+
+
+ARMS = ['onelink', 'twojoint', 'threejoint', 'ur5', 'jaco2']
+N_CALLS = 1000
+
+
+def accessors(robot_config, q, dq):
+    """ Returns the calls to time, keyed by the name of the accessor """
+    return {
+        'Tx': lambda: robot_config.Tx('EE', q),
+        'J': lambda: robot_config.J('EE', q),
+        'dJ': lambda: robot_config.dJ('EE', q, dq),
+        'M': lambda: robot_config.M(q),
+        'g': lambda: robot_config.g(q),
+        'C': lambda: robot_config.C(q, dq),
+        'R': lambda: robot_config.R('EE', q),
+        'T_inv': lambda: robot_config.T_inv('EE', q),
+    }
+
+
+def benchmark(arm_name):
+    try:
+        arm = importlib.import_module('abr_control.arms.%s' % arm_name)
+    except ImportError as e:
+        print('Skipping %s: %s' % (arm_name, e))
+        return
+
+    q = np.random.random(arm.Config().N_JOINTS) * 2 * np.pi
+    dq = np.random.random(q.shape) * 2 - 1
+
+    names = backends.available()
+    times = {}
+    for backend in names:
+        robot_config = arm.Config(backend=backend)
+        for name, call in accessors(robot_config, q, dq).items():
+            # first call generates or loads the function
+            call()
+            times[(name, backend)] = timeit.timeit(
+                call, number=N_CALLS) / N_CALLS
+
+    print('\n%s, per call (us)' % arm_name)
+    print('%8s' % '' + ''.join('%10s' % backend for backend in names))
+    for name in accessors(None, q, dq):
+        print('%8s' % name + ''.join(
+            '%10.2f' % (times[(name, backend)] * 1e6) for backend in names))
+
+
+if __name__ == '__main__':
+    for arm_name in sys.argv[1:] or ARMS:
+        benchmark(arm_name)
@@ -0,0 +1,82 @@
+"""
+Compares the time to construct a config, and to construct it and
+evaluate a function saved to file, before and after building the
+symbolic transforms of the kinematic chain lazily.
+
+Before, constructing a config multiplied the transforms along the chain
+to every joint for the orientation part of the Jacobian, which is now
+only done when a function is generated. The functions are generated
+first, in a temporary folder, so that both times are on a warm cache.
+
+Usage: python config_construction.py [arm names]
+"""
+import importlib
+import sys
+import tempfile
+import time
+
+import numpy as np
+import sympy as sp
+
+
+ARMS = [('ur5', {}), ('jaco2', {}), ('jaco2', {'hand_attached': True})]
+N_CONSTRUCTIONS = 10
+
+
+def construct_before(Config, kwargs, folder):
+    """ Constructs the config as it was, building the orientation part
+    of the Jacobian from the transforms of the chain """
+    robot_config = Config(**kwargs)
+    robot_config.config_folder = folder
+    robot_config.J_orientation
+    return robot_config
+
+
+def construct_after(Config, kwargs, folder):
+    """ Constructs the config """
+    robot_config = Config(**kwargs)
+    robot_config.config_folder = folder
+    return robot_config
+
+
+def benchmark(arm_name, kwargs):
+    try:
+        arm = importlib.import_module('abr_control.arms.%s' % arm_name)
+    except ImportError as e:
+        print('Skipping %s: %s' % (arm_name, e))
+        return
+
+    folder = tempfile.mkdtemp()
+    q = np.random.random(arm.Config(**kwargs).N_JOINTS) * 2 * np.pi
+    # warm the cache
+    construct_after(arm.Config, kwargs, folder).J('EE', q)
+
+    times = {}
+    for construct in (construct_before, construct_after):
+        for evaluate in (False, True):
+            seconds = 0
+            for ii in range(N_CONSTRUCTIONS):
+                # don't let SymPy reuse the expressions of the last config
+                sp.core.cache.clear_cache()
+                start_time = time.time()
+                robot_config = construct(arm.Config, kwargs, folder)
+                if evaluate:
+                    robot_config.J('EE', q)
+                seconds += time.time() - start_time
+            times[construct, evaluate] = seconds / N_CONSTRUCTIONS * 1e3
+
+    print('\n%s %s' % (arm_name, kwargs if kwargs else ''))
+    print('%24s %10s %10s %8s' % ('', 'before', 'after', 'speedup'))
+    for evaluate, label in ((False, 'construct (ms)'),
+                            (True, 'construct + J (ms)')):
+        before = times[construct_before, evaluate]
+        after = times[construct_after, evaluate]
+        print('%24s %10.1f %10.1f %7.1fx' % (
+            label, before, after, before / after))
+
+
+if __name__ == '__main__':
+    arms = ARMS if len(sys.argv) == 1 else [
+        (arm_name, {}) for arm_name in sys.argv[1:]]
+    for arm_name, kwargs in arms:
+        benchmark(arm_name, kwargs)
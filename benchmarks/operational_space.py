@@ -0,0 +1,65 @@
+"""
+Compares the per-call latency of the operational space calculations in
+OSC.generate, the task space inertia matrix and null space filter,
+before and after factoring M with a Cholesky decomposition.
+
+The calculations only depend on the number of joints, so they are timed
+on random inertia matrices and Jacobians for 3, 6 and 7 joint arms.
+
+Usage: python operational_space.py [numbers of joints]
+"""
+import sys
+import timeit
+
+import numpy as np
+
+from abr_control.controllers import operational_space
+
+
+N_JOINTS = [3, 6, 7]
+N_CALLS = 10000
+
+
+def inverse(M, J, u_null):
+    """ The calculations as they were, inverting M and J M^-1 J^T and
+    forming the N_JOINTS x N_JOINTS null space filter """
+    M_inv = np.linalg.inv(M)
+    Mx_inv = np.dot(J, np.dot(M_inv, J.T))
+    if np.linalg.det(Mx_inv) != 0:
+        Mx = np.linalg.inv(Mx_inv)
+    else:
+        Mx = np.linalg.pinv(Mx_inv, rcond=.005)
+    Jbar = np.dot(M_inv, np.dot(J.T, Mx))
+    null_filter = np.eye(M.shape[0]) - np.dot(J.T, Jbar.T)
+    return Mx, np.dot(null_filter, u_null)
+
+
+def cholesky(M, J, u_null):
+    """ The calculations with operational_space """
+    Mx, M_inv_JT = operational_space.task_space_inertia(M, J)
+    return Mx, operational_space.null_space(u_null, J, Mx, M_inv_JT)
+
+
+def benchmark(n_joints):
+    A = np.random.random((n_joints, n_joints))
+    M = np.dot(A, A.T) + np.eye(n_joints)
+    J = np.random.random((3, n_joints))
+    u_null = np.random.random(n_joints)
+
+    # check the calculations agree before timing them
+    for expected, result in zip(inverse(M, J, u_null),
+                                cholesky(M, J, u_null)):
+        assert np.allclose(expected, result)
+
+    times = [timeit.timeit(lambda: function(M, J, u_null),
+                           number=N_CALLS) / N_CALLS * 1e6
+             for function in (inverse, cholesky)]
+    print('%8i %14.2f %14.2f %7.1fx' % (
+        n_joints, times[0], times[1], times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    print('%8s %14s %14s %8s' % ('joints', 'inverse (us)', 'cholesky (us)',
+                                 'speedup'))
+    for n_joints in sys.argv[1:] or N_JOINTS:
+        benchmark(int(n_joints))
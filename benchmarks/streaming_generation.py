@@ -0,0 +1,78 @@
+"""
+Compares the time and peak memory to generate the centrifugal and
+Coriolis function C, and the time per call of the generated function,
+with and without streaming generation.
+
+Without streaming, the numpy backend lambdifies the whole matrix at
+once, printing every entry in full, while with streaming the entries
+are written to file one at a time, with subexpressions used more than
+once calculated once. Each generation runs in a new process, so that the
+peak memory is its own and nothing is reused from SymPy's cache.
+
+Usage: python streaming_generation.py [backend] [arm names]
+"""
+import importlib
+import multiprocessing
+import sys
+import tempfile
+import time
+import timeit
+
+import numpy as np
+
+from abr_control.utils import os_utils
+
+
+ARMS = [('ur5', {}), ('jaco2', {'hand_attached': True})]
+
+
+def generate(arm_name, kwargs, backend, streaming):
+    """ Generates C in a temporary folder, returning the time taken,
+    the peak memory, and the time per call of the function """
+    arm = importlib.import_module('abr_control.arms.%s' % arm_name)
+    robot_config = arm.Config(backend=backend, streaming=streaming, **kwargs)
+    robot_config.config_folder = tempfile.mkdtemp()
+    os_utils.reset_peak_rss()
+    start_time = time.time()
+    C = robot_config._calc_C()
+    seconds = time.time() - start_time
+    peak = os_utils.peak_rss()
+
+    q = np.random.random(robot_config.N_JOINTS) * 2 * np.pi
+    dq = np.random.random(robot_config.N_JOINTS) * 2 - 1
+    n_calls = 3 if seconds > 60 and not streaming else 100
+    call = min(timeit.repeat(lambda: C(q, dq), number=n_calls,
+                             repeat=3)) / n_calls
+    return seconds, peak, call
+
+
+def benchmark(arm_name, kwargs, backend):
+    try:
+        importlib.import_module('abr_control.arms.%s' % arm_name)
+    except ImportError as e:
+        print('Skipping %s: %s' % (arm_name, e))
+        return
+
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for streaming in (False, True):
+        with context.Pool(1) as pool:
+            results[streaming] = pool.apply(
+                generate, (arm_name, kwargs, backend, streaming))
+
+    print('\n%s%s, %s backend' % (
+        arm_name, ' %s' % kwargs if kwargs else '', backend))
+    print('%24s %10s %10s' % ('', 'whole', 'streaming'))
+    for ii, (label, scale) in enumerate((
+            ('generate C (s)', 1), ('peak RSS (MB)', 2**-20),
+            ('C per call (us)', 1e6))):
+        print('%24s %10.1f %10.1f' % (
+            label, results[False][ii] * scale, results[True][ii] * scale))
+
+
+if __name__ == '__main__':
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'numpy'
+    arms = ARMS if len(sys.argv) < 3 else [
+        (arm_name, {}) for arm_name in sys.argv[2:]]
+    for arm_name, kwargs in arms:
+        benchmark(arm_name, kwargs, backend)
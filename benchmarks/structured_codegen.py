@@ -0,0 +1,80 @@
+"""
+Compares the number of operations and the time per call of the Tx, J, M
+and g functions generated with every entry expanded in terms of the
+joint angles, and with structured generation, in terms of intermediate
+variables for the transforms along the kinematic chain. With
+structured, configs use whichever of the two takes fewer operations.
+
+Operations are counted as the functions are generated by the backend,
+after common subexpression elimination for the math and numba backends,
+and for M, which all backends calculate common subexpressions of once.
+
+Usage: python structured_codegen.py [backend] [arm names]
+"""
+import importlib
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+
+from abr_control.arms import backends
+
+
+ARMS = ['ur5', 'jaco2']
+N_CALLS = 1000
+
+
+def functions(robot_config):
+    """ The (label, expression, calc, parameters) of each function """
+    x = [0, 0, 0]
+    return [
+        ('Tx', robot_config._calc_Tx('EE', x=x, lambdify=False),
+         lambda: robot_config._chain_Tx('EE', x), [robot_config.q]),
+        ('J', robot_config._calc_J('EE', x=x, lambdify=False),
+         lambda: robot_config._chain_J('EE', x, 'xyzabg'), [robot_config.q]),
+        ('M', robot_config._calc_M(lambdify=False), robot_config._chain_M,
+         [robot_config.q]),
+        ('g', robot_config._calc_g(lambdify=False), robot_config._chain_g,
+         [robot_config.q])]
+
+
+def benchmark(arm_name, backend):
+    try:
+        arm = importlib.import_module('abr_control.arms.%s' % arm_name)
+    except ImportError as e:
+        print('Skipping %s: %s' % (arm_name, e))
+        return
+
+    robot_config = arm.Config(structured=True)
+    robot_config.config_folder = tempfile.mkdtemp()
+    q = np.random.random(robot_config.N_JOINTS) * 2 * np.pi
+
+    print('\n%s, %s backend' % (arm_name, backend))
+    print('%6s %10s %10s %12s %12s %8s' % (
+        '', 'ops', 'ops', 'us per call', 'us per call', 'speedup'))
+    print('%6s %10s %10s %12s %12s' % (
+        '', 'expanded', 'structured', 'expanded', 'structured'))
+    for label, expression, calc, parameters in functions(robot_config):
+        structured = calc()
+        intermediates = robot_config._chain_intermediates(structured)
+        cse = (backends.BACKENDS[backend].cse or
+               backends.repeated_entries(expression))
+        ops = [backends.count_ops(expression, cse=cse),
+               backends.count_ops(structured, intermediates, cse=cse)]
+        times = []
+        for generate_args in ((expression, parameters),
+                              (structured, parameters, intermediates)):
+            function = backends.BACKENDS[backend].generate(
+                tempfile.mkdtemp(), label, *generate_args)
+            function(q)
+            times.append(timeit.timeit(
+                lambda: function(q), number=N_CALLS) / N_CALLS * 1e6)
+        print('%6s %10i %10i %12.2f %12.2f %7.1fx' % (
+            label, ops[0], ops[1], times[0], times[1], times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    backend = sys.argv[1] if len(sys.argv) > 1 else 'math'
+    for arm_name in sys.argv[2:] or ARMS:
+        benchmark(arm_name, backend)
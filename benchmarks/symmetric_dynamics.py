@@ -0,0 +1,108 @@
+"""
+Compares the generation time of the inertia and Coriolis matrices, and
+the per-call latency of the generated inertia matrix function, before
+and after using the symmetry of M: deriving only its upper triangle and
+each of its partial derivatives once, and calculating the mirrored
+entries once in the generated functions.
+
+The Jacobians of the links and joints are generated first, in a
+temporary folder, so that both times only include M and C.
+
+Usage: python symmetric_dynamics.py [arm names]
+"""
+import importlib
+import sys
+import tempfile
+import time
+import timeit
+
+import numpy as np
+import sympy as sp
+
+from abr_control.arms import backends
+
+
+ARMS = ['ur5', 'jaco2']
+N_CALLS = 100
+
+
+def generate_before(robot_config):
+    """ M and C as they were derived, with the full J^T M J of every
+    link and joint, and every derivative of M in the Christoffel symbols
+    taken where it's used """
+    J_links, J_joints = robot_config._calc_J_links_joints()
+    M = sp.zeros(robot_config.N_JOINTS)
+    for J, M_segment in zip(J_links + J_joints,
+                            robot_config._M_LINKS + robot_config._M_JOINTS):
+        M += J.T * M_segment * J
+
+    q = robot_config.q
+    dq = robot_config.dq
+    C = sp.zeros(robot_config.N_JOINTS)
+    for kk in range(robot_config.N_JOINTS):
+        for jj in range(robot_config.N_JOINTS):
+            for ii in range(robot_config.N_JOINTS):
+                C[kk, jj] += .5 * (M[kk, jj].diff(q[ii]) +
+                                   M[kk, ii].diff(q[jj]) -
+                                   M[ii, jj].diff(q[kk])) * dq[ii]
+    return M, C
+
+
+def generate_after(robot_config):
+    """ M and C with the config """
+    return (robot_config._calc_M(lambdify=False),
+            robot_config._calc_C(lambdify=False))
+
+
+def benchmark(arm_name):
+    try:
+        arm = importlib.import_module('abr_control.arms.%s' % arm_name)
+    except ImportError as e:
+        print('Skipping %s: %s' % (arm_name, e))
+        return
+
+    robot_config = arm.Config()
+    robot_config.config_folder = tempfile.mkdtemp()
+    robot_config._calc_J_links_joints()
+
+    seconds = []
+    results = []
+    for generate in (generate_before, generate_after):
+        start_time = time.time()
+        results.append(generate(robot_config))
+        seconds.append(time.time() - start_time)
+
+    # check the expressions agree before timing them
+    q = np.random.random(robot_config.N_JOINTS) * 2 * np.pi
+    dq = np.random.random(q.shape) * 2 - 1
+    for before, after, parameters in zip(
+            results[0], results[1], (robot_config.q,
+                                     robot_config.q + robot_config.dq)):
+        values = tuple(q) + tuple(dq)
+        assert np.allclose(
+            sp.lambdify(parameters, before)(*values[:len(parameters)]),
+            sp.lambdify(parameters, after)(*values[:len(parameters)]))
+
+    print('\n%s' % arm_name)
+    print('%24s %10s %10s %8s' % ('', 'before', 'after', 'speedup'))
+    print('%24s %10.1f %10.1f %7.1fx' % (
+        'generate M and C (s)', seconds[0], seconds[1],
+        seconds[0] / seconds[1]))
+    # the functions of M as they were generated, lambdified without
+    # common subexpression elimination, or with the math backend
+    before = {
+        'numpy': sp.lambdify([robot_config.q], results[0][0], 'numpy'),
+        'math': backends.BACKENDS['math'].generate(
+            tempfile.mkdtemp(), 'M', results[0][0], [robot_config.q])}
+    for name in ('numpy', 'math'):
+        after = backends.BACKENDS[name].generate(
+            tempfile.mkdtemp(), 'M', results[1][0], [robot_config.q])
+        times = [timeit.timeit(lambda: function(q), number=N_CALLS) /
+                 N_CALLS * 1e6 for function in (before[name], after)]
+        print('%24s %10.2f %10.2f %7.1fx' % (
+            'M, %s (us)' % name, times[0], times[1], times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    for arm_name in sys.argv[1:] or ARMS:
+        benchmark(arm_name)